@@ -7,9 +7,22 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi_limiter import FastAPILimiter
 
 from src.conf.config import settings
+from src.middleware.compression import CompressionMiddleware
+from src.middleware.idempotency import IdempotencyMiddleware
+from src.middleware.load_shedding import LoadSheddingMiddleware
+from src.middleware.pool_metrics import PoolMetricsMiddleware
+from src.middleware.profiler import ProfilerMiddleware
+from src.middleware.query_monitor import QueryMonitorMiddleware
+from src.middleware.tracing import TracingMiddleware
 from src.routes.contacts import router as contacts_router
 from src.routes.auth import auth_router as auth_router
 from src.routes.users import user_router
+from src.routes.admin import admin_router
+from src.services.idempotency import idempotency_store
+from src.services.load_shedding import admission_controller
+from src.services.pool_metrics import pool_metrics
+from src.services.query_monitor import query_monitor
+from src.services.tracing import tracer
 
 app = FastAPI()
 
@@ -20,16 +33,62 @@ app = FastAPI()
 #     await FastAPILimiter.init(r)
 
 
+# Додається першим, тобто найглибше: відхилені відповіді 503 теж отримують заголовки CORS
+if settings.load_shedding_enabled:
+    app.add_middleware(LoadSheddingMiddleware, controller=admission_controller)
+
+# Поза контролем навантаження: дублікати, що чекають на відповідь першого запиту, не займають місць воркера
+if settings.idempotency_enabled:
+    app.add_middleware(
+        IdempotencyMiddleware,
+        store=idempotency_store,
+        paths=settings.idempotency_paths,
+        ttl=settings.idempotency_ttl,
+        lock_ttl=settings.idempotency_lock_ttl,
+        wait_timeout=settings.idempotency_wait_timeout,
+        terminal_statuses=settings.idempotency_terminal_statuses,
+    )
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Total-Count", "X-Total-Count-Exact", "X-Next-Cursor", "Idempotent-Replayed",
+                    "traceresponse"],
+)
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=settings.compression_minimum_size,
+    gzip_level=settings.compression_gzip_level,
+    brotli_quality=settings.compression_brotli_quality,
 )
 
+if settings.query_monitor_enabled:
+    app.add_middleware(QueryMonitorMiddleware, monitor=query_monitor)
+
+if settings.pool_metrics_enabled:
+    app.add_middleware(PoolMetricsMiddleware, metrics=pool_metrics)
+
+if settings.profiler_enabled:
+    app.add_middleware(
+        ProfilerMiddleware,
+        output_dir=settings.profiler_output_dir,
+        sample_rate=settings.profiler_sample_rate,
+        secret_key=settings.secret_key,
+        algorithm=settings.algorithm,
+        interval=settings.profiler_interval,
+        trace_memory=settings.profiler_tracemalloc,
+    )
+
+# Додається останнім, тобто зовні: серверний спан охоплює весь час обробки запиту
+if settings.tracing_enabled:
+    app.add_middleware(TracingMiddleware, tracer=tracer)
+
 app.include_router(contacts_router, tags=["contacts"])
 app.include_router(auth_router, tags=["auth"], prefix="/auth")
 app.include_router(user_router, tags=["users"], prefix="/users")
+app.include_router(admin_router, tags=["admin"], prefix="/admin")
 
 
 async def main():
@@ -0,0 +1,24 @@
+"""add users.shard
+
+Revision ID: 3f2a9c1d7e45
+Revises: bf01865be6ba
+Create Date: 2026-10-19 09:12:40.118203
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f2a9c1d7e45'
+down_revision = 'bf01865be6ba'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('users', sa.Column('shard', sa.String(length=50), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('users', 'shard')
@@ -0,0 +1,52 @@
+"""per-user contact version counters
+
+Revision ID: 5d7b3e9a1c20
+Revises: 8c4e1b7a2d93
+Create Date: 2026-10-19 14:21:05.732914
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5d7b3e9a1c20'
+down_revision = '8c4e1b7a2d93'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('contact_version_counters',
+                    sa.Column('user_id', sa.Integer(), autoincrement=False, nullable=False),
+                    sa.Column('version', sa.Integer(), nullable=False),
+                    sa.PrimaryKeyConstraint('user_id')
+                    )
+    # Версії, що повторилися через одночасні записи, отримують нові номери понад максимальну версію користувача
+    op.execute("""
+        WITH copies AS (
+            SELECT id, user_id, ROW_NUMBER() OVER (PARTITION BY user_id, version ORDER BY id) AS copy
+            FROM contacts WHERE version > 0
+        ), extra AS (
+            SELECT id, user_id, ROW_NUMBER() OVER (PARTITION BY user_id ORDER BY id) AS n
+            FROM copies WHERE copy > 1
+        ), top AS (
+            SELECT user_id, MAX(version) AS max_version FROM contacts GROUP BY user_id
+        )
+        UPDATE contacts SET version = top.max_version + extra.n
+        FROM extra JOIN top ON top.user_id = extra.user_id
+        WHERE contacts.id = extra.id
+    """)
+    op.execute("""
+        INSERT INTO contact_version_counters (user_id, version)
+        SELECT user_id, MAX(version) FROM contacts GROUP BY user_id
+    """)
+    op.drop_index('ix_contacts_user_id_version', table_name='contacts')
+    op.create_index('ix_contacts_user_id_version', 'contacts', ['user_id', 'version'], unique=True,
+                    postgresql_where=sa.text('version > 0'))
+
+
+def downgrade() -> None:
+    op.drop_index('ix_contacts_user_id_version', table_name='contacts')
+    op.create_index('ix_contacts_user_id_version', 'contacts', ['user_id', 'version'], unique=False)
+    op.drop_table('contact_version_counters')
@@ -0,0 +1,30 @@
+"""contacts updated_at, version and tombstones
+
+Revision ID: 8c4e1b7a2d93
+Revises: 3f2a9c1d7e45
+Create Date: 2026-10-19 10:03:17.402561
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8c4e1b7a2d93'
+down_revision = '3f2a9c1d7e45'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('contacts', sa.Column('updated_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False))
+    op.add_column('contacts', sa.Column('version', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('contacts', sa.Column('deleted_at', sa.DateTime(), nullable=True))
+    op.create_index('ix_contacts_user_id_version', 'contacts', ['user_id', 'version'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_contacts_user_id_version', table_name='contacts')
+    op.drop_column('contacts', 'deleted_at')
+    op.drop_column('contacts', 'version')
+    op.drop_column('contacts', 'updated_at')
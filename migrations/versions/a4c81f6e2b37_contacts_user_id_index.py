@@ -0,0 +1,24 @@
+"""contacts.user_id index
+
+Revision ID: a4c81f6e2b37
+Revises: 5d7b3e9a1c20
+Create Date: 2026-10-19 15:02:44.180377
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a4c81f6e2b37'
+down_revision = '5d7b3e9a1c20'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_contacts_user_id', 'contacts', ['user_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_contacts_user_id', table_name='contacts')
@@ -0,0 +1,26 @@
+"""add users.feed_token
+
+Revision ID: a8d4f2b6c391
+Revises: f3a6c8e0b215
+Create Date: 2026-10-19 22:05:37.184920
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a8d4f2b6c391'
+down_revision = 'f3a6c8e0b215'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('users', sa.Column('feed_token', sa.String(length=64), nullable=True))
+    op.create_index('ix_users_feed_token', 'users', ['feed_token'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_users_feed_token', table_name='users')
+    op.drop_column('users', 'feed_token')
@@ -0,0 +1,32 @@
+"""contacts list sort and filter indexes
+
+Revision ID: b5e9d1a7c402
+Revises: a8d4f2b6c391
+Create Date: 2026-10-19 23:10:52.631478
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b5e9d1a7c402'
+down_revision = 'a8d4f2b6c391'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_contacts_user_id_last_name_id', 'contacts', ['user_id', 'last_name', 'id'], unique=False)
+    op.create_index('ix_contacts_user_id_first_name_id', 'contacts', ['user_id', 'first_name', 'id'], unique=False)
+    op.create_index('ix_contacts_user_id_b_day_id', 'contacts', ['user_id', 'b_day', 'id'], unique=False)
+    # Вираз має збігатися з компіляцією email_domain() для PostgreSQL у src/DB/types.py
+    op.execute("CREATE INDEX ix_contacts_user_id_email_domain "
+               "ON contacts (user_id, lower(split_part(email, '@', 2)), id)")
+
+
+def downgrade() -> None:
+    op.drop_index('ix_contacts_user_id_email_domain', table_name='contacts')
+    op.drop_index('ix_contacts_user_id_b_day_id', table_name='contacts')
+    op.drop_index('ix_contacts_user_id_first_name_id', table_name='contacts')
+    op.drop_index('ix_contacts_user_id_last_name_id', table_name='contacts')
@@ -0,0 +1,31 @@
+"""per-user contact counts
+
+Revision ID: c2e6f8a9d104
+Revises: a4c81f6e2b37
+Create Date: 2026-10-19 16:10:52.604118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c2e6f8a9d104'
+down_revision = 'a4c81f6e2b37'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('contact_version_counters',
+                  sa.Column('contact_count', sa.Integer(), server_default='0', nullable=False))
+    op.execute("""
+        UPDATE contact_version_counters SET contact_count = (
+            SELECT COUNT(*) FROM contacts
+            WHERE contacts.user_id = contact_version_counters.user_id AND contacts.deleted_at IS NULL
+        )
+    """)
+
+
+def downgrade() -> None:
+    op.drop_column('contact_version_counters', 'contact_count')
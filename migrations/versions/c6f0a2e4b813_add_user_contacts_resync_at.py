@@ -0,0 +1,24 @@
+"""add users.contacts_resync_at
+
+Revision ID: c6f0a2e4b813
+Revises: b5e9d1a7c402
+Create Date: 2026-10-19 23:48:16.502931
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c6f0a2e4b813'
+down_revision = 'b5e9d1a7c402'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('users', sa.Column('contacts_resync_at', sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('users', 'contacts_resync_at')
@@ -0,0 +1,31 @@
+"""contacts prefix indexes for autocomplete
+
+Revision ID: d9a3b5c7e812
+Revises: c2e6f8a9d104
+Create Date: 2026-10-19 16:48:13.270955
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd9a3b5c7e812'
+down_revision = 'c2e6f8a9d104'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE INDEX ix_contacts_user_id_first_name_prefix "
+               "ON contacts (user_id, lower(first_name) text_pattern_ops)")
+    op.execute("CREATE INDEX ix_contacts_user_id_last_name_prefix "
+               "ON contacts (user_id, lower(last_name) text_pattern_ops)")
+    op.execute("CREATE INDEX ix_contacts_user_id_email_prefix "
+               "ON contacts (user_id, lower(email) text_pattern_ops)")
+
+
+def downgrade() -> None:
+    op.drop_index('ix_contacts_user_id_email_prefix', table_name='contacts')
+    op.drop_index('ix_contacts_user_id_last_name_prefix', table_name='contacts')
+    op.drop_index('ix_contacts_user_id_first_name_prefix', table_name='contacts')
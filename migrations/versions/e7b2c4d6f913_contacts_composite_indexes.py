@@ -0,0 +1,29 @@
+"""contacts composite indexes
+
+Revision ID: e7b2c4d6f913
+Revises: d9a3b5c7e812
+Create Date: 2026-10-19 17:35:21.948210
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e7b2c4d6f913'
+down_revision = 'd9a3b5c7e812'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_contacts_user_id_id', 'contacts', ['user_id', 'id'], unique=False)
+    op.drop_index('ix_contacts_user_id', table_name='contacts')
+    op.create_index('ix_contacts_deleted_at', 'contacts', ['deleted_at'], unique=False,
+                    postgresql_where=sa.text('deleted_at IS NOT NULL'))
+
+
+def downgrade() -> None:
+    op.drop_index('ix_contacts_deleted_at', table_name='contacts')
+    op.create_index('ix_contacts_user_id', 'contacts', ['user_id'], unique=False)
+    op.drop_index('ix_contacts_user_id_id', table_name='contacts')
@@ -0,0 +1,76 @@
+"""compress contact rest_data
+
+Revision ID: f3a6c8e0b215
+Revises: e7b2c4d6f913
+Create Date: 2026-10-19 21:12:40.518316
+
+"""
+import zlib
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3a6c8e0b215'
+down_revision = 'e7b2c4d6f913'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 1000
+# Формат src.DB.types.CompressedText на момент міграції: байт формату і UTF-8 або zlib
+PLAIN = b"\x00"
+ZLIB = b"\x01"
+THRESHOLD = 1024
+
+
+def pack(value: str) -> bytes:
+    data = value.encode("utf-8")
+    if len(data) >= THRESHOLD:
+        compressed = zlib.compress(data, 6)
+        if len(compressed) < len(data):
+            return ZLIB + compressed
+    return PLAIN + data
+
+
+def unpack(value: bytes) -> str:
+    value = bytes(value)
+    if value[:1] == ZLIB:
+        return zlib.decompress(value[1:]).decode("utf-8")
+    return value[1:].decode("utf-8")
+
+
+def convert(source: str, target: str, target_type, transform):
+    """
+    Перенести значення rest_data з колонки `source` у нову колонку `target` пакетами за id
+    і замінити нею стару колонку.
+    """
+    op.add_column('contacts', sa.Column(target, target_type, nullable=True))
+    contacts = sa.table('contacts', sa.column('id', sa.Integer), sa.column(source), sa.column(target))
+    connection = op.get_bind()
+    last_id = 0
+    while True:
+        rows = connection.execute(
+            sa.select(contacts.c.id, contacts.c[source])
+            .where(contacts.c.id > last_id, contacts.c[source].isnot(None))
+            .order_by(contacts.c.id)
+            .limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        connection.execute(
+            contacts.update().where(contacts.c.id == sa.bindparam('row_id')).values({target: sa.bindparam('value')}),
+            [{'row_id': row[0], 'value': transform(row[1])} for row in rows],
+        )
+        last_id = rows[-1][0]
+    with op.batch_alter_table('contacts') as batch_op:
+        batch_op.drop_column(source)
+        batch_op.alter_column(target, new_column_name='rest_data')
+
+
+def upgrade() -> None:
+    convert('rest_data', 'rest_data_packed', sa.LargeBinary(), pack)
+
+
+def downgrade() -> None:
+    convert('rest_data', 'rest_data_text', sa.Text(), unpack)
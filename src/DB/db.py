@@ -1,14 +1,112 @@
+import asyncio
+import functools
+from typing import Callable
+
+from fastapi import Request, Response
+from fastapi.routing import APIRoute
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import sessionmaker
+from starlette.concurrency import run_in_threadpool
 from src.conf.config import settings
+from src.services.pool_metrics import pool_metrics
+from src.services.query_monitor import query_monitor
+from src.services.tracing import traced, tracer
 
 # URL = f'postgresql+asyncpg://{user}:{password}@{host}:{port}/{db_name}?async_fallback=True'
 URL = settings.sqlalchemy_database_url
 
-engine = create_async_engine(URL, echo=True)
+
+def engine_connect_args(url: str) -> dict:
+    connect_args = {}
+    if url.startswith("postgresql+asyncpg"):
+        # Кеш серверних prepared statements asyncpg на кожне з'єднання
+        connect_args["prepared_statement_cache_size"] = settings.asyncpg_prepared_statement_cache_size
+    return connect_args
+
+
+engine = create_async_engine(URL, echo=settings.sqlalchemy_echo, connect_args=engine_connect_args(URL))
 async_session = async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
 
+# Репліка основної бази даних для ендпоінтів, що лише читають контакти (див. get_read_db())
+replica_engine = None
+replica_session = None
+if settings.sqlalchemy_replica_url:
+    replica_engine = create_async_engine(settings.sqlalchemy_replica_url, echo=settings.sqlalchemy_echo,
+                                         connect_args=engine_connect_args(settings.sqlalchemy_replica_url))
+    replica_session = async_sessionmaker(bind=replica_engine, class_=AsyncSession, expire_on_commit=False)
+
+for instrumented_engine in filter(None, (engine, replica_engine)):
+    if settings.query_monitor_enabled:
+        query_monitor.install(instrumented_engine)
+    if settings.pool_metrics_enabled:
+        pool_metrics.install(instrumented_engine)
+    if settings.tracing_enabled:
+        tracer.install(instrumented_engine)
+
 
 async def get_db():
     async with async_session() as session:
         yield session
+
+
+async def release_connection(session: AsyncSession):
+    """
+    Повернути з'єднання сесії в пул, якщо сесія лише читала дані.
+
+    Сесія бере з'єднання з пулу під час першого запиту і утримує його до кінця транзакції. Транзакція без
+    незбережених змін завершується, тож з'єднання не утримується під час серіалізації відповіді та фонових задач.
+    Сесія лишається придатною: завантажені об'єкти не скидаються (expire_on_commit=False), а наступний запит
+    візьме з'єднання з пулу знову.
+    """
+    if session.in_transaction() and not (session.new or session.dirty or session.deleted):
+        await session.commit()
+
+
+def release_sessions_after(endpoint: Callable) -> Callable:
+    """
+    Обгорнути обробник маршруту так, щоб після його завершення сесії бази даних з його аргументів
+    повертали з'єднання в пул (див. release_connection()).
+    """
+    is_coroutine = asyncio.iscoroutinefunction(endpoint)
+
+    @functools.wraps(endpoint)
+    async def wrapper(*args, **kwargs):
+        try:
+            if is_coroutine:
+                return await endpoint(*args, **kwargs)
+            return await run_in_threadpool(endpoint, *args, **kwargs)
+        finally:
+            for value in kwargs.values():
+                if isinstance(value, AsyncSession):
+                    await release_connection(value)
+
+    return wrapper
+
+
+class SessionReleasingRoute(APIRoute):
+    """
+    Маршрут, обробник якого повертає з'єднання сесій бази даних у пул одразу після завершення роботи
+    з репозиторіями, до серіалізації відповіді та фонових задач.
+
+    Під час трасування маршрут записує спан route (залежності, обробник, валідація response_model і кодування
+    відповіді) з дочірнім спаном endpoint лише для обробника, тож час серіалізації видно як різницю між ними.
+    """
+
+    def __init__(self, path: str, endpoint: Callable, **kwargs):
+        # include_router() створює маршрут заново з уже обгорнутим обробником
+        if not getattr(endpoint, "releases_sessions", False):
+            endpoint = traced(f"endpoint.{endpoint.__name__}")(release_sessions_after(endpoint))
+            endpoint.releases_sessions = True
+        super().__init__(path, endpoint, **kwargs)
+
+    def get_route_handler(self) -> Callable:
+        route_handler = super().get_route_handler()
+        span_name = f"route {self.path}"
+
+        async def traced_route_handler(request: Request) -> Response:
+            if not tracer.recording():
+                return await route_handler(request)
+            with tracer.span(span_name):
+                return await route_handler(request)
+
+        return traced_route_handler
@@ -1,6 +1,9 @@
-from sqlalchemy import Column, Integer, String, Date, Text, ForeignKey, DateTime, func, MetaData, Boolean
+from sqlalchemy import Column, Integer, String, Date, ForeignKey, DateTime, func, MetaData, Boolean, Index, text
 from sqlalchemy.orm import declarative_base, relationship
 
+from src.DB.types import CompressedText, email_domain
+from src.conf.config import settings
+
 metadata = MetaData()
 Base = declarative_base(metadata=metadata)
 
@@ -13,8 +16,43 @@ class Contact(Base):
     email = Column(String, nullable=False)
     phone = Column(String, nullable=False)
     b_day = Column(Date, nullable=False)
-    rest_data = Column(Text, nullable=True)
+    # Великі нотатки стискаються, щоб не роздувати сторінки таблиці (див. CompressedText)
+    rest_data = Column(CompressedText(settings.rest_data_compression_threshold, settings.rest_data_compression_level),
+                       nullable=True)
     user_id = Column(Integer, ForeignKey('users.id', ondelete="CASCADE"), nullable=False)
+    updated_at = Column(DateTime, default=func.now(), server_default=func.now(), nullable=False)
+    version = Column(Integer, default=0, server_default="0", nullable=False)
+    deleted_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        # Вибірки контактів користувача впорядковані за id - індекс покриває і фільтр, і сортування
+        Index('ix_contacts_user_id_id', 'user_id', 'id'),
+        # Надгробків небагато, тому частковий індекс малий і лише прискорює їх остаточне видалення
+        Index('ix_contacts_deleted_at', 'deleted_at',
+              postgresql_where=text('deleted_at IS NOT NULL'), sqlite_where=text('deleted_at IS NOT NULL')),
+        # Префіксний пошук для автодоповнення: lower(...) LIKE 'prefix%' у межах користувача
+        Index('ix_contacts_user_id_first_name_prefix', 'user_id', func.lower(first_name).label('first_name_lower'),
+              postgresql_ops={'first_name_lower': 'text_pattern_ops'}),
+        Index('ix_contacts_user_id_last_name_prefix', 'user_id', func.lower(last_name).label('last_name_lower'),
+              postgresql_ops={'last_name_lower': 'text_pattern_ops'}),
+        Index('ix_contacts_user_id_email_prefix', 'user_id', func.lower(email).label('email_lower'),
+              postgresql_ops={'email_lower': 'text_pattern_ops'}),
+        # Сортування списку контактів з пагінацією за ключем (значення, id) - див. repo_read_contacts()
+        Index('ix_contacts_user_id_last_name_id', 'user_id', 'last_name', 'id'),
+        Index('ix_contacts_user_id_first_name_id', 'user_id', 'first_name', 'id'),
+        Index('ix_contacts_user_id_b_day_id', 'user_id', 'b_day', 'id'),
+        Index('ix_contacts_user_id_email_domain', 'user_id', email_domain(email).label('email_domain'), 'id'),
+        # Версії, видані лічильником ContactVersionCounter, унікальні для користувача; 0 - контакти до синхронізації
+        Index('ix_contacts_user_id_version', 'user_id', 'version', unique=True,
+              postgresql_where=text('version > 0'), sqlite_where=text('version > 0')),
+    )
+
+
+class ContactVersionCounter(Base):
+    __tablename__ = 'contact_version_counters'
+    user_id = Column(Integer, primary_key=True, autoincrement=False)
+    version = Column(Integer, nullable=False, default=0)
+    contact_count = Column(Integer, nullable=False, default=0, server_default="0")
 
 
 class User(Base):
@@ -28,4 +66,9 @@ class User(Base):
     refresh_token = Column(String(255), nullable=True)
     reset_token = Column(String(255), nullable=True)
     is_activated = Column(Boolean, default=False, nullable=False)
+    shard = Column(String(50), nullable=True)
+    # sha256 від токена стрічки днів народження: сам токен передається в URL і в базі не зберігається
+    feed_token = Column(String(64), nullable=True, unique=True, index=True)
+    # Час останньої зміни ідентифікаторів контактів (перенесення між шардами); старіші токени синхронізації недійсні
+    contacts_resync_at = Column(DateTime, nullable=True)
     contacts = relationship('Contact', backref='user', lazy='dynamic')
@@ -0,0 +1,267 @@
+from datetime import datetime
+from typing import Optional
+
+from fastapi import Depends
+from sqlalchemy import MetaData, ForeignKeyConstraint, Table, select, insert, delete, func, text
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncEngine, AsyncSession, async_sessionmaker
+
+from src.DB.db import engine, async_session, get_db
+from src.DB.models import Contact, ContactVersionCounter, User
+from src.conf.config import settings
+from src.repository import users_repo as user_repository
+from src.services.authservice import authservice as auth_service
+from src.services.birthday_feed import get_feed_user
+from src.services.contact_cache import contact_cache
+from src.services.pool_metrics import pool_metrics
+from src.services.query_monitor import query_monitor
+from src.services.read_replica import replica_router
+from src.services.tracing import tracer
+
+DEFAULT_SHARD = "default"
+
+
+class ShardMap:
+    """
+    Відповідність між шардами контактів та рушіями бази даних.
+
+    Шард користувача зберігається у колонці `users.shard` основної бази даних; значення None означає
+    шард за замовчуванням - основну базу даних. Таблиця користувачів завжди лишається в основній базі.
+
+    Attributes:
+        engines (dict[str, AsyncEngine]): Рушії бази даних за назвами шардів.
+        sessionmakers (dict[str, async_sessionmaker]): Фабрики сесій за назвами шардів.
+    """
+
+    def __init__(self, engines: dict[str, AsyncEngine]):
+        self.engines = engines
+        self.sessionmakers = {
+            name: async_sessionmaker(bind=shard_engine, class_=AsyncSession, expire_on_commit=False)
+            for name, shard_engine in engines.items()
+        }
+
+    @classmethod
+    def from_urls(cls, urls: dict[str, str], default_engine: AsyncEngine):
+        """
+        Створити карту шардів з URL баз даних та рушія основної бази даних.
+        """
+        engines = {DEFAULT_SHARD: default_engine}
+        engines.update({name: create_async_engine(url) for name, url in urls.items()})
+        if settings.query_monitor_enabled:
+            for shard_engine in engines.values():
+                query_monitor.install(shard_engine)
+        if settings.pool_metrics_enabled:
+            for shard_engine in engines.values():
+                pool_metrics.install(shard_engine)
+        if settings.tracing_enabled:
+            for shard_engine in engines.values():
+                tracer.install(shard_engine)
+        return cls(engines)
+
+    def shard_for(self, user: User) -> str:
+        """
+        Визначити назву шарда, у якому зберігаються контакти користувача.
+
+        Raises:
+            KeyError: Якщо шард користувача відсутній у конфігурації.
+        """
+        name = user.shard or DEFAULT_SHARD
+        if name not in self.engines:
+            raise KeyError(f"Unknown contacts shard '{name}' for user {user.id}")
+        return name
+
+    def engine(self, name: str) -> AsyncEngine:
+        return self.engines[name]
+
+    def session(self, name: str) -> AsyncSession:
+        return self.sessionmakers[name]()
+
+
+shard_map = ShardMap.from_urls(settings.contacts_shards, engine)
+
+
+async def get_shard_db(user: User = Depends(auth_service.get_current_user), db: AsyncSession = Depends(get_db)):
+    """
+    Отримати сесію бази даних шарда, у якому зберігаються контакти автентифікованого користувача.
+
+    Для шарда за замовчуванням повертається та сама сесія, що й у get_db(), тому запит не відкриває
+    додаткових з'єднань.
+
+    Args:
+        user (User): Автентифікований користувач.
+        db (AsyncSession): Сесія основної бази даних.
+
+    Yields:
+        AsyncSession: Сесія бази даних шарда користувача.
+    """
+    shard = shard_map.shard_for(user)
+    if shard == DEFAULT_SHARD:
+        yield db
+        return
+    async with shard_map.session(shard) as session:
+        yield session
+
+
+async def get_read_db(user: User = Depends(auth_service.get_current_user), db: AsyncSession = Depends(get_db)):
+    """
+    Отримати сесію для ендпоінтів, що лише читають контакти автентифікованого користувача.
+
+    Контакти шарда за замовчуванням читаються з репліки основної бази даних, якщо її налаштовано і користувач
+    не змінював контакти протягом вікна read-your-writes (див. ReplicaRouter). Інакше - як у get_shard_db().
+
+    Args:
+        user (User): Автентифікований користувач.
+        db (AsyncSession): Сесія основної бази даних.
+
+    Yields:
+        AsyncSession: Сесія репліки або бази даних шарда користувача.
+    """
+    if shard_map.shard_for(user) == DEFAULT_SHARD:
+        session = await replica_router.replica_session(user.id)
+        if session is not None:
+            async with session:
+                yield session
+            return
+    async for session in get_shard_db(user, db):
+        yield session
+
+
+async def get_feed_shard_db(user: User = Depends(get_feed_user), db: AsyncSession = Depends(get_db)):
+    """
+    Отримати сесію бази даних шарда власника стрічки днів народження (див. get_feed_user()).
+    """
+    async for session in get_shard_db(user, db):
+        yield session
+
+
+def shard_contacts_table() -> Table:
+    """
+    Копія таблиці контактів для шарда - без зовнішнього ключа на таблицю користувачів,
+    яка існує тільки в основній базі даних.
+    """
+    table = Contact.__table__.to_metadata(MetaData())
+    for constraint in [c for c in table.constraints if isinstance(c, ForeignKeyConstraint)]:
+        table.constraints.discard(constraint)
+    return table
+
+
+async def create_shard_schema(shard_engine: AsyncEngine):
+    """
+    Створити таблицю контактів (разом з індексами) та лічильників версій у базі даних шарда, якщо їх ще немає.
+    """
+    async with shard_engine.begin() as connection:
+        await connection.run_sync(shard_contacts_table().create, checkfirst=True)
+        await connection.run_sync(ContactVersionCounter.__table__.create, checkfirst=True)
+
+
+async def move_user_contacts(email: str, target: str, shards: Optional[ShardMap] = None,
+                             session_factory=async_session, chunk_size: int = 1000) -> int:
+    """
+    Перенести всі контакти користувача в інший шард.
+
+    Контакти копіюються частинами по `chunk_size` рядків в одній транзакції цільового шарда. Ідентифікатори
+    зберігаються, якщо вони вільні у цільовому шарді; контакти із зайнятими ідентифікаторами отримують нові
+    ідентифікатори з послідовності цільового шарда та нові версії. У такому разі в `users.contacts_resync_at`
+    записується час перенесення: видані раніше токени синхронізації стають недійсними (410), а кешована стрічка
+    днів народження будується заново, щоб клієнти не тримали старі ідентифікатори. Після копіювання оновлюється
+    `users.shard` і лише потім рядки видаляються з попереднього шарда. Зміни, внесені користувачем під час
+    перенесення, можуть бути втрачені, тому переносити варто неактивних користувачів або у вікно обслуговування.
+
+    Args:
+        email (str): Електронна пошта користувача.
+        target (str): Назва цільового шарда.
+        shards (ShardMap, optional): Карта шардів. За замовчуванням - карта з налаштувань.
+        session_factory: Фабрика сесій основної бази даних.
+        chunk_size (int): Кількість рядків в одній вставці.
+
+    Returns:
+        int: Кількість перенесених контактів.
+
+    Raises:
+        ValueError: Якщо користувача не знайдено.
+        KeyError: Якщо цільовий шард не налаштований.
+    """
+    shards = shards or shard_map
+    target_engine = shards.engine(target)
+    contacts = Contact.__table__
+    counters = ContactVersionCounter.__table__
+
+    async with session_factory() as primary:
+        user = await user_repository.repo_user_authentication_by_email(email, primary)
+        if user is None:
+            raise ValueError(f"User {email} not found")
+        source = shards.shard_for(user)
+        if source == target:
+            return 0
+
+        moved = 0
+        remapped = 0
+        async with shards.engine(source).connect() as source_connection, target_engine.begin() as target_connection:
+            # Лічильник версій і кількості контактів переноситься разом з контактами, щоб нові версії продовжували попередні
+            counter = (await source_connection.execute(
+                select(counters).where(counters.c.user_id == user.id)
+            )).first()
+            version = counter.version if counter is not None else 0
+            live = 0
+            result = await source_connection.stream(
+                select(contacts).where(contacts.c.user_id == user.id).order_by(contacts.c.id)
+            )
+            async for partition in result.partitions(chunk_size):
+                rows = [row._asdict() for row in partition]
+                taken = set((await target_connection.execute(
+                    select(contacts.c.id).where(contacts.c.id.in_([row["id"] for row in rows]))
+                )).scalars())
+                kept = [row for row in rows if row["id"] not in taken]
+                if kept:
+                    await target_connection.execute(insert(contacts), kept)
+                conflicting = [row for row in rows if row["id"] in taken]
+                if conflicting:
+                    await _sync_id_sequence(target_connection)
+                    for row in conflicting:
+                        del row["id"]
+                        version += 1
+                        row["version"] = version
+                    await target_connection.execute(insert(contacts), conflicting)
+                    remapped += len(conflicting)
+                moved += len(rows)
+                live += sum(row["deleted_at"] is None for row in rows)
+            await target_connection.execute(delete(counters).where(counters.c.user_id == user.id))
+            if counter is not None or remapped:
+                # Без лічильника в попередньому шарді кількість контактів рахувалась запитом - рахуємо її тут
+                contact_count = counter.contact_count if counter is not None else live
+                await target_connection.execute(insert(counters).values(user_id=user.id, version=version,
+                                                                        contact_count=contact_count))
+            await _sync_id_sequence(target_connection)
+
+        user.shard = None if target == DEFAULT_SHARD else target
+        if remapped:
+            user.contacts_resync_at = datetime.utcnow()
+        await primary.commit()
+
+    async with shards.engine(source).begin() as source_connection:
+        await source_connection.execute(delete(contacts).where(contacts.c.user_id == user.id))
+        await source_connection.execute(delete(counters).where(counters.c.user_id == user.id))
+    if remapped:
+        await contact_cache.bump(user.id)
+    return moved
+
+
+async def _sync_id_sequence(connection):
+    # Після вставки з явними ідентифікаторами послідовність PostgreSQL відстає від MAX(id); SQLite бере MAX(rowid) + 1
+    if connection.dialect.name == "postgresql":
+        await connection.execute(text(
+            "SELECT setval(pg_get_serial_sequence('contacts', 'id'), "
+            "(SELECT GREATEST(MAX(id), 1) FROM contacts))"
+        ))
+
+
+async def count_user_contacts(user_id: int, shard: str, shards: Optional[ShardMap] = None) -> int:
+    """
+    Порахувати контакти користувача у вказаному шарді.
+    """
+    shards = shards or shard_map
+    async with shards.engine(shard).connect() as connection:
+        contacts = Contact.__table__
+        result = await connection.execute(
+            select(func.count()).select_from(contacts).where(contacts.c.user_id == user_id)
+        )
+        return result.scalar_one()
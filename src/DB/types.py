@@ -0,0 +1,89 @@
+import zlib
+from typing import Optional
+
+from sqlalchemy import LargeBinary, String
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import GenericFunction
+from sqlalchemy.types import TypeDecorator
+
+# Перший байт збереженого значення визначає формат решти байтів
+PLAIN = b"\x00"
+ZLIB = b"\x01"
+
+
+def pack_text(value: Optional[str], threshold: int = 1024, level: int = 6) -> Optional[bytes]:
+    """
+    Закодувати текст для зберігання: UTF-8, стиснений zlib, якщо він не коротший за `threshold` байтів
+    і стиснення справді зменшує розмір.
+    """
+    if value is None:
+        return None
+    data = value.encode("utf-8")
+    if len(data) >= threshold:
+        compressed = zlib.compress(data, level)
+        if len(compressed) < len(data):
+            return ZLIB + compressed
+    return PLAIN + data
+
+
+def unpack_text(value: Optional[bytes]) -> Optional[str]:
+    if value is None:
+        return None
+    value = bytes(value)
+    if value[:1] == ZLIB:
+        return zlib.decompress(value[1:]).decode("utf-8")
+    return value[1:].decode("utf-8")
+
+
+class CompressedText(TypeDecorator):
+    """
+    Текстова колонка, що зберігається як двійкові дані: великі значення стискаються zlib під час запису
+    і розпаковуються під час читання, тож для коду застосунку колонка лишається звичайним рядком.
+
+    Фільтрувати чи сортувати за такою колонкою в SQL не можна - база даних бачить лише байти.
+
+    Attributes:
+        threshold (int): Мінімальний розмір значення в байтах UTF-8, з якого воно стискається.
+        level (int): Рівень стиснення zlib.
+    """
+
+    impl = LargeBinary
+    cache_ok = True
+
+    def __init__(self, threshold: int = 1024, level: int = 6):
+        super().__init__()
+        self.threshold = threshold
+        self.level = level
+
+    @property
+    def python_type(self):
+        return str
+
+    def process_bind_param(self, value: Optional[str], dialect) -> Optional[bytes]:
+        return pack_text(value, self.threshold, self.level)
+
+    def process_result_value(self, value: Optional[bytes], dialect) -> Optional[str]:
+        return unpack_text(value)
+
+
+class email_domain(GenericFunction):
+    """
+    Домен електронної пошти в нижньому регістрі: email_domain(Contact.email).
+
+    Вираз компілюється під діалект так само і в запитах, і в індексі ix_contacts_user_id_email_domain,
+    тому планувальник використовує індекс для фільтра за доменом.
+    """
+    type = String()
+    name = "email_domain"
+    inherit_cache = True
+
+
+@compiles(email_domain, "postgresql")
+def _email_domain_postgresql(element, compiler, **kw):
+    return f"lower(split_part({compiler.process(element.clauses, **kw)}, '@', 2))"
+
+
+@compiles(email_domain)
+def _email_domain_default(element, compiler, **kw):
+    email = compiler.process(element.clauses, **kw)
+    return f"lower(substr({email}, instr({email}, '@') + 1))"
@@ -1,4 +1,6 @@
 import os
+from typing import Optional
+
 from pydantic import BaseSettings
 from dotenv import load_dotenv
 
@@ -9,6 +11,16 @@ database_url = os.environ.get("SQLALCHEMY_DATABASE_URL")
 
 class Settings(BaseSettings):
     sqlalchemy_database_url: str = "postgresql+asyncpg://user:password@$localhost:5432/postgres?async_fallback=True"
+    sqlalchemy_echo: bool = True
+    asyncpg_prepared_statement_cache_size: int = 500
+    sqlalchemy_replica_url: Optional[str] = None
+    replica_sticky_seconds: float = 5.0
+    replica_sticky_backend: str = "memory"
+    replica_sticky_max_users: int = 100000
+    contacts_shards: dict[str, str] = {}
+    contacts_new_user_shard: Optional[str] = None
+    password_hash_scheme: str = "bcrypt"
+    bcrypt_rounds: int = 12
     secret_key: str = 'secret_key'
     algorithm: str = "HS256"
     mail_username: str = "example@email.com"
@@ -19,10 +31,81 @@ class Settings(BaseSettings):
     cloudinary_cloud_name: str = "cloudinary"
     cloudinary_api_key: str = "123456879789"
     cloudinary_api_secret: str = "cloudinary_api_secret"
+    cloudinary_timeout: float = 15.0
+    cloudinary_max_concurrency: int = 4
+    mail_timeout: float = 10.0
+    mail_max_concurrency: int = 4
+    circuit_breaker_failure_threshold: int = 5
+    circuit_breaker_reset_timeout: float = 30.0
 
     redis_host: str = 'localhost'
     redis_port: int = 6379
 
+    contacts_tombstone_retention_days: int = 30
+    contacts_search_count_cap: int = 1000
+    rest_data_compression_threshold: int = 1024
+    rest_data_compression_level: int = 6
+    contacts_fast_read_endpoints: list[str] = ["list", "query"]
+
+    single_flight_enabled: bool = True
+    contacts_cache_enabled: bool = False
+    contacts_cache_backend: str = "redis"
+    contacts_cache_ttl: int = 300
+    contacts_cache_max_entries: int = 10000
+
+    autocomplete_cache_enabled: bool = True
+    autocomplete_cache_users: int = 1000
+    autocomplete_trie_max_contacts: int = 20000
+
+    birthday_feed_cache_users: int = 200
+    birthday_feed_cache_max_contacts: int = 20000
+    birthday_feed_max_age: int = 300
+
+    idempotency_enabled: bool = True
+    idempotency_backend: str = "memory"
+    idempotency_paths: list[str] = ["/contacts/", "/auth/register"]
+    idempotency_ttl: int = 86400
+    idempotency_lock_ttl: int = 60
+    idempotency_wait_timeout: float = 10.0
+    idempotency_max_entries: int = 10000
+    idempotency_terminal_statuses: list[int] = []
+
+    contact_events_backend: str = "memory"
+    contact_events_buffer_size: int = 100
+    contact_events_heartbeat: float = 15.0
+
+    compression_minimum_size: int = 1000
+    compression_gzip_level: int = 6
+    compression_brotli_quality: int = 4
+
+    admin_emails: list[str] = []
+
+    query_monitor_enabled: bool = True
+    query_monitor_slow_ms: float = 200.0
+    query_monitor_n_plus_one: int = 10
+    query_monitor_explain: bool = True
+    query_monitor_analyze: bool = False
+    query_monitor_log_parameters: bool = True
+
+    pool_metrics_enabled: bool = True
+    load_shedding_enabled: bool = False
+    load_shedding_max_in_flight: int = 100
+    load_shedding_pool_wait_ms: float = 50.0
+    load_shedding_retry_after: int = 1
+    load_shedding_export_limit: int = 500
+    profiler_enabled: bool = False
+    profiler_sample_rate: float = 0.0
+    profiler_interval: float = 0.001
+    profiler_tracemalloc: bool = False
+    profiler_output_dir: str = "profiles"
+    tracing_enabled: bool = False
+    tracing_sample_rate: float = 0.05
+    tracing_exporter: str = "console"
+    tracing_file: str = "traces.jsonl"
+
+    birthday_reminder_batch_size: int = 500
+    birthday_reminder_checkpoint: str = ".birthday_reminder_checkpoint.json"
+
     class Config:
         env_file = ".env"
         env_file_encoding = "utf-8"
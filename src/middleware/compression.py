@@ -0,0 +1,120 @@
+import zlib
+
+import brotli
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.services.serialization import parse_quality_header
+
+
+class GzipEncoder:
+    name = "gzip"
+
+    def __init__(self, level: int):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        flush_mode = zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH
+        return self._compressor.compress(data) + self._compressor.flush(flush_mode)
+
+
+class BrotliEncoder:
+    name = "br"
+
+    def __init__(self, quality: int):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        body = self._compressor.process(data)
+        return body + (self._compressor.finish() if final else self._compressor.flush())
+
+
+class CompressionMiddleware:
+    """
+    ASGI middleware, що стискає відповіді brotli або gzip відповідно до заголовка Accept-Encoding.
+
+    Відповіді, менші за `minimum_size` байт, вже стиснуті відповіді та потокові типи з `excluded_media_types`
+    (наприклад, Server-Sent Events) передаються без змін.
+
+    Attributes:
+        minimum_size (int): Мінімальний розмір тіла відповіді для стиснення.
+        gzip_level (int): Рівень стиснення gzip (1-9).
+        brotli_quality (int): Якість стиснення brotli (0-11).
+        excluded_media_types (tuple[str]): Типи вмісту, які не стискаються.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1000, gzip_level: int = 6, brotli_quality: int = 4,
+                 excluded_media_types: tuple = ("text/event-stream",)):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.excluded_media_types = excluded_media_types
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http":
+            encoder = self.choose_encoder(Headers(scope=scope).get("accept-encoding", ""))
+            if encoder is not None:
+                responder = CompressionResponder(self.app, encoder, self.minimum_size, self.excluded_media_types)
+                await responder(scope, receive, send)
+                return
+        await self.app(scope, receive, send)
+
+    def choose_encoder(self, accept_encoding: str):
+        qualities = parse_quality_header(accept_encoding)
+        if qualities.get("br", 0) > 0 and qualities.get("br", 0) >= qualities.get("gzip", 0):
+            return BrotliEncoder(self.brotli_quality)
+        if qualities.get("gzip", 0) > 0:
+            return GzipEncoder(self.gzip_level)
+        return None
+
+
+class CompressionResponder:
+    def __init__(self, app: ASGIApp, encoder, minimum_size: int, excluded_media_types: tuple):
+        self.app = app
+        self.encoder = encoder
+        self.minimum_size = minimum_size
+        self.excluded_media_types = excluded_media_types
+        self.send: Send = None
+        self.initial_message: Message = {}
+        self.started = False
+        self.passthrough = False
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        self.send = send
+        await self.app(scope, receive, self.send_compressed)
+
+    async def send_compressed(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            # Заголовки відправляються разом з першою частиною тіла, коли вже відомо, чи стискати відповідь
+            self.initial_message = message
+            return
+        if message["type"] != "http.response.body":
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if not self.started:
+            self.started = True
+            headers = MutableHeaders(raw=self.initial_message["headers"])
+            media_type = headers.get("content-type", "").split(";")[0].strip()
+            self.passthrough = ("content-encoding" in headers
+                                or media_type in self.excluded_media_types
+                                or (len(body) < self.minimum_size and not more_body))
+            if not self.passthrough:
+                headers["Content-Encoding"] = self.encoder.name
+                headers.add_vary_header("Accept-Encoding")
+                message["body"] = self.encoder.compress(body, final=not more_body)
+                if more_body:
+                    del headers["Content-Length"]
+                else:
+                    headers["Content-Length"] = str(len(message["body"]))
+            await self.send(self.initial_message)
+            await self.send(message)
+            return
+
+        if not self.passthrough:
+            message["body"] = self.encoder.compress(body, final=not more_body)
+        await self.send(message)
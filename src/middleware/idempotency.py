@@ -0,0 +1,138 @@
+import asyncio
+import time
+from typing import Iterable
+
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse, Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.services.idempotency import IdempotencyRecord, StoredResponse, request_fingerprint, scoped_key
+
+MAX_KEY_LENGTH = 255
+
+
+class IdempotencyMiddleware:
+    """
+    ASGI middleware, що виконує POST-запит із заголовком Idempotency-Key лише один раз.
+
+    Успішна (2xx) відповідь зберігається на `ttl` секунд і повертається на повтори з тим самим ключем
+    без виклику обробника, із заголовком Idempotent-Replayed. Поки перший запит виконується, ключ
+    заблоковано: одночасні дублікати чекають на його відповідь до `wait_timeout` секунд, після чого
+    отримують 409. Повтор ключа з іншим тілом запиту отримує 422. Якщо обробник завершився помилкою
+    або повернув інший статус (4xx, 5xx), ключ звільняється, і повтор виконується знову: клієнт може
+    виправити причину помилки і повторити запит з тим самим ключем. Статуси з `terminal_statuses`,
+    результат яких повтор не змінить, зберігаються так само, як успішні.
+
+    Attributes:
+        store: Сховище ключів (InMemoryIdempotencyStore або RedisIdempotencyStore).
+        paths (set[str]): Шляхи POST-запитів, для яких підтримується Idempotency-Key.
+        ttl (float): Скільки секунд зберігається відповідь.
+        lock_ttl (float): Скільки секунд ключ лишається заблокованим, якщо воркер зупинився під час запиту.
+        wait_timeout (float): Скільки секунд дублікат чекає на відповідь першого запиту.
+        poll_interval (float): Інтервал перевірки стану ключа під час очікування.
+        terminal_statuses (set[int]): Неуспішні статуси, відповіді з якими теж зберігаються.
+    """
+
+    def __init__(self, app: ASGIApp, store, paths: Iterable[str], ttl: float = 86400, lock_ttl: float = 60,
+                 wait_timeout: float = 10.0, poll_interval: float = 0.05, terminal_statuses: Iterable[int] = ()):
+        self.app = app
+        self.store = store
+        self.paths = set(paths)
+        self.ttl = ttl
+        self.lock_ttl = lock_ttl
+        self.wait_timeout = wait_timeout
+        self.poll_interval = poll_interval
+        self.terminal_statuses = set(terminal_statuses)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] != "POST" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+        headers = Headers(scope=scope)
+        idempotency_key = headers.get("idempotency-key")
+        if idempotency_key is None:
+            await self.app(scope, receive, send)
+            return
+        if not idempotency_key or len(idempotency_key) > MAX_KEY_LENGTH:
+            response = JSONResponse({"detail": f"Idempotency-Key must be 1-{MAX_KEY_LENGTH} characters"},
+                                    status_code=400)
+            await response(scope, receive, send)
+            return
+
+        body = await self._read_body(receive)
+        key = scoped_key(scope["method"], scope["path"], headers.get("authorization", "").encode("latin-1"),
+                         idempotency_key)
+        fingerprint = request_fingerprint(headers.get("content-type", "").encode("latin-1"), body)
+
+        deadline = time.monotonic() + self.wait_timeout
+        while True:
+            record = await self.store.reserve(key, fingerprint, self.lock_ttl)
+            if record is None:
+                await self._execute(key, fingerprint, body, scope, receive, send)
+                return
+            if record.fingerprint != fingerprint:
+                response = JSONResponse({"detail": "Idempotency-Key was already used with a different request"},
+                                        status_code=422)
+                await response(scope, receive, send)
+                return
+            if record.response is not None:
+                await self._replay(record.response, scope, receive, send)
+                return
+            if time.monotonic() >= deadline:
+                response = JSONResponse({"detail": "A request with this Idempotency-Key is still in progress"},
+                                        status_code=409, headers={"Retry-After": "1"})
+                await response(scope, receive, send)
+                return
+            await asyncio.sleep(self.poll_interval)
+
+    @staticmethod
+    async def _read_body(receive: Receive) -> bytes:
+        chunks = []
+        while True:
+            message = await receive()
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body", False):
+                return b"".join(chunks)
+
+    async def _execute(self, key: str, fingerprint: str, body: bytes, scope: Scope, receive: Receive, send: Send):
+        body_sent = False
+
+        async def replay_body() -> Message:
+            nonlocal body_sent
+            if body_sent:
+                # Тіло вже прочитано - далі обробник може чекати лише на відключення клієнта
+                return await receive()
+            body_sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+
+        start: dict = {}
+        chunks = []
+        completed = False
+
+        async def send_and_store(message: Message) -> None:
+            nonlocal completed
+            if message["type"] == "http.response.start":
+                start.update(message)
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+                if not message.get("more_body", False) and self._stored_status(start["status"]):
+                    # Відповідь зберігається до відправлення, щоб повтор після обриву з'єднання її отримав
+                    response = StoredResponse(start["status"], list(start.get("headers", [])), b"".join(chunks))
+                    await self.store.complete(key, IdempotencyRecord(fingerprint, response), self.ttl)
+                    completed = True
+            await send(message)
+
+        try:
+            await self.app(scope, replay_body, send_and_store)
+        finally:
+            if not completed:
+                await self.store.release(key)
+
+    def _stored_status(self, status: int) -> bool:
+        return 200 <= status < 300 or status in self.terminal_statuses
+
+    @staticmethod
+    async def _replay(stored: StoredResponse, scope: Scope, receive: Receive, send: Send):
+        response = Response(stored.body, status_code=stored.status)
+        response.raw_headers = [*stored.headers, (b"idempotent-replayed", b"true")]
+        await response(scope, receive, send)
@@ -0,0 +1,30 @@
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from src.services.load_shedding import AdmissionController
+
+
+class LoadSheddingMiddleware:
+    """
+    ASGI middleware, що відхиляє запити понад місткість воркера відповіддю 503 із заголовком Retry-After
+    (див. AdmissionController).
+    """
+
+    def __init__(self, app: ASGIApp, controller: AdmissionController):
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or self.controller.exempt(scope["path"]):
+            await self.app(scope, receive, send)
+            return
+        priority = self.controller.classify(scope["method"], scope["path"], scope.get("query_string", b""))
+        if not self.controller.admit(priority):
+            response = JSONResponse({"detail": "Server is overloaded, retry later"}, status_code=503,
+                                    headers={"Retry-After": str(self.controller.retry_after)})
+            await response(scope, receive, send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release()
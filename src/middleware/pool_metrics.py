@@ -0,0 +1,31 @@
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.services.pool_metrics import PoolMetrics
+
+
+class PoolMetricsMiddleware:
+    """
+    ASGI middleware, що перевіряє, чи утримує HTTP-запит з'єднання з базою даних під час відправки відповіді
+    та після неї, коли виконуються фонові задачі (див. PoolMetrics).
+    """
+
+    def __init__(self, app: ASGIApp, metrics: PoolMetrics):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        with self.metrics.track_request() as request:
+            async def send_with_metrics(message: Message) -> None:
+                if message["type"] == "http.response.start":
+                    self.metrics.response_started(request)
+                await send(message)
+                if message["type"] == "http.response.body" and not message.get("more_body", False):
+                    self.metrics.response_finished(request)
+
+            try:
+                await self.app(scope, receive, send_with_metrics)
+            finally:
+                self.metrics.request_finished(request)
@@ -0,0 +1,167 @@
+import functools
+import os
+import random
+import sys
+import threading
+import tracemalloc
+import uuid
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Optional
+
+from jose import jwt, JWTError
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+@functools.lru_cache(maxsize=4096)
+def _short_path(filename: str) -> str:
+    return os.path.relpath(filename)
+
+
+class StackSampler:
+    """
+    Статистичний профайлер: фоновий потік кожні `interval` секунд знімає стек потоку, що виконує цикл подій.
+
+    Результат - стеки у форматі "folded" (функції через ";" і кількість вибірок), який приймають flamegraph.pl,
+    speedscope та inferno. Цикл подій спільний для всіх запитів, тому у вибірки потрапляють і одночасні запити.
+
+    Attributes:
+        interval (float): Інтервал між вибірками в секундах.
+        samples (Counter): Кількість вибірок для кожного стека.
+    """
+
+    def __init__(self, thread_id: int, interval: float = 0.001):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self) -> Counter:
+        self._stopped.set()
+        self._thread.join()
+        return self.samples
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({_short_path(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                self.samples[";".join(reversed(stack))] += 1
+
+    def folded(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.samples.most_common())
+
+
+def create_profile_token(secret_key: str, algorithm: str, hours: int = 1, trace_memory: bool = False) -> str:
+    """
+    Створити підписаний токен для заголовка X-Profile, що вмикає профілювання запиту.
+    """
+    expire = datetime.utcnow() + timedelta(hours=hours)
+    return jwt.encode({"scope": "profile_token", "exp": expire, "tracemalloc": trace_memory},
+                      key=secret_key, algorithm=algorithm)
+
+
+class ProfilerMiddleware:
+    """
+    ASGI middleware, що профілює окремі запити: з підписаним заголовком X-Profile або випадкову частку `sample_rate`.
+
+    Для профільованого запиту у `output_dir` зберігаються `<request id>.folded` зі стеками статистичного профайлера
+    та, за потреби, `<request id>.tracemalloc.txt` з найбільшими виділеннями пам'яті. Ідентифікатор запиту береться
+    з заголовка X-Request-ID або генерується і повертається у заголовках X-Request-ID та X-Profile-Id.
+    Одночасно профілюється лише один запит. Middleware підключається тільки якщо профілювання увімкнено
+    в налаштуваннях, тому вимкнене профілювання не додає накладних витрат.
+
+    Attributes:
+        output_dir (str): Каталог для результатів.
+        sample_rate (float): Частка запитів, що профілюються без заголовка (0 - лише за заголовком).
+        secret_key (str): Ключ підпису токенів X-Profile. None - заголовок ігнорується.
+        algorithm (str): Алгоритм підпису токенів.
+        interval (float): Інтервал вибірок профайлера в секундах.
+        trace_memory (bool): Вмикати tracemalloc для профільованих запитів.
+    """
+
+    def __init__(self, app: ASGIApp, output_dir: str = "profiles", sample_rate: float = 0.0,
+                 secret_key: Optional[str] = None, algorithm: str = "HS256", interval: float = 0.001,
+                 trace_memory: bool = False):
+        self.app = app
+        self.output_dir = output_dir
+        self.sample_rate = sample_rate
+        self.secret_key = secret_key
+        self.algorithm = algorithm
+        self.interval = interval
+        self.trace_memory = trace_memory
+        self._active = False
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or self._active:
+            await self.app(scope, receive, send)
+            return
+        headers = Headers(scope=scope)
+        trace_memory = self.select(headers)
+        if trace_memory is None:
+            await self.app(scope, receive, send)
+            return
+
+        request_id = headers.get("x-request-id") or uuid.uuid4().hex
+        # Ідентифікатор профілю стає назвою файлу, тому з нього прибираються небезпечні символи
+        profile_id = "".join(char for char in request_id if char.isalnum() or char in "-_")[:64] or uuid.uuid4().hex
+
+        async def send_with_request_id(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                response_headers = MutableHeaders(scope=message)
+                response_headers["X-Request-ID"] = request_id
+                response_headers["X-Profile-Id"] = profile_id
+            await send(message)
+
+        self._active = True
+        sampler = StackSampler(threading.get_ident(), self.interval)
+        if trace_memory:
+            tracemalloc.start()
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            sampler.stop()
+            snapshot = tracemalloc.take_snapshot() if trace_memory else None
+            if trace_memory:
+                tracemalloc.stop()
+            self._active = False
+            self.save(profile_id, sampler, snapshot)
+
+    def select(self, headers: Headers) -> Optional[bool]:
+        """
+        Визначити, чи профілювати запит.
+
+        Returns:
+            Optional[bool]: None - не профілювати, інакше - чи вмикати tracemalloc.
+        """
+        token = headers.get("x-profile")
+        if token and self.secret_key:
+            try:
+                payload = jwt.decode(token, key=self.secret_key, algorithms=[self.algorithm])
+            except JWTError:
+                payload = {}
+            if payload.get("scope") == "profile_token":
+                return bool(payload.get("tracemalloc")) or self.trace_memory
+        if self.sample_rate and random.random() < self.sample_rate:
+            return self.trace_memory
+        return None
+
+    def save(self, profile_id: str, sampler: StackSampler, snapshot):
+        os.makedirs(self.output_dir, exist_ok=True)
+        path = os.path.join(self.output_dir, profile_id)
+        with open(f"{path}.folded", "w") as file:
+            file.write(sampler.folded())
+        if snapshot is not None:
+            with open(f"{path}.tracemalloc.txt", "w") as file:
+                for stat in snapshot.statistics("lineno")[:25]:
+                    file.write(f"{stat}\n")
@@ -0,0 +1,20 @@
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from src.services.query_monitor import QueryMonitor
+
+
+class QueryMonitorMiddleware:
+    """
+    ASGI middleware, що рахує SQL-запити кожного HTTP-запиту для виявлення N+1 (див. QueryMonitor).
+    """
+
+    def __init__(self, app: ASGIApp, monitor: QueryMonitor):
+        self.app = app
+        self.monitor = monitor
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        with self.monitor.track_request(scope["method"], scope["path"]):
+            await self.app(scope, receive, send)
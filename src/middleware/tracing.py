@@ -0,0 +1,39 @@
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.services.tracing import Tracer, format_traceparent, parse_traceparent
+
+
+class TracingMiddleware:
+    """
+    ASGI middleware, що відкриває серверний спан для кожного HTTP-запиту.
+
+    Батьківський контекст береться із заголовка traceparent (W3C Trace Context), тож запит продовжує трасування
+    клієнта і успадковує його рішення семплера. У відповідь додається заголовок traceresponse з ідентифікаторами
+    трасування і серверного спана, за якими можна знайти трасування повільного запиту.
+    """
+
+    def __init__(self, app: ASGIApp, tracer: Tracer):
+        self.app = app
+        self.tracer = tracer
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        parent = parse_traceparent(Headers(scope=scope).get("traceparent"))
+        attributes = {"http.method": scope["method"], "http.target": scope["path"]}
+        with self.tracer.span(f"{scope['method']} {scope['path']}", "server", attributes, parent) as span:
+
+            async def send_with_trace(message: Message) -> None:
+                if message["type"] == "http.response.start":
+                    span.set_attribute("http.status_code", message["status"])
+                    if message["status"] >= 500:
+                        span.status = "error"
+                    MutableHeaders(scope=message)["traceresponse"] = format_traceparent(span)
+                await send(message)
+
+            await self.app(scope, receive, send_with_trace)
+            endpoint = scope.get("endpoint")
+            if endpoint is not None:
+                span.set_attribute("code.function", getattr(endpoint, "__name__", str(endpoint)))
@@ -0,0 +1,82 @@
+"""
+Швидкий шлях читання списків контактів.
+
+Запити вибирають лише колонки, без створення об'єктів Contact і реєстрації їх у сесії (identity map),
+і повертають легкі рядки Row, які кодуються у відповідь без проміжних pydantic-моделей.
+Вмикається для окремих ендпоінтів налаштуванням contacts_fast_read_endpoints.
+"""
+from typing import Optional
+
+from sqlalchemy import select, asc, Row
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.DB.models import Contact, User
+from src.repository.contacts_repo import _contact_search_criteria, _contact_list_statement
+from src.schemas.Contacts_Schemas import CONTACT_FIELDS, ContactListFilters
+from src.services.contact_cache import cached
+from src.services.single_flight import coalesced
+from src.services.tracing import traced
+
+
+def _columns(fields: Optional[list[str]]):
+    # Порядок колонок - як у ContactPartialResponse, щоб JSON збігався з відповіддю ORM-шляху байт у байт
+    return [getattr(Contact, field) for field in CONTACT_FIELDS if not fields or field in fields]
+
+
+@traced()
+@cached
+@coalesced
+async def repo_read_contacts(db: AsyncSession, user: User, limit: int, offset: int,
+                             fields: Optional[list[str]] = None,
+                             filters: Optional[ContactListFilters] = None) -> list[Row]:
+    """
+        Отримати сторінку контактів користувача у вигляді рядків без ORM-об'єктів.
+
+        Args:
+            db (AsyncSession): Асинхронна сесія бази даних для взаємодії з нею.
+            user (User): Об'єкт користувача, для якого отримуємо контакти.
+            limit (int): Максимальна кількість контактів, які будуть отримані.
+            offset (int): Кількість контактів, які будуть пропущені з початку результатів.
+            fields (list[str], optional): Поля контакту, які потрібно вибрати. За замовчуванням - усі.
+            filters (ContactListFilters, optional): Фільтри, сортування і курсор пагінації, як у repo_get_contacts().
+
+        Returns:
+            list[Row]: Рядки з вибраними полями, за замовчуванням впорядковані за id.
+    """
+
+    stmt = _contact_list_statement(select(*_columns(fields)), user.id, filters).offset(offset).limit(limit)
+    result = await db.execute(stmt)
+    return result.all()
+
+
+@traced()
+@cached
+@coalesced
+async def repo_read_contacts_query(user: User, query: str, limit: int, offset: int, db: AsyncSession,
+                                   fields: Optional[list[str]] = None) -> list[Row]:
+    """
+        Отримати контакти користувача, що відповідають пошуковому запиту, у вигляді рядків без ORM-об'єктів.
+
+        Умови пошуку ті самі, що й у repo_get_contacts_query().
+
+        Args:
+            user (User): Об'єкт користувача, для якого отримуємо контакти.
+            query (str): Пошуковий запит для фільтрації контактів.
+            limit (int): Максимальна кількість контактів, які будуть отримані.
+            offset (int): Кількість контактів, які будуть пропущені з початку результатів.
+            db (AsyncSession): Асинхронна сесія бази даних для взаємодії з нею.
+            fields (list[str], optional): Поля контакту, які потрібно вибрати. За замовчуванням - усі.
+
+        Returns:
+            list[Row]: Рядки з вибраними полями, впорядковані за id.
+    """
+
+    stmt = (
+        select(*_columns(fields))
+        .where(_contact_search_criteria(user.id, query))
+        .order_by(asc(Contact.id))
+        .offset(offset)
+        .limit(limit)
+    )
+    result = await db.execute(stmt)
+    return result.all()
@@ -1,14 +1,183 @@
+import calendar
 import datetime
+from typing import AsyncIterator, Optional
 
 from fastapi import HTTPException
-from sqlalchemy import select, asc, func
+from sqlalchemy import select, asc, desc, func, extract, delete, lambda_stmt, or_, tuple_, update, Row, Select
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.sql.lambdas import StatementLambdaElement
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import load_only
 
-from src.DB.models import Contact, User
-from src.schemas.Contacts_Schemas import ContactCreate, ContactUpdate
+from src.DB.models import Contact, ContactVersionCounter, User
+from src.DB.types import email_domain
+from src.conf.config import settings
+from src.schemas.Contacts_Schemas import ContactCreate, ContactUpdate, ContactListFilters
+from src.services.autocomplete import ContactTrie, autocomplete_cache
+from src.services.contact_cache import cached, contact_cache
+from src.services.contact_events import contact_events
+from src.services.read_replica import replica_router
+from src.services.single_flight import coalesced, single_flight
+from src.services.tracing import traced
 
 
-async def get_specific_contact_belongs_to_user(id: int, user: User, db: AsyncSession):
+def _with_fields(stmt: StatementLambdaElement, fields: Optional[list[str]]) -> StatementLambdaElement:
+    """
+        Обмежити набір колонок контакту, які завантажуються запитом.
+
+        Набір полів входить у ключ кешу лямбда-запиту, тому для кожної комбінації полів
+        скомпільований запит кешується окремо.
+
+        Args:
+            stmt (StatementLambdaElement): Лямбда-запит до таблиці контактів.
+            fields (list[str], optional): Назви полів контакту. Якщо не вказано - завантажуються всі колонки.
+
+        Returns:
+            StatementLambdaElement: Запит з опцією load_only для вказаних полів.
+    """
+
+    if not fields:
+        return stmt
+    columns = [getattr(Contact, field) for field in fields]
+    return stmt.add_criteria(lambda s: s.options(load_only(*columns)), track_on=[",".join(fields)])
+
+
+async def _contacts_changed(user_id: int, event: str, contact: Contact):
+    """
+        Повідомити залежні механізми про зміну контактів користувача.
+
+        Викликається функціями запису після фіксації транзакції: на час вікна read-your-writes направляє читання
+        користувача в основну базу даних, змінює покоління кешу сторінок contact_cache, від'єднує незавершені
+        читання single-flight (зокрема з репліки), скидає префіксне дерево автодоповнення і публікує подію
+        для потоків GET /contacts/stream.
+
+        Покоління кешу змінюється після перемикання на основну базу: інакше сторінку нового покоління могло б
+        заповнити читання з репліки, що ще не отримала запис.
+
+        Args:
+            user_id (int): Ідентифікатор користувача, контакти якого змінилися.
+            event (str): Тип зміни: "created", "updated" або "deleted".
+            contact (Contact): Змінений контакт.
+    """
+
+    await replica_router.mark_write(user_id)
+    await contact_cache.bump(user_id)
+    single_flight.forget(user_id)
+    autocomplete_cache.invalidate(user_id)
+    await contact_events.publish(user_id, {"type": event, "id": contact.id, "version": contact.version})
+
+
+async def _next_contact_version(user_id: int, db: AsyncSession, count_delta: int = 0) -> int:
+    """
+        Отримати наступний номер версії змін для контактів користувача.
+
+        Номер видається лічильником користувача в таблиці contact_version_counters тієї ж бази даних, що й контакти,
+        запитом UPDATE ... RETURNING. Рядок лічильника лишається заблокованим до кінця транзакції, тому одночасні
+        записи одного користувача отримують різні версії і фіксуються в порядку версій, а остаточне видалення
+        надгробків не призводить до повторного використання номерів.
+
+        У тому ж рядку і тій же транзакції підтримується кількість контактів користувача. Якщо рядка лічильника
+        ще немає, він створюється запитом INSERT ... ON CONFLICT DO UPDATE, і лише тоді кількість рахується за
+        наявними рядками, тому функцію слід викликати до зміни самого контакту. ON CONFLICT потрібен для
+        одночасного першого запису: другий запис збільшує лічильник, створений першим.
+
+        Args:
+            user_id (int): Ідентифікатор користувача.
+            db (AsyncSession): Асинхронна сесія бази даних для взаємодії з нею.
+            count_delta (int): Зміна кількості контактів: 1 при створенні, -1 при видаленні.
+
+        Returns:
+            int: Номер версії для контакту, що змінюється.
+    """
+
+    counters = ContactVersionCounter.__table__
+    increment = {"version": counters.c.version + 1, "contact_count": counters.c.contact_count + count_delta}
+    version = (await db.execute(
+        update(counters).where(counters.c.user_id == user_id).values(**increment).returning(counters.c.version)
+    )).scalar()
+    if version is not None:
+        return version
+
+    dialect_insert = postgresql_insert if db.get_bind().dialect.name == "postgresql" else sqlite_insert
+    live_contacts = (
+        select(func.count())
+        .select_from(Contact)
+        .where(Contact.user_id == user_id, Contact.deleted_at.is_(None))
+        .scalar_subquery()
+    )
+    stmt = dialect_insert(counters).values(user_id=user_id, version=1, contact_count=live_contacts + count_delta)
+    stmt = stmt.on_conflict_do_update(index_elements=[counters.c.user_id], set_=increment) \
+        .returning(counters.c.version)
+    result = await db.execute(stmt)
+    return result.scalar()
+
+
+def _prefix_pattern(prefix: str) -> str:
+    # Шаблон LIKE 'prefix%' з екранованими символами шаблону, для використання з escape="\\"
+    return prefix.lower().replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+
+
+def _contact_list_statement(stmt: Select, user_id: int, filters: Optional[ContactListFilters]) -> Select:
+    """
+        Додати до запиту списку контактів фільтри, сортування і умову пагінації за ключем.
+
+        Кожна дозволена комбінація фільтра і сортування (див. CONTACT_FILTER_SORTS) обслуговується одним
+        індексом, а умова (ключ, id) > (значення, id) останнього контакту попередньої сторінки продовжує
+        сканування індексу з місця зупинки замість пропуску `offset` рядків.
+
+        Args:
+            stmt (Select): Запит до таблиці контактів.
+            user_id (int): Ідентифікатор користувача.
+            filters (ContactListFilters, optional): Фільтри і сортування. Без них - усі контакти за id.
+
+        Returns:
+            Select: Запит з умовами і сортуванням.
+    """
+
+    stmt = stmt.where(Contact.user_id == user_id, Contact.deleted_at.is_(None))
+    if filters is None:
+        return stmt.order_by(asc(Contact.id))
+
+    if filters.name_prefix:
+        pattern = _prefix_pattern(filters.name_prefix)
+        stmt = stmt.where(or_(func.lower(Contact.first_name).like(pattern, escape="\\"),
+                              func.lower(Contact.last_name).like(pattern, escape="\\")))
+    if filters.b_day_from is not None:
+        stmt = stmt.where(Contact.b_day >= filters.b_day_from)
+    if filters.b_day_to is not None:
+        stmt = stmt.where(Contact.b_day <= filters.b_day_to)
+    if filters.email_domain:
+        stmt = stmt.where(email_domain(Contact.email) == filters.email_domain.lower())
+    if filters.has_notes is not None:
+        stmt = stmt.where(Contact.rest_data.is_not(None) if filters.has_notes else Contact.rest_data.is_(None))
+
+    keys = (Contact.id,) if filters.sort == "id" else (getattr(Contact, filters.sort), Contact.id)
+    if filters.after is not None:
+        after = filters.after[-len(keys):]
+        position = tuple_(*keys) if len(keys) > 1 else keys[0]
+        bound = tuple_(*after) if len(keys) > 1 else after[0]
+        stmt = stmt.where(position < bound if filters.descending else position > bound)
+    return stmt.order_by(*(desc(key) if filters.descending else asc(key) for key in keys))
+
+
+def _contact_search_criteria(user_id: int, query: str):
+    # Ті самі умови, що й у лямбда-запиті repo_get_contacts_query()
+    lower_search_query = f"%{query}%".lower()
+    return (
+        (Contact.user_id == user_id) &
+        (Contact.deleted_at.is_(None)) &
+        (
+                (func.lower(Contact.first_name).like(lower_search_query)) |
+                (func.lower(Contact.last_name).like(lower_search_query)) |
+                (func.lower(Contact.email).like(lower_search_query))
+        )
+    )
+
+
+@traced()
+async def get_specific_contact_belongs_to_user(id: int, user: User, db: AsyncSession,
+                                               fields: Optional[list[str]] = None):
     """
     Отримати конкретний контакт, який належить користувачеві.
 
@@ -19,6 +188,7 @@ async def get_specific_contact_belongs_to_user(id: int, user: User, db: AsyncSes
         id (int): Ідентифікатор контакту, який потрібно отримати.
         user (User): Об'єкт користувача, якому належить контакт.
         db (AsyncSession): Сесія бази даних для взаємодії з нею.
+        fields (list[str], optional): Поля контакту, які потрібно завантажити. За замовчуванням - усі.
 
     Returns:
         Contact: Об'єкт контакту, який належить користувачеві, або None, якщо контакт не знайдено.
@@ -29,14 +199,22 @@ async def get_specific_contact_belongs_to_user(id: int, user: User, db: AsyncSes
         HTTPException(404): Виникає, якщо контакт з вказаним ідентифікатором не знайдено.
     """
 
-    stmt = select(Contact).where(Contact.user_id == user.id).filter(Contact.id == id)
+    user_id = user.id
+    stmt = lambda_stmt(lambda: select(Contact))
+    stmt += lambda s: s.where(Contact.user_id == user_id, Contact.deleted_at.is_(None)).filter(Contact.id == id)
+    stmt = _with_fields(stmt, fields)
     contact_data = await db.execute(stmt)
     contact = contact_data.scalar()
     return contact
 
 
 # OK
-async def repo_get_contacts(db: AsyncSession, user: User, limit: int, offset: int) -> list[Contact]:
+@traced()
+@cached
+@coalesced
+async def repo_get_contacts(db: AsyncSession, user: User, limit: int, offset: int,
+                            fields: Optional[list[str]] = None,
+                            filters: Optional[ContactListFilters] = None) -> list[Contact]:
     """
         Отримати список контактів користувача.
 
@@ -47,6 +225,9 @@ async def repo_get_contacts(db: AsyncSession, user: User, limit: int, offset: in
             user (User): Об'єкт користувача, для якого отримуємо контакти.
             limit (int): Максимальна кількість контактів, які будуть отримані.
             offset (int): Кількість контактів, які будуть пропущені з початку результатів.
+            fields (list[str], optional): Поля контакту, які потрібно завантажити. За замовчуванням - усі.
+            filters (ContactListFilters, optional): Фільтри, сортування і курсор пагінації
+                                                    (див. _contact_list_statement()).
 
         Returns:
             List[Contact]: Список об'єктів контактів, які належать користувачеві.
@@ -56,18 +237,30 @@ async def repo_get_contacts(db: AsyncSession, user: User, limit: int, offset: in
                                 або доступу до контактів.
     """
 
-    contacts_data = (select(Contact)
-                     .where(Contact.user_id == user.id)
-                     .offset(offset)
-                     .limit(limit)
-                     .order_by(asc(Contact.id))
-                     )
+    if filters is not None:
+        stmt = _contact_list_statement(select(Contact), user.id, filters).offset(offset).limit(limit)
+        if fields:
+            stmt = stmt.options(load_only(*[getattr(Contact, field) for field in fields]))
+        result = await db.execute(stmt)
+        return result.scalars().all()
+
+    user_id = user.id
+    contacts_data = lambda_stmt(lambda: select(Contact))
+    contacts_data += lambda s: (s.where(Contact.user_id == user_id, Contact.deleted_at.is_(None))
+                                .offset(offset)
+                                .limit(limit)
+                                .order_by(asc(Contact.id))
+                                )
+    contacts_data = _with_fields(contacts_data, fields)
     result = await db.execute(contacts_data)
     return result.scalars().all()
 
 
 # OK
-async def repo_get_contact_by_id(id: int, user: User, db: AsyncSession):
+@traced()
+@cached
+@coalesced
+async def repo_get_contact_by_id(id: int, user: User, db: AsyncSession, fields: Optional[list[str]] = None):
     """
         Отримати контакт за ідентифікатором, який належить користувачеві.
 
@@ -78,6 +271,7 @@ async def repo_get_contact_by_id(id: int, user: User, db: AsyncSession):
             id (int): Ідентифікатор контакту, який потрібно отримати.
             user (User): Об'єкт користувача, для якого отримуємо контакт.
             db (AsyncSession): Асинхронна сесія бази даних для взаємодії з нею.
+            fields (list[str], optional): Поля контакту, які потрібно завантажити. За замовчуванням - усі.
 
         Returns:
             Contact: Об'єкт контакту, який належить користувачеві.
@@ -88,7 +282,7 @@ async def repo_get_contact_by_id(id: int, user: User, db: AsyncSession):
             HTTPException(404): Виникає, якщо контакт з вказаним ідентифікатором не знайдено.
     """
 
-    contact = await get_specific_contact_belongs_to_user(id, user, db)
+    contact = await get_specific_contact_belongs_to_user(id, user, db, fields)
 
     if contact is None:
         raise HTTPException(status_code=404, detail="Contact not found")
@@ -96,6 +290,7 @@ async def repo_get_contact_by_id(id: int, user: User, db: AsyncSession):
 
 
 # OK
+@traced()
 async def repo_create_new_contact(user: User, body: ContactCreate, db: AsyncSession):
     """
         Створити новий контакт для користувача.
@@ -116,15 +311,18 @@ async def repo_create_new_contact(user: User, body: ContactCreate, db: AsyncSess
             ValueError: Виникає при спробі створення контакту з не валідним форматом дати. Або майбутньою датою народження.
     """
 
-    contact = Contact(**body.dict(), user_id=user.id)
+    contact = Contact(**body.dict(), user_id=user.id, updated_at=datetime.datetime.utcnow(),
+                      version=await _next_contact_version(user.id, db, count_delta=1))
     db.add(contact)
     await db.flush()
     await db.refresh(contact)
     await db.commit()
+    await _contacts_changed(user.id, "created", contact)
     return contact
 
 
 # OK
+@traced()
 async def repo_update_contact_db(id: int, user: User, body: ContactUpdate, db: AsyncSession):
     """
         Оновити контакт що існує для користувача.
@@ -154,20 +352,27 @@ async def repo_update_contact_db(id: int, user: User, body: ContactUpdate, db: A
 
     for field, value in body.dict(exclude_unset=True).items():
         setattr(contact, field, value)
+    contact.updated_at = datetime.datetime.utcnow()
+    contact.version = await _next_contact_version(user.id, db)
 
     await db.commit()
     await db.refresh(contact)
+    await _contacts_changed(user.id, "updated", contact)
     return contact
 
 
 # OK
+@traced()
 async def repo_delete_contact_db(id: int, user: User, db: AsyncSession):
     """
         Видалити існуючий контакт користувача.
 
-        Ця функція видаляє існуючий контакт з бази даних для користувача з вказаним ідентифікатором.
+        Ця функція видаляє існуючий контакт користувача з вказаним ідентифікатором.
         У ній використовується допоміжна функція get_specific_contact_belongs_to_user(), з розширеними можливостями
         для даного випадку - (видалення конкретного контакту)
+        Контакт не видаляється фізично, а стає "надгробком" (tombstone): заповнюється поле `deleted_at`
+        та оновлюється версія, щоб клієнти могли дізнатися про видалення через repo_get_contact_changes().
+        Надгробки видаляються остаточно функцією repo_purge_contact_tombstones().
 
         Args:
             id (int): Ідентифікатор контакту, який потрібно видалити.
@@ -194,20 +399,30 @@ async def repo_delete_contact_db(id: int, user: User, db: AsyncSession):
 
     contact_name = f"{contact.first_name} {contact.last_name}"
 
-    await db.delete(contact)
+    version = await _next_contact_version(user.id, db, count_delta=-1)
+    now = datetime.datetime.utcnow()
+    contact.deleted_at = now
+    contact.updated_at = now
+    contact.rest_data = None
+    contact.version = version
     await db.commit()
+    await _contacts_changed(user.id, "deleted", contact)
 
     return {
         "message": f"Contact '{contact_name}' successfully deleted"}
 
 
 # OK
+@traced()
+@cached
+@coalesced
 async def repo_get_contacts_query(
         user: User,
         query: str,
         limit: int,
         offset: int,
-        db: AsyncSession
+        db: AsyncSession,
+        fields: Optional[list[str]] = None
 ):
     """
         Отримати список контактів користувача за запитом пошуку.
@@ -222,6 +437,7 @@ async def repo_get_contacts_query(
             limit (int): Максимальна кількість контактів, які будуть отримані.
             offset (int): Кількість контактів, які будуть пропущені з початку результатів.
             db (AsyncSession): Асинхронна сесія бази даних для взаємодії з нею.
+            fields (list[str], optional): Поля контакту, які потрібно завантажити. За замовчуванням - усі.
 
         Returns:
             List[Contact]: Список об'єктів контактів, які належать користувачеві та відповідають запиту.
@@ -233,11 +449,13 @@ async def repo_get_contacts_query(
 
     search_query = f"%{query}%"
     lower_search_query = search_query.lower()
+    user_id = user.id
 
-    stmt = (
-        select(Contact)
-        .where(
-            (Contact.user_id == user.id) &
+    stmt = lambda_stmt(lambda: select(Contact))
+    stmt += lambda s: (
+        s.where(
+            (Contact.user_id == user_id) &
+            (Contact.deleted_at.is_(None)) &
             (
                     (func.lower(Contact.first_name).like(lower_search_query)) |
                     (func.lower(Contact.last_name).like(lower_search_query)) |
@@ -248,13 +466,165 @@ async def repo_get_contacts_query(
         .limit(limit)
         .order_by(asc(Contact.id))
     )
+    stmt = _with_fields(stmt, fields)
 
     contacts_data = await db.execute(stmt)
     return contacts_data.scalars().all()
 
 
+@traced()
+async def repo_autocomplete_contacts(user: User, prefix: str, limit: int, db: AsyncSession) -> list[dict]:
+    """
+        Знайти контакти користувача, у яких ім'я, прізвище або електронна пошта починаються з префікса.
+
+        Якщо увімкнено кеш автодоповнення і контактів не більше `autocomplete_trie_max_contacts`, при першому запиті
+        всі контакти користувача завантажуються у префіксне дерево в пам'яті, і наступні запити лише перевіряють
+        версію контактів у лічильнику contact_version_counters замість пошуку за індексами.
+        Інакше виконується запит lower(...) LIKE 'prefix%' за префіксними індексами.
+
+        Args:
+            user (User): Об'єкт користувача.
+            prefix (str): Префікс, без урахування регістру.
+            limit (int): Максимальна кількість контактів.
+            db (AsyncSession): Асинхронна сесія бази даних для взаємодії з нею.
+
+        Returns:
+            list[dict]: Контакти з полями id, first_name, last_name, email, впорядковані за id.
+    """
+
+    columns = (Contact.id, Contact.first_name, Contact.last_name, Contact.email)
+    if settings.autocomplete_cache_enabled:
+        # Версія читається до контактів: дерево, побудоване з новіших даних, лише раніше перебудується
+        version = await repo_get_contacts_version(user, db)
+        trie = autocomplete_cache.get(user.id, version)
+        if trie is None and await repo_get_contacts_count(user, db) <= settings.autocomplete_trie_max_contacts:
+            result = await db.execute(
+                select(*columns).where(Contact.user_id == user.id, Contact.deleted_at.is_(None))
+            )
+            trie = ContactTrie([row._asdict() for row in result])
+            autocomplete_cache.put(user.id, trie, version)
+        if trie is not None:
+            return trie.search(prefix, limit)
+
+    pattern = _prefix_pattern(prefix)
+    result = await db.execute(
+        select(*columns)
+        .where(
+            Contact.user_id == user.id,
+            Contact.deleted_at.is_(None),
+            func.lower(Contact.first_name).like(pattern, escape="\\") |
+            func.lower(Contact.last_name).like(pattern, escape="\\") |
+            func.lower(Contact.email).like(pattern, escape="\\"),
+        )
+        .order_by(asc(Contact.id))
+        .limit(limit)
+    )
+    return [row._asdict() for row in result]
+
+
+@traced()
+async def repo_get_contacts_count(user: User, db: AsyncSession) -> int:
+    """
+        Отримати кількість контактів користувача без підрахунку рядків таблиці контактів.
+
+        Кількість читається з лічильника в contact_version_counters, який функції запису оновлюють у тій же
+        транзакції, що й контакти. Якщо користувач ще не змінював контакти і лічильника немає,
+        кількість рахується запитом COUNT(*).
+
+        Args:
+            user (User): Об'єкт користувача.
+            db (AsyncSession): Асинхронна сесія бази даних для взаємодії з нею.
+
+        Returns:
+            int: Кількість контактів користувача, не враховуючи видалені.
+    """
+
+    counters = ContactVersionCounter.__table__
+    result = await db.execute(select(counters.c.contact_count).where(counters.c.user_id == user.id))
+    count = result.scalar()
+    if count is None:
+        result = await db.execute(
+            select(func.count()).select_from(Contact).where(Contact.user_id == user.id, Contact.deleted_at.is_(None))
+        )
+        count = result.scalar()
+    return count
+
+
+@traced()
+async def repo_get_contacts_version(user: User, db: AsyncSession) -> int:
+    """
+        Отримати поточну версію контактів користувача з лічильника contact_version_counters.
+
+        Кожен запис контакту збільшує версію, тому за нею можна перевірити, чи змінювались контакти,
+        не читаючи їх.
+
+        Args:
+            user (User): Об'єкт користувача.
+            db (AsyncSession): Асинхронна сесія бази даних для взаємодії з нею.
+
+        Returns:
+            int: Остання видана версія або 0, якщо користувач ще не змінював контакти.
+    """
+
+    counters = ContactVersionCounter.__table__
+    result = await db.execute(select(counters.c.version).where(counters.c.user_id == user.id))
+    return result.scalar() or 0
+
+
+async def repo_stream_birthday_contacts(user: User, db: AsyncSession,
+                                        batch_size: int = 1000) -> AsyncIterator[Row]:
+    """
+        Прочитати дні народження всіх контактів користувача потоком, не завантажуючи книгу контактів у пам'ять.
+
+        Рядки читаються серверним курсором пачками по `batch_size`. На відміну від repo_get_contact_changes(),
+        сюди потрапляють і контакти, створені до появи версій (version = 0).
+
+        Args:
+            user (User): Об'єкт користувача.
+            db (AsyncSession): Асинхронна сесія бази даних для взаємодії з нею.
+            batch_size (int): Кількість рядків в одній пачці.
+
+        Yields:
+            Row: Рядки з полями id, first_name, last_name, b_day, updated_at, впорядковані за id.
+    """
+
+    result = await db.stream(
+        select(Contact.id, Contact.first_name, Contact.last_name, Contact.b_day, Contact.updated_at)
+        .where(Contact.user_id == user.id, Contact.deleted_at.is_(None))
+        .order_by(asc(Contact.id))
+        .execution_options(yield_per=batch_size)
+    )
+    async for row in result:
+        yield row
+
+
+@traced()
+async def repo_count_contacts_query(user: User, query: str, cap: int, db: AsyncSession) -> tuple[int, bool]:
+    """
+        Порахувати контакти, що відповідають пошуковому запиту, але не більше ніж `cap`.
+
+        Підзапит обмежений `cap + 1` рядками, тому вартість підрахунку не залежить від кількості контактів.
+
+        Args:
+            user (User): Об'єкт користувача.
+            query (str): Пошуковий запит, як у repo_get_contacts_query().
+            cap (int): Максимальна кількість, яку потрібно рахувати точно.
+            db (AsyncSession): Асинхронна сесія бази даних для взаємодії з нею.
+
+        Returns:
+            tuple[int, bool]: Кількість (не більше `cap`) і ознака, чи є вона точною.
+    """
+
+    matches = select(Contact.id).where(_contact_search_criteria(user.id, query)).limit(cap + 1).subquery()
+    result = await db.execute(select(func.count()).select_from(matches))
+    count = result.scalar()
+    return min(count, cap), count <= cap
+
+
 # OK
 
+@traced()
+@coalesced
 async def repo_get_upcoming_birthday_contacts(user: User, db: AsyncSession):
     """
         Отримати список контактів з наближаючимися днями народження користувача.
@@ -279,7 +649,7 @@ async def repo_get_upcoming_birthday_contacts(user: User, db: AsyncSession):
     answer_contacts = []
     results = await db.execute(
         select(Contact)
-        .filter(Contact.user_id == user.id)
+        .filter(Contact.user_id == user.id, Contact.deleted_at.is_(None))
     )
     contacts: list[Contact] = results.scalars().all()
 
@@ -291,3 +661,138 @@ async def repo_get_upcoming_birthday_contacts(user: User, db: AsyncSession):
             answer_contacts.append(contact)
 
     return answer_contacts
+
+
+@traced()
+@coalesced
+async def repo_get_contact_changes(user: User, since: int, limit: int, db: AsyncSession) -> list[Contact]:
+    """
+        Отримати контакти користувача, змінені або видалені після вказаної версії.
+
+        Запит виконується як діапазонне сканування індексу (user_id, version), тому його вартість
+        пропорційна кількості змін, а не розміру книги контактів. Видалені контакти повертаються як
+        надгробки із заповненим полем `deleted_at`.
+
+        Args:
+            user (User): Об'єкт користувача, для якого отримуємо зміни.
+            since (int): Версія, після якої потрібно отримати зміни (-1 - усі контакти).
+            limit (int): Максимальна кількість змін, які будуть отримані.
+            db (AsyncSession): Асинхронна сесія бази даних для взаємодії з нею.
+
+        Returns:
+            List[Contact]: Змінені та видалені контакти, впорядковані за версією.
+    """
+
+    stmt = (
+        select(Contact)
+        .where(Contact.user_id == user.id, Contact.version > since)
+        .order_by(asc(Contact.version), asc(Contact.id))
+        .limit(limit)
+    )
+    result = await db.execute(stmt)
+    return result.scalars().all()
+
+
+@traced()
+async def repo_purge_contact_tombstones(before: datetime.datetime, db: AsyncSession) -> int:
+    """
+        Остаточно видалити надгробки контактів, видалених до вказаного моменту.
+
+        Args:
+            before (datetime): Надгробки з `deleted_at` раніше цього моменту будуть видалені.
+            db (AsyncSession): Асинхронна сесія бази даних для взаємодії з нею.
+
+        Returns:
+            int: Кількість видалених рядків.
+    """
+
+    result = await db.execute(delete(Contact).where(Contact.deleted_at < before))
+    await db.commit()
+    return result.rowcount
+
+
+def upcoming_birthday_keys(today: datetime.date, days: int = 7) -> list[int]:
+    """
+        Отримати ключі (місяць * 100 + день) для днів народження у вікні з `today` на `days` днів уперед.
+
+        Якщо у вікно потрапляє 28 лютого невисокосного року, до ключів додається і 29 лютого,
+        щоб контакти, народжені 29 лютого, не випадали з розсилки.
+
+        Args:
+            today (date): Перший день вікна.
+            days (int): Кількість днів після `today`, що входять у вікно.
+
+        Returns:
+            list[int]: Список ключів дат, наприклад 1231 для 31 грудня.
+    """
+
+    keys = []
+    for shift in range(days + 1):
+        day = today + datetime.timedelta(days=shift)
+        keys.append(day.month * 100 + day.day)
+        if day.month == 2 and day.day == 28 and not calendar.isleap(day.year):
+            keys.append(229)
+    return keys
+
+
+@traced()
+async def repo_get_reminder_users(db: AsyncSession, after_user_id: int = 0, limit: int = 500) -> list[Row]:
+    """
+        Отримати сторінку активованих користувачів для розсилки нагадувань.
+
+        Сторінки вибираються за ключем (keyset) - ідентифікатором користувача, тому кожен запит читає лише
+        `limit` рядків за первинним ключем і не тримає курсор відкритим між сторінками.
+
+        Args:
+            db (AsyncSession): Асинхронна сесія основної бази даних.
+            after_user_id (int): Ідентифікатор останнього користувача попередньої сторінки.
+            limit (int): Розмір сторінки.
+
+        Returns:
+            list[Row]: Рядки з полями id, email, username, shard, впорядковані за id.
+    """
+
+    stmt = (
+        select(User.id, User.email, User.username, User.shard)
+        .where(User.is_activated.is_(True), User.id > after_user_id)
+        .order_by(asc(User.id))
+        .limit(limit)
+    )
+    result = await db.execute(stmt)
+    return result.all()
+
+
+@traced()
+async def repo_get_upcoming_birthdays_for_users(
+        db: AsyncSession,
+        user_ids: list[int],
+        today: datetime.date,
+        days: int = 7
+) -> list[Row]:
+    """
+        Отримати контакти з наближаючимися днями народження для групи користувачів одним запитом.
+
+        На відміну від repo_get_upcoming_birthday_contacts(), фільтр за місяцем і днем виконується на боці бази даних.
+
+        Args:
+            db (AsyncSession): Асинхронна сесія бази даних, у якій зберігаються контакти користувачів.
+            user_ids (list[int]): Ідентифікатори користувачів.
+            today (date): Перший день вікна пошуку.
+            days (int): Кількість днів після `today`, що входять у вікно.
+
+        Returns:
+            list[Row]: Рядки з полями user_id, first_name, last_name, email, b_day, впорядковані за user_id.
+    """
+
+    b_day_key = extract("month", Contact.b_day) * 100 + extract("day", Contact.b_day)
+    stmt = (
+        select(Contact.user_id, Contact.first_name, Contact.last_name, Contact.email, Contact.b_day)
+        .where(
+            Contact.user_id.in_(user_ids),
+            Contact.deleted_at.is_(None),
+            b_day_key.in_(upcoming_birthday_keys(today, days)),
+        )
+        .order_by(asc(Contact.user_id), asc(Contact.id))
+    )
+    result = await db.execute(stmt)
+    return result.all()
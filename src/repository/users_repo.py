@@ -1,21 +1,26 @@
 from datetime import datetime
+from typing import Optional
 
-from sqlalchemy import select
+from sqlalchemy import select, update, lambda_stmt
 from sqlalchemy.ext.asyncio import AsyncSession
 from libgravatar import Gravatar
 
 from src.DB.models import User
+from src.conf.config import settings
 from src.schemas.User_Schemas import UserCreate
 from src.services import authservice as auth_service
+from src.services.tracing import traced
 
 
+@traced()
 async def repo_create_user(body: UserCreate, db: AsyncSession):
     """
     Створити нового користувача.
 
     Ця функція створює нового користувача з наданими даними та зберігає його в базі даних.
     Для присвоєння аватара використовується libgravatar, який автоматично присвоює аватар користувачу,
-    відповідно до користувацього імейлу.
+    відповідно до користувацього імейлу. Контакти нового користувача зберігаються у шарді
+    `settings.contacts_new_user_shard` (за замовчуванням - в основній базі даних).
 
     Args:
         body (UserCreate): Об'єкт `UserCreate`, що містить дані для створення нового користувача.
@@ -33,19 +38,23 @@ async def repo_create_user(body: UserCreate, db: AsyncSession):
     user = User(**body.dict(),
                 created_at=datetime.utcnow(),
                 avatar=avatar_img_url,
-                refresh_token=refresh_token)
+                refresh_token=refresh_token,
+                shard=settings.contacts_new_user_shard)
     db.add(user)
     await db.commit()
     await db.refresh(user)
     return user
 
 
+@traced()
 async def repo_user_authentication_by_email(email: str, db: AsyncSession) -> User:
     """
     Здійснює аутентифікацію користувача за електронною поштою.
 
     Ця функція шукає користувача в базі даних за його електронною поштою
     та повертає об'єкт користувача, якщо такий користувач існує.
+    Функція викликається на кожен автентифікований запит, тому запит побудовано як lambda_stmt:
+    його конструкція та компіляція кешуються, а електронна пошта передається як зв'язаний параметр.
 
     Args:
         email (str): Електронна пошта користувача, якого потрібно знайти.
@@ -55,12 +64,13 @@ async def repo_user_authentication_by_email(email: str, db: AsyncSession) -> Use
         User: Об'єкт користувача, якщо користувач з вказаною електронною адресою існує.
               Якщо користувача з такою електронною поштою не знайдено, повертається None.
     """
-    query = select(User).where(User.email == email)
+    query = lambda_stmt(lambda: select(User).where(User.email == email))
     result = await db.execute(query)
     existing_user = result.scalar()
     return existing_user
 
 
+@traced()
 async def repo_update_refresh_token(user: User, new_refresh_token: str, db: AsyncSession):
     """
     Оновлює токен оновлення (refresh token) для користувача.
@@ -80,6 +90,26 @@ async def repo_update_refresh_token(user: User, new_refresh_token: str, db: Asyn
     await db.commit()
 
 
+@traced()
+async def repo_update_password(user: User, password_hash: str, db: AsyncSession):
+    """
+    Оновлює хеш пароля користувача.
+
+    Викликається під час входу, якщо збережений хеш створено за старою політикою хешування.
+
+    Args:
+        user (User): Об'єкт користувача, для якого потрібно оновити хеш пароля.
+        password_hash (str): Новий хеш пароля.
+        db (AsyncSession): Асинхронна сесія бази даних для взаємодії з нею.
+
+    Returns:
+        None
+    """
+    user.password = password_hash
+    await db.commit()
+
+
+@traced()
 async def confirmed_email(email: str, db: AsyncSession):
     """
     Підтверджує електронну пошту користувача.
@@ -101,6 +131,7 @@ async def confirmed_email(email: str, db: AsyncSession):
     await db.commit()
 
 
+@traced()
 async def update_avatar(email, src_url, db: AsyncSession):
     """
     Оновлює аватар користувача.
@@ -124,6 +155,7 @@ async def update_avatar(email, src_url, db: AsyncSession):
     return user
 
 
+@traced()
 async def add_reset_token_to_db(user, reset_token, db: AsyncSession):
     """
     Додає токен скидання пароля (reset token) до користувача.
@@ -142,3 +174,41 @@ async def add_reset_token_to_db(user, reset_token, db: AsyncSession):
 
     user.reset_token = reset_token
     await db.commit()
+
+
+@traced()
+async def repo_set_feed_token(user: User, token_hash: Optional[str], db: AsyncSession):
+    """
+    Встановлює або відкликає токен стрічки днів народження користувача.
+
+    Зберігається лише хеш токена, тому попередній токен перестає діяти одразу після заміни.
+
+    Args:
+        user (User): Об'єкт користувача, для якого потрібно змінити токен стрічки.
+        token_hash (Optional[str]): sha256 нового токена або None, щоб відкликати токен.
+        db (AsyncSession): Асинхронна сесія бази даних для взаємодії з нею.
+
+    Returns:
+        None
+    """
+
+    await db.execute(update(User).where(User.id == user.id).values(feed_token=token_hash))
+    await db.commit()
+    user.feed_token = token_hash
+
+
+@traced()
+async def repo_get_user_by_feed_token(token_hash: str, db: AsyncSession) -> Optional[User]:
+    """
+    Знаходить користувача за хешем токена стрічки днів народження.
+
+    Args:
+        token_hash (str): sha256 токена з URL стрічки.
+        db (AsyncSession): Асинхронна сесія бази даних для взаємодії з нею.
+
+    Returns:
+        Optional[User]: Об'єкт користувача або None, якщо токен не видано чи його відкликано.
+    """
+
+    result = await db.execute(select(User).where(User.feed_token == token_hash))
+    return result.scalar()
@@ -0,0 +1,73 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+
+from src.DB.db import SessionReleasingRoute
+from src.DB.models import User
+from src.conf.config import settings
+from src.services.authservice import authservice as auth_service
+from src.services.avatar import cloudinary_integration
+from src.services.email import mail_integration
+from src.services.load_shedding import admission_controller
+from src.services.pool_metrics import pool_metrics
+from src.services.query_monitor import query_monitor
+
+admin_router = APIRouter(route_class=SessionReleasingRoute)
+
+
+async def get_current_admin(user: User = Depends(auth_service.get_current_user)) -> User:
+    """
+        Перевірити, що поточний користувач є адміністратором (його пошта є в налаштуванні admin_emails).
+
+        Raises:
+            HTTPException(403): Якщо користувач не є адміністратором.
+    """
+    if user.email not in settings.admin_emails:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required")
+    return user
+
+
+@admin_router.get("/queries")
+async def get_query_report(admin: User = Depends(get_current_admin)):
+    """
+        Отримати останні повільні SQL-запити з планами виконання та HTTP-запити з ймовірним N+1.
+    """
+    return query_monitor.report()
+
+
+@admin_router.delete("/queries", status_code=status.HTTP_204_NO_CONTENT)
+async def reset_query_report(admin: User = Depends(get_current_admin)):
+    """
+        Очистити накопичені записи монітора запитів.
+    """
+    query_monitor.reset()
+
+
+@admin_router.get("/pool")
+async def get_pool_report(admin: User = Depends(get_current_admin)):
+    """
+        Отримати метрики зайнятості пулу з'єднань бази даних.
+    """
+    return pool_metrics.report()
+
+
+@admin_router.delete("/pool", status_code=status.HTTP_204_NO_CONTENT)
+async def reset_pool_report(admin: User = Depends(get_current_admin)):
+    """
+        Скинути накопичені метрики пулу з'єднань.
+    """
+    pool_metrics.reset()
+
+
+@admin_router.get("/integrations")
+async def get_integrations_report(admin: User = Depends(get_current_admin)):
+    """
+        Отримати стан запобіжників і лічильники викликів зовнішніх сервісів (Cloudinary, SMTP).
+    """
+    return {integration.name: integration.report() for integration in (cloudinary_integration, mail_integration)}
+
+
+@admin_router.get("/load")
+async def get_load_report(admin: User = Depends(get_current_admin)):
+    """
+        Отримати кількість прийнятих і відхилених запитів воркера за класами пріоритету.
+    """
+    return admission_controller.report()
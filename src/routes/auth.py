@@ -5,8 +5,9 @@ from fastapi_limiter.depends import RateLimiter
 from pydantic import EmailStr
 from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi.templating import Jinja2Templates
+from starlette.concurrency import run_in_threadpool
 
-from src.DB.db import get_db
+from src.DB.db import get_db, SessionReleasingRoute
 
 from src.repository import users_repo as user_repository
 from src.schemas.User_Schemas import UserCreate, UserCreationResponse, OnLoginResponse, UserDBScheme, RequestEmail
@@ -14,7 +15,7 @@ from src.services.authservice import authservice as auth_service
 from src.services.email import send_email, send_email_for_reset_pswd
 
 
-auth_router = APIRouter()
+auth_router = APIRouter(route_class=SessionReleasingRoute)
 security = HTTPBearer()
 
 templates = Jinja2Templates("src/templates")
@@ -47,8 +48,13 @@ async def login(body: OAuth2PasswordRequestForm = Depends(), db: AsyncSession =
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid email")
     if not user.is_activated:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Inactive user. (Email not confirmed.)")
-    if not auth_service.check_password_hash(user.password, body.password):
+    # Хешування займає десятки-сотні мілісекунд процесора, тому виконується поза циклом подій
+    password_ok, new_password_hash = await run_in_threadpool(auth_service.check_password_and_rehash,
+                                                             user.password, body.password)
+    if not password_ok:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid password")
+    if new_password_hash:
+        await user_repository.repo_update_password(user, new_password_hash, db=db)
     # Generate tokens
     access_token = await auth_service.create_access_token(data={"sub": user.email}, expires_delta=3600)
     refresh_token_ = await auth_service.create_refresh_token(data={"sub": user.email})
@@ -1,32 +1,307 @@
-from fastapi import APIRouter, Depends, Query, status
+import asyncio
+import base64
+import binascii
+import calendar
+import json
+from datetime import date, datetime, timedelta
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response, status, WebSocket
+from fastapi.responses import StreamingResponse
 from fastapi_limiter.depends import RateLimiter
+from jose import jwt, JWTError, ExpiredSignatureError
+from pydantic import ValidationError
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.DB.db import get_db
+from src.DB.shards import get_shard_db, get_feed_shard_db, get_read_db
 from src.DB.models import User
+from src.conf.config import settings
 from src.repository.contacts_repo import repo_get_contacts, repo_get_contact_by_id, repo_create_new_contact, \
-    repo_update_contact_db, repo_delete_contact_db, repo_get_contacts_query, repo_get_upcoming_birthday_contacts
-from src.schemas.Contacts_Schemas import ContactCreate, ContactResponse, ContactUpdate
+    repo_update_contact_db, repo_delete_contact_db, repo_get_contacts_query, repo_get_upcoming_birthday_contacts, \
+    repo_get_contact_changes, repo_get_contacts_count, repo_count_contacts_query, \
+    repo_autocomplete_contacts, repo_get_contacts_version
+from src.repository.users_repo import repo_set_feed_token
+from src.repository.contacts_read_repo import repo_read_contacts, repo_read_contacts_query
+from src.schemas.Contacts_Schemas import ContactCreate, ContactResponse, ContactUpdate, ContactPartialResponse, \
+    ContactChangesResponse, ContactAutocompleteResponse, BirthdayFeedTokenResponse, ContactListFilters, CONTACT_FIELDS
 from src.services.authservice import authservice as auth_service
+from src.services.birthday_feed import birthday_feed_cache, feed_etag, etag_matches, not_modified_since, http_date, \
+    iter_calendar, stream_calendar, new_feed_token, hash_feed_token, get_feed_user
+from src.services.contact_events import contact_events, sse_stream, OVERFLOW_EVENT
+from src.services.serialization import NegotiatedResponse, NegotiatedRoute, encode_rows
+
+router = APIRouter(prefix='/contacts', tags=["contacts"], route_class=NegotiatedRoute,
+                   default_response_class=NegotiatedResponse)
+
+
+def contact_fields(fields: Optional[str] = Query(None, description="Comma separated contact fields to return, "
+                                                                   "e.g. first_name,last_name")):
+    if fields is None:
+        return None
+    requested = [field.strip() for field in fields.split(",") if field.strip()]
+    unknown = [field for field in requested if field not in CONTACT_FIELDS]
+    if unknown:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                            detail=f"Unknown contact fields: {', '.join(unknown)}")
+    return ["id"] + [field for field in dict.fromkeys(requested) if field != "id"]
+
+
+def encode_list_cursor(sort: str, contact) -> str:
+    """Курсор наступної сторінки - ключ сортування, його значення та id останнього контакту сторінки."""
+    value = getattr(contact, sort)
+    payload = [sort, value.isoformat() if isinstance(value, date) else value, contact.id]
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip("=")
+
+
+def decode_list_cursor(cursor: str, sort: str) -> tuple:
+    try:
+        key, value, contact_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if key != sort or not isinstance(contact_id, int):
+            raise ValueError
+        if sort == "b_day":
+            value = date.fromisoformat(value)
+        elif not isinstance(value, int if sort == "id" else str):
+            raise ValueError
+    except (ValueError, TypeError, binascii.Error):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    return value, contact_id
+
+
+def contact_list_filters(
+        name_prefix: Optional[str] = Query(None, min_length=1, max_length=100,
+                                           description="First or last name prefix, case insensitive"),
+        b_day_from: Optional[date] = None,
+        b_day_to: Optional[date] = None,
+        email_domain: Optional[str] = Query(None, min_length=1, max_length=255),
+        has_notes: Optional[bool] = None,
+        sort: Optional[str] = Query(None, description="last_name, first_name, b_day or id; "
+                                                      "prefix '-' for descending order"),
+        after: Optional[str] = Query(None, description="X-Next-Cursor of the previous page"),
+        offset: int = 0):
+    if sort is None and not (name_prefix or b_day_from or b_day_to or email_domain or after) and has_notes is None:
+        # Без параметрів списку - сторінки за id з offset, як і раніше
+        return None
+    sort = sort or "id"
+    try:
+        filters = ContactListFilters(name_prefix=name_prefix, b_day_from=b_day_from, b_day_to=b_day_to,
+                                     email_domain=email_domain, has_notes=has_notes, sort=sort.removeprefix("-"),
+                                     descending=sort.startswith("-"))
+    except ValidationError as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                            detail="; ".join(error["msg"] for error in e.errors()))
+    if after is not None:
+        if offset:
+            raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                                detail="offset cannot be combined with after")
+        filters = filters.copy(update={"after": decode_list_cursor(after, filters.sort)})
+    return filters
+
 
-router = APIRouter(prefix='/contacts', tags=["contacts"])
+def shape_contact(contact, fields: Optional[list[str]]):
+    if not fields:
+        return contact
+    return {field: getattr(contact, field) for field in fields}
+
+
+def encode_sync_token(version: int, user_id: int) -> str:
+    """Токен синхронізації - JWT, підписаний `secret_key`, з версією і користувачем, для якого його видано."""
+    issued_at = datetime.utcnow()
+    expire = issued_at + timedelta(days=settings.contacts_tombstone_retention_days)
+    return jwt.encode({"sub": str(user_id), "ver": version, "iat": issued_at, "exp": expire, "scope": "sync_token"},
+                      key=settings.secret_key, algorithm=settings.algorithm)
+
+
+def decode_sync_token(token: Optional[str], user_id: int, resync_at: Optional[datetime] = None) -> int:
+    if not token:
+        # Без токена повертаються всі контакти, включно зі створеними до появи версій (version = 0)
+        return -1
+    try:
+        payload = jwt.decode(token, key=settings.secret_key, algorithms=[settings.algorithm])
+    except ExpiredSignatureError:
+        raise HTTPException(status_code=status.HTTP_410_GONE, detail="Sync token expired. Full resync required.")
+    except JWTError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid sync token")
+    if payload.get("scope") != "sync_token" or payload.get("sub") != str(user_id) \
+            or not isinstance(payload.get("ver"), int):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid sync token")
+    # iat має точність до секунди: токени, видані в ту ж секунду, що й зміна ідентифікаторів, теж недійсні
+    if resync_at is not None and payload.get("iat", 0) <= calendar.timegm(resync_at.utctimetuple()):
+        raise HTTPException(status_code=status.HTTP_410_GONE, detail="Contact ids changed. Full resync required.")
+    return payload["ver"]
 
 
 # CRUD block
 # OK
-@router.get("/", tags=["contacts"], response_model=list[ContactResponse])
-async def get_contacts_db(user: User = Depends(auth_service.get_current_user), limit: int = 10, offset: int = 0,
-                          db: AsyncSession = Depends(get_db),
+@router.get("/", tags=["contacts"], response_model=list[ContactPartialResponse], response_model_exclude_unset=True)
+async def get_contacts_db(response: Response, user: User = Depends(auth_service.get_current_user), limit: int = 10,
+                          offset: int = 0,
+                          fields: Optional[list[str]] = Depends(contact_fields),
+                          filters: Optional[ContactListFilters] = Depends(contact_list_filters),
+                          db: AsyncSession = Depends(get_read_db),
                           ):
-    return await repo_get_contacts(user=user, limit=limit, offset=offset, db=db)
+    if filters is None:
+        headers = {"X-Total-Count": str(await repo_get_contacts_count(user=user, db=db))}
+    else:
+        # Кількість відфільтрованих контактів не рахується: для цього довелося б прочитати всю вибірку
+        headers = {}
+        if fields and filters.sort not in fields:
+            # Ключ сортування потрібен для курсора наступної сторінки
+            fields = fields + [filters.sort]
+    if "list" in settings.contacts_fast_read_endpoints:
+        contacts = await repo_read_contacts(user=user, limit=limit, offset=offset, db=db, fields=fields,
+                                            filters=filters)
+    else:
+        contacts = await repo_get_contacts(user=user, limit=limit, offset=offset, db=db, fields=fields,
+                                           filters=filters)
+    if filters is not None and contacts and len(contacts) == limit:
+        headers["X-Next-Cursor"] = encode_list_cursor(filters.sort, contacts[-1])
+    if "list" in settings.contacts_fast_read_endpoints:
+        return NegotiatedResponse(encode_rows(contacts), headers=headers)
+    response.headers.update(headers)
+    return [shape_contact(contact, fields) for contact in contacts]
+
+
+"""Автодоповнення за префіксом імені, прізвища або електронної пошти.
+Маршрут оголошено перед /{id}, щоб шлях /autocomplete не сприймався як ідентифікатор."""
+
+
+@router.get("/autocomplete", tags=["contacts"], response_model=list[ContactAutocompleteResponse])
+async def autocomplete_contacts(user: User = Depends(auth_service.get_current_user),
+                                prefix: str = Query(min_length=1, max_length=100),
+                                limit: int = Query(10, ge=1, le=50),
+                                db: AsyncSession = Depends(get_shard_db)):
+    return await repo_autocomplete_contacts(user=user, prefix=prefix, limit=limit, db=db)
+
+
+"""Incremental sync: контакти, змінені або видалені після версії з токена `since`.
+Маршрут оголошено перед /{id}, щоб шлях /changes не сприймався як ідентифікатор."""
+
+
+@router.get("/changes", tags=["contacts"], response_model=ContactChangesResponse)
+async def get_contact_changes(user: User = Depends(auth_service.get_current_user),
+                              since: Optional[str] = None,
+                              limit: int = Query(500, ge=1, le=1000),
+                              db: AsyncSession = Depends(get_shard_db)):
+    version = decode_sync_token(since, user.id, user.contacts_resync_at)
+    contacts = await repo_get_contact_changes(user=user, since=version, limit=limit + 1, db=db)
+    has_more = len(contacts) > limit
+    contacts = contacts[:limit]
+    return ContactChangesResponse(
+        changed=[contact for contact in contacts if contact.deleted_at is None],
+        deleted=[contact.id for contact in contacts if contact.deleted_at is not None],
+        next_since=encode_sync_token(contacts[-1].version if contacts else version, user.id),
+        has_more=has_more,
+    )
+
+
+"""Потік змін контактів замість опитування: події created/updated/deleted, опубліковані репозиторієм."""
+
+
+@router.get("/stream", tags=["contacts"], response_class=StreamingResponse)
+async def stream_contact_events(user: User = Depends(auth_service.get_current_user),
+                                db: AsyncSession = Depends(get_db)):
+    # З'єднання з базою потрібне лише для автентифікації - повертаємо його в пул до початку потоку
+    await db.close()
+    return StreamingResponse(sse_stream(user.id), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+@router.websocket("/stream/ws")
+async def stream_contact_events_ws(websocket: WebSocket, token: str = Query(...), db: AsyncSession = Depends(get_db)):
+    try:
+        user = await auth_service.get_current_user(token=token, db=db)
+    except HTTPException:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    finally:
+        await db.close()
+
+    await websocket.accept()
+
+    async def send_events():
+        async with contact_events.subscribe(user.id) as subscription:
+            while True:
+                event = await subscription.get(settings.contact_events_heartbeat)
+                await websocket.send_json(event or {"type": "ping"})
+                if event is OVERFLOW_EVENT:
+                    await websocket.close()
+                    return
+
+    async def wait_for_disconnect():
+        # Повідомлення клієнта ігноруються - читаємо сокет лише щоб помітити відключення
+        while (await websocket.receive())["type"] != "websocket.disconnect":
+            pass
+
+    sender = asyncio.create_task(send_events())
+    receiver = asyncio.create_task(wait_for_disconnect())
+    try:
+        await asyncio.wait({sender, receiver}, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        sender.cancel()
+        receiver.cancel()
+        # Відправка у закритий сокет завершується помилкою - вона очікувана, тому лише забираємо її
+        await asyncio.gather(sender, receiver, return_exceptions=True)
+
+
+"""Стрічка днів народження у форматі iCalendar для підписки з календарних застосунків.
+Автентифікується окремим токеном у URL, який можна замінити або відкликати.
+Маршрути оголошено перед /{id}, щоб шлях /birthdays.ics не сприймався як ідентифікатор."""
+
+
+@router.post("/birthdays/feed-token", tags=["contacts"], response_model=BirthdayFeedTokenResponse)
+async def create_birthday_feed_token(request: Request, user: User = Depends(auth_service.get_current_user),
+                                     db: AsyncSession = Depends(get_db)):
+    # Новий токен замінює попередній, тож стара адреса стрічки перестає діяти
+    token = new_feed_token()
+    await repo_set_feed_token(user=user, token_hash=hash_feed_token(token), db=db)
+    feed_url = request.url_for("get_birthday_feed").include_query_params(token=token)
+    return BirthdayFeedTokenResponse(feed_url=str(feed_url), token=token)
+
+
+@router.delete("/birthdays/feed-token", tags=["contacts"], status_code=status.HTTP_204_NO_CONTENT)
+async def revoke_birthday_feed_token(user: User = Depends(auth_service.get_current_user),
+                                     db: AsyncSession = Depends(get_db)):
+    await repo_set_feed_token(user=user, token_hash=None, db=db)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+
+@router.get("/birthdays.ics", tags=["contacts"], response_class=StreamingResponse)
+async def get_birthday_feed(user: User = Depends(get_feed_user),
+                            if_none_match: Optional[str] = Header(None),
+                            if_modified_since: Optional[str] = Header(None),
+                            db: AsyncSession = Depends(get_feed_shard_db)):
+    # Версія контактів змінюється з кожним записом, тому перевірка ETag не читає самих контактів
+    version = await repo_get_contacts_version(user=user, db=db)
+    headers = {"ETag": feed_etag(user.id, version),
+               "Cache-Control": f"private, max-age={settings.birthday_feed_max_age}"}
+    if etag_matches(if_none_match, headers["ETag"]):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    entry = await birthday_feed_cache.load(user=user, version=version, db=db)
+    if entry is None:
+        # Завелика книга контактів генерується під час відправлення прямо з курсора бази даних
+        return StreamingResponse(stream_calendar(user, db), media_type="text/calendar",
+                                 headers=headers)
+
+    headers["ETag"] = feed_etag(user.id, entry.version)
+    if entry.last_modified is not None:
+        headers["Last-Modified"] = http_date(entry.last_modified)
+    if if_none_match is None and not_modified_since(if_modified_since, entry.last_modified):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    # Знімок подій: запис кешу може оновитися іншим запитом, поки відповідь ще відправляється
+    return StreamingResponse(iter_calendar(list(entry.events.values())), media_type="text/calendar",
+                             headers=headers)
 
 
 # OK
-@router.get("/{id}", tags=["contacts"], response_model=ContactResponse)
+@router.get("/{id}", tags=["contacts"], response_model=ContactPartialResponse, response_model_exclude_unset=True)
 async def get_contact_by_id(id: int, user: User = Depends(auth_service.get_current_user),
-                            db: AsyncSession = Depends(get_db)):
-    return await repo_get_contact_by_id(id=id, user=user, db=db)
+                            fields: Optional[list[str]] = Depends(contact_fields),
+                            db: AsyncSession = Depends(get_read_db)):
+    contact = await repo_get_contact_by_id(id=id, user=user, db=db, fields=fields)
+    return shape_contact(contact, fields)
 
 
 # OK
@@ -34,21 +309,21 @@ async def get_contact_by_id(id: int, user: User = Depends(auth_service.get_curre
              # dependencies=[Depends(RateLimiter(times=2, seconds=5))]
              )
 async def create_new_contact(body: ContactCreate, user: User = Depends(auth_service.get_current_user),
-                             db: AsyncSession = Depends(get_db)):
+                             db: AsyncSession = Depends(get_shard_db)):
     return await repo_create_new_contact(user=user, body=body, db=db)
 
 
 # OK
 @router.put("/{id}", tags=["contacts"], response_model=ContactResponse)
 async def update_contact_db(id: int, body: ContactUpdate, user: User = Depends(auth_service.get_current_user),
-                            db: AsyncSession = Depends(get_db)):
+                            db: AsyncSession = Depends(get_shard_db)):
     return await repo_update_contact_db(id=id, user=user, body=body, db=db)
 
 
 # OK
 @router.delete("/{id}", tags=["contacts"])
 async def delete_contact_db(id: int, user: User = Depends(auth_service.get_current_user),
-                            db: AsyncSession = Depends(get_db)):
+                            db: AsyncSession = Depends(get_shard_db)):
     return await repo_delete_contact_db(id=id, user=user, db=db)
 
 
@@ -59,15 +334,29 @@ async def delete_contact_db(id: int, user: User = Depends(auth_service.get_curre
 
 
 # OK
-@router.get("/query/", tags=["contacts"], response_model=list[ContactResponse])
+@router.get("/query/", tags=["contacts"], response_model=list[ContactPartialResponse],
+            response_model_exclude_unset=True)
 async def get_contacts_query(
+        response: Response,
         user: User = Depends(auth_service.get_current_user),
         query: str = Query(min_length=2, max_length=100),
         limit: int = 10,
         offset: int = 0,
-        db: AsyncSession = Depends(get_db)
+        fields: Optional[list[str]] = Depends(contact_fields),
+        db: AsyncSession = Depends(get_read_db)
 ):
-    return await repo_get_contacts_query(user=user, query=query, limit=limit, offset=offset, db=db)
+    # Кількість результатів пошуку рахується лише до межі contacts_search_count_cap
+    count, exact = await repo_count_contacts_query(user=user, query=query, cap=settings.contacts_search_count_cap,
+                                                   db=db)
+    count_headers = {"X-Total-Count": str(count), "X-Total-Count-Exact": "true" if exact else "false"}
+    if "query" in settings.contacts_fast_read_endpoints:
+        rows = await repo_read_contacts_query(user=user, query=query, limit=limit, offset=offset, db=db,
+                                              fields=fields)
+        return NegotiatedResponse(encode_rows(rows), headers=count_headers)
+    contacts = await repo_get_contacts_query(user=user, query=query, limit=limit, offset=offset, db=db,
+                                             fields=fields)
+    response.headers.update(count_headers)
+    return [shape_contact(contact, fields) for contact in contacts]
 
 
 """API повинен мати змогу отримати список контактів з днями народження на найближчі 7 днів."""
@@ -78,5 +367,5 @@ async def get_contacts_query(
             response_model=list[ContactResponse]
             )
 async def get_upcoming_birthday_contacts(user: User = Depends(auth_service.get_current_user),
-                                         db: AsyncSession = Depends(get_db)):
+                                         db: AsyncSession = Depends(get_read_db)):
     return await repo_get_upcoming_birthday_contacts(user=user, db=db)
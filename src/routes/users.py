@@ -1,17 +1,18 @@
 import cloudinary
 import cloudinary.uploader
-from fastapi import APIRouter, Depends, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.DB.db import get_db
+from src.DB.db import get_db, SessionReleasingRoute
 from src.DB.models import User
 from src.conf.config import settings
 from src.schemas.User_Schemas import UserDBScheme
 from src.services.authservice import authservice as auth_service
 from src.repository import users_repo as user_repository
 from src.services.avatar import UploadImage
+from src.services.resilience import IntegrationUnavailable
 
-user_router = APIRouter()
+user_router = APIRouter(route_class=SessionReleasingRoute)
 
 
 @user_router.get("/me", response_model=UserDBScheme)
@@ -71,6 +72,7 @@ async def update_user_avatar(file: UploadFile = File(), current_user: User = Dep
                                 або доступу до оновлення аватару.
             HTTPException(400): Виникає, якщо файл зображення не надіслано або формат
                                 файлу не підтримується.
+            HTTPException(503): Виникає, якщо Cloudinary недоступний або не відповів вчасно.
 
         Example:
              Приклад успішного запиту та відповіді:
@@ -96,7 +98,10 @@ async def update_user_avatar(file: UploadFile = File(), current_user: User = Dep
     )
 
     public_id = UploadImage.generate_name_avatar(current_user.email)
-    r = UploadImage.upload(file.file, public_id)
+    try:
+        r = await UploadImage.upload(file.file, public_id)
+    except IntegrationUnavailable as e:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e))
     src_url = UploadImage.get_url_for_avatar(public_id, r)
     user = await user_repository.update_avatar(email=current_user.email, src_url=src_url, db=db)
     return user
@@ -1,6 +1,6 @@
 from typing import Optional
 
-from pydantic import BaseModel, validator, EmailStr, Field
+from pydantic import BaseModel, validator, root_validator, EmailStr, Field
 from datetime import datetime, date
 
 
@@ -38,3 +38,79 @@ class ContactResponse(ContactBase):
 
     class Config:
         orm_mode = True
+
+
+CONTACT_FIELDS = ("id", "first_name", "last_name", "email", "phone", "b_day", "rest_data")
+
+CONTACT_SORT_KEYS = ("id", "last_name", "first_name", "b_day")
+# Фільтри, що звужують вибірку індексом, і ключі сортування, з якими кожен з них обслуговує один індекс.
+# Без таких фільтрів доступні всі ключі сортування (індекси (user_id, ключ, id)); has_notes поєднується з будь-чим.
+CONTACT_FILTER_SORTS = {
+    "name_prefix": ("id",),
+    "b_day": ("b_day",),
+    "email_domain": ("id",),
+}
+
+
+class ContactListFilters(BaseModel):
+    """
+    Фільтри, сортування і курсор пагінації списку контактів.
+
+    `after` - ключ (значення ключа сортування, id) останнього контакту попередньої сторінки.
+    """
+    name_prefix: Optional[str] = None
+    b_day_from: Optional[date] = None
+    b_day_to: Optional[date] = None
+    email_domain: Optional[str] = None
+    has_notes: Optional[bool] = None
+    sort: str = "id"
+    descending: bool = False
+    after: Optional[tuple] = None
+
+    class Config:
+        frozen = True
+
+    @root_validator(skip_on_failure=True)
+    def validate_combination(cls, values):
+        if values["sort"] not in CONTACT_SORT_KEYS:
+            raise ValueError(f"Unknown sort key '{values['sort']}'. Allowed: {', '.join(CONTACT_SORT_KEYS)}")
+        used = [name for name, present in (("name_prefix", values["name_prefix"]),
+                                           ("b_day", values["b_day_from"] or values["b_day_to"]),
+                                           ("email_domain", values["email_domain"])) if present]
+        if len(used) > 1:
+            raise ValueError(f"Filters {', '.join(used)} cannot be combined")
+        if used and values["sort"] not in CONTACT_FILTER_SORTS[used[0]]:
+            raise ValueError(f"Filter {used[0]} supports sort keys: {', '.join(CONTACT_FILTER_SORTS[used[0]])}")
+        return values
+
+
+class ContactPartialResponse(BaseModel):
+    id: int
+    first_name: Optional[str]
+    last_name: Optional[str]
+    email: Optional[EmailStr]
+    phone: Optional[str]
+    b_day: Optional[date]
+    rest_data: Optional[str]
+
+    class Config:
+        orm_mode = True
+
+
+class ContactAutocompleteResponse(BaseModel):
+    id: int
+    first_name: str
+    last_name: str
+    email: str
+
+
+class ContactChangesResponse(BaseModel):
+    changed: list[ContactResponse]
+    deleted: list[int]
+    next_since: str
+    has_more: bool
+
+
+class BirthdayFeedTokenResponse(BaseModel):
+    feed_url: str
+    token: str
@@ -1,5 +1,5 @@
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Tuple
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
@@ -7,9 +7,30 @@ from jose import jwt, JWTError
 from passlib.context import CryptContext
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.DB.db import get_db
+from src.DB.db import get_db, release_connection
 from src.repository import users_repo as user_repository
 from src.conf.config import settings
+from src.services.tracing import traced
+
+
+def create_password_context(scheme: str = "bcrypt", bcrypt_rounds: int = 12) -> CryptContext:
+    """
+    Створити контекст хешування паролів за політикою з налаштувань.
+
+    Кількість раундів bcrypt фіксується (min_rounds = max_rounds), тому після зміни bcrypt_rounds
+    needs_update() повертає True для всіх хешів з іншою кількістю раундів, а інші схеми, крім обраної,
+    вважаються застарілими. Схема argon2 потребує пакета argon2-cffi.
+
+    Args:
+        scheme (str): Схема для нових хешів: bcrypt або argon2.
+        bcrypt_rounds (int): Кількість раундів bcrypt (логарифм вартості).
+
+    Returns:
+        CryptContext: Контекст хешування паролів.
+    """
+    schemes = [scheme] if scheme == "bcrypt" else [scheme, "bcrypt"]
+    return CryptContext(schemes=schemes, deprecated="auto", bcrypt__rounds=bcrypt_rounds,
+                        bcrypt__min_rounds=bcrypt_rounds, bcrypt__max_rounds=bcrypt_rounds)
 
 
 class Auth:
@@ -18,12 +39,12 @@ class Auth:
     аутентифікації, а також для отримання аутентифікованого користувача.
 
     Attributes:
-        pwd_cxt (CryptContext): Об'єкт для хешування паролів за допомогою bcrypt.
+        pwd_cxt (CryptContext): Об'єкт для хешування паролів (схема і вартість - з налаштувань).
         SECRET_KEY (str): Секретний ключ для підпису JWT.
         ALGR (str): Алгоритм підпису JWT.
         oauth2_scheme (OAuth2PasswordBearer): Об'єкт для отримання токену з HTTP-запиту.
     """
-    pwd_cxt = CryptContext(schemes=["bcrypt"], deprecated="auto")
+    pwd_cxt = create_password_context(settings.password_hash_scheme, settings.bcrypt_rounds)
     SECRET_KEY = settings.secret_key
     ALGR = settings.algorithm
     oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
@@ -53,6 +74,24 @@ class Auth:
         """
         return self.pwd_cxt.verify(password, hashed_password)
 
+    def check_password_and_rehash(self, hashed_password: str, password: str) -> Tuple[bool, Optional[str]]:
+        """
+        Перевіряє пароль і, якщо збережений хеш не відповідає поточній політиці хешування
+        (needs_update: інша схема або кількість раундів bcrypt), створює новий хеш того самого пароля.
+
+        Args:
+            hashed_password (str): Збережений хеш пароля.
+            password (str): Пароль у відкритому вигляді для перевірки.
+
+        Returns:
+            Tuple[bool, Optional[str]]: Чи правильний пароль і новий хеш, який потрібно зберегти, або None.
+        """
+        if not self.pwd_cxt.verify(password, hashed_password):
+            return False, None
+        if self.pwd_cxt.needs_update(hashed_password):
+            return True, self.pwd_cxt.hash(password)
+        return True, None
+
     async def create_access_token(self, data: dict, expires_delta: Optional[float] = None):
         """
         Створює токен доступу.
@@ -97,6 +136,26 @@ class Auth:
         refresh_token = jwt.encode(to_encode, key=self.SECRET_KEY, algorithm=self.ALGR)
         return refresh_token
 
+    @traced("auth.decode_token")
+    def decode_access_token(self, token: str) -> Optional[str]:
+        """
+        Перевірити токен доступу.
+
+        Args:
+            token (str): Токен доступу.
+
+        Returns:
+            Optional[str]: Електронна пошта користувача або None, якщо токен недійсний.
+        """
+        try:
+            payload = jwt.decode(token, key=self.SECRET_KEY, algorithms=[self.ALGR])
+        except JWTError:
+            return None
+        if payload.get("scope") != "access_token":
+            return None
+        return payload.get("sub")
+
+    @traced("auth.get_current_user")
     async def get_current_user(self, token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)):
         """
         Отримати поточного автентифікованого користувача за допомогою токена доступу.
@@ -117,17 +176,13 @@ class Auth:
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-        try:
-            payload = jwt.decode(token, key=self.SECRET_KEY, algorithms=[self.ALGR])
-            if payload.get("scope") != "access_token":
-                raise credentials_exception
-            email = payload.get("sub")
-            if email is None:
-                raise credentials_exception
-        except JWTError:
+        email = self.decode_access_token(token)
+        if email is None:
             raise credentials_exception
 
         user = await user_repository.repo_user_authentication_by_email(email, db)
+        # З'єднання не утримується між автентифікацією та першим запитом обробника
+        await release_connection(db)
         if user is None:
             raise credentials_exception
 
@@ -0,0 +1,101 @@
+from collections import OrderedDict
+from typing import Optional
+
+from src.conf.config import settings
+
+
+class ContactTrie:
+    """
+    Префіксне дерево контактів одного користувача за ім'ям, прізвищем та електронною поштою (у нижньому регістрі).
+
+    У кожному вузлі зберігаються ідентифікатори контактів, у яких одне з полів починається з префікса цього вузла,
+    у порядку зростання ідентифікатора, тому пошук за префіксом - це прохід по символах префікса і зріз списку.
+
+    Attributes:
+        contacts (dict[int, dict]): Контакти за ідентифікаторами (id, first_name, last_name, email).
+    """
+
+    def __init__(self, contacts: list[dict]):
+        self.contacts = {}
+        self._root: dict = {}
+        for contact in sorted(contacts, key=lambda c: c["id"]):
+            self.contacts[contact["id"]] = contact
+            for term in (contact["first_name"], contact["last_name"], contact["email"]):
+                self._insert(term.lower(), contact["id"])
+
+    def _insert(self, term: str, contact_id: int):
+        node = self._root
+        for char in term:
+            node = node.setdefault(char, {})
+            ids = node.setdefault("", [])
+            # Поля одного контакту вставляються поспіль, тож повтор можливий лише в кінці списку
+            if not ids or ids[-1] != contact_id:
+                ids.append(contact_id)
+
+    def search(self, prefix: str, limit: int) -> list[dict]:
+        """
+        Знайти контакти, у яких ім'я, прізвище або електронна пошта починаються з `prefix`.
+        """
+        node = self._root
+        for char in prefix.lower():
+            node = node.get(char)
+            if node is None:
+                return []
+        return [self.contacts[contact_id] for contact_id in node.get("", ())[:limit]]
+
+
+class AutocompleteCache:
+    """
+    Кеш префіксних дерев контактів у пам'яті процесу для `max_users` користувачів, що звертались останніми.
+
+    Дерево зберігається разом з версією контактів (лічильник contact_version_counters), прочитаною до завантаження
+    контактів, і повертається лише для тієї ж поточної версії. Так зміни, внесені через інші воркери, не лишають
+    застарілих дерев. Функції запису репозиторію контактів додатково викликають invalidate(), щоб одразу звільнити
+    пам'ять цього процесу.
+
+    Attributes:
+        max_users (int): Максимальна кількість користувачів у кеші.
+        stats (dict): Лічильники hits, misses та invalidations.
+    """
+
+    def __init__(self, max_users: int = 1000):
+        self.max_users = max_users
+        self._tries: OrderedDict[int, tuple[int, ContactTrie]] = OrderedDict()
+        self.stats = {"hits": 0, "misses": 0, "invalidations": 0}
+
+    def get(self, user_id: int, version: int) -> Optional[ContactTrie]:
+        """
+        Повернути дерево користувача, побудоване для поточної версії контактів `version`.
+        """
+        entry = self._tries.get(user_id)
+        if entry is None or entry[0] != version:
+            if entry is not None and entry[0] < version:
+                del self._tries[user_id]
+                self.stats["invalidations"] += 1
+            self.stats["misses"] += 1
+            return None
+        self._tries.move_to_end(user_id)
+        self.stats["hits"] += 1
+        return entry[1]
+
+    def put(self, user_id: int, trie: ContactTrie, version: int):
+        """
+        Зберегти дерево, побудоване з контактів версії `version`, якщо в кеші немає дерева новішої версії.
+        """
+        current = self._tries.get(user_id)
+        if current is not None and current[0] > version:
+            return
+        self._tries[user_id] = (version, trie)
+        self._tries.move_to_end(user_id)
+        while len(self._tries) > self.max_users:
+            self._tries.popitem(last=False)
+
+    def invalidate(self, user_id: int):
+        if self._tries.pop(user_id, None) is not None:
+            self.stats["invalidations"] += 1
+
+    def clear(self):
+        self._tries.clear()
+
+
+autocomplete_cache = AutocompleteCache(settings.autocomplete_cache_users)
@@ -3,6 +3,16 @@ import hashlib
 import cloudinary
 import cloudinary.uploader
 from src.conf.config import settings
+from src.services.resilience import Integration
+from src.services.tracing import traced
+
+cloudinary_integration = Integration(
+    "cloudinary",
+    timeout=settings.cloudinary_timeout,
+    max_concurrency=settings.cloudinary_max_concurrency,
+    failure_threshold=settings.circuit_breaker_failure_threshold,
+    reset_timeout=settings.circuit_breaker_reset_timeout,
+)
 
 
 class UploadImage:
@@ -19,8 +29,16 @@ class UploadImage:
         return f"FastAPI-RESTapi app/{name}"
 
     @staticmethod
-    def upload(file, public_id: str):
-        r = cloudinary.uploader.upload(file, public_id=public_id, overwrite=True)
+    @traced("avatar.upload")
+    async def upload(file, public_id: str):
+        """
+        Завантажити зображення в Cloudinary через шар стійкості cloudinary_integration.
+
+        Raises:
+            IntegrationUnavailable: Якщо Cloudinary недоступний або не відповів вчасно.
+        """
+        r = await cloudinary_integration.call(cloudinary.uploader.upload, file, public_id=public_id, overwrite=True,
+                                              timeout=settings.cloudinary_timeout)
         return r
 
     @staticmethod
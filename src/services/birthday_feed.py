@@ -0,0 +1,314 @@
+import datetime
+import hashlib
+import secrets
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import AsyncIterator, Iterable, Optional
+
+from fastapi import Depends, HTTPException, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.DB.db import get_db, release_connection
+from src.DB.models import User
+from src.conf.config import settings
+from src.repository.contacts_repo import repo_get_contact_changes, repo_get_contacts_count, \
+    repo_stream_birthday_contacts
+from src.repository.users_repo import repo_get_user_by_feed_token
+
+UID_DOMAIN = "contacts-api"
+CALENDAR_HEADER = (
+    "BEGIN:VCALENDAR\r\n"
+    "VERSION:2.0\r\n"
+    "PRODID:-//contacts-api//birthdays//EN\r\n"
+    "CALSCALE:GREGORIAN\r\n"
+    "METHOD:PUBLISH\r\n"
+    "X-WR-CALNAME:Birthdays\r\n"
+)
+CALENDAR_FOOTER = "END:VCALENDAR\r\n"
+CHANGES_PAGE_SIZE = 1000
+EVENTS_PER_CHUNK = 500
+
+
+def new_feed_token() -> str:
+    return secrets.token_urlsafe(32)
+
+
+def hash_feed_token(token: str) -> str:
+    """
+    Хеш токена стрічки, що зберігається в базі даних (users.feed_token).
+    """
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def escape_text(value: str) -> str:
+    """
+    Екранувати значення типу TEXT за RFC 5545 (розділ 3.3.11).
+    """
+    return (value.replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,")
+            .replace("\r\n", "\\n").replace("\n", "\\n").replace("\r", "\\n"))
+
+
+def fold_line(line: str) -> str:
+    """
+    Розбити рядок контенту на рядки не довші за 75 октетів (RFC 5545, розділ 3.1), не розрізаючи символи UTF-8.
+    """
+    if len(line.encode()) <= 75:
+        return line + "\r\n"
+    parts = []
+    current, size, limit = [], 0, 75
+    for char in line:
+        char_size = len(char.encode())
+        if size + char_size > limit:
+            parts.append("".join(current))
+            # Рядок продовження починається з пробілу, який теж займає октет
+            current, size, limit = [], 0, 74
+        current.append(char)
+        size += char_size
+    parts.append("".join(current))
+    return "\r\n ".join(parts) + "\r\n"
+
+
+def render_event(contact) -> str:
+    """
+    Подія VEVENT дня народження контакту, що повторюється щороку.
+
+    Дні народження 29 лютого припадають на останній день лютого, щоб подія була і в невисокосні роки.
+
+    Args:
+        contact: Контакт або рядок з полями id, first_name, last_name, b_day, updated_at.
+
+    Returns:
+        str: Рядки події, завершені CRLF.
+    """
+    b_day = contact.b_day
+    if (b_day.month, b_day.day) == (2, 29):
+        rrule = "RRULE:FREQ=YEARLY;BYMONTH=2;BYMONTHDAY=-1"
+    else:
+        rrule = "RRULE:FREQ=YEARLY"
+    lines = (
+        "BEGIN:VEVENT",
+        f"UID:contact-{contact.id}-birthday@{UID_DOMAIN}",
+        f"DTSTAMP:{contact.updated_at:%Y%m%dT%H%M%SZ}",
+        f"DTSTART;VALUE=DATE:{b_day:%Y%m%d}",
+        rrule,
+        f"SUMMARY:{escape_text(f'Birthday: {contact.first_name} {contact.last_name}')}",
+        "TRANSP:TRANSPARENT",
+        "END:VEVENT",
+    )
+    return "".join(fold_line(line) for line in lines)
+
+
+def iter_calendar(events: Iterable[str]) -> Iterable[str]:
+    """
+    Календар з готових подій частинами по EVENTS_PER_CHUNK подій.
+    """
+    yield CALENDAR_HEADER
+    chunk = []
+    for event in events:
+        chunk.append(event)
+        if len(chunk) == EVENTS_PER_CHUNK:
+            yield "".join(chunk)
+            chunk = []
+    yield "".join(chunk) + CALENDAR_FOOTER
+
+
+async def stream_calendar(user: User, db: AsyncSession) -> AsyncIterator[str]:
+    """
+    Календар, що генерується під час відправлення відповіді прямо з курсора бази даних, без кешування.
+    """
+    yield CALENDAR_HEADER
+    chunk = []
+    async for row in repo_stream_birthday_contacts(user, db):
+        chunk.append(render_event(row))
+        if len(chunk) == EVENTS_PER_CHUNK:
+            yield "".join(chunk)
+            chunk = []
+    yield "".join(chunk) + CALENDAR_FOOTER
+
+
+def feed_etag(user_id: int, version: int) -> str:
+    return f'"bday-{user_id}-{version}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    return "*" in candidates or etag in [candidate.removeprefix("W/") for candidate in candidates]
+
+
+def http_date(value: datetime.datetime) -> str:
+    return format_datetime(value.replace(tzinfo=datetime.timezone.utc, microsecond=0), usegmt=True)
+
+
+def not_modified_since(if_modified_since: Optional[str], last_modified: Optional[datetime.datetime]) -> bool:
+    if not if_modified_since or last_modified is None:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        return False
+    return last_modified.replace(tzinfo=datetime.timezone.utc, microsecond=0) <= since
+
+
+@dataclass
+class FeedEntry:
+    """
+    Згенеровані події стрічки одного користувача.
+
+    Attributes:
+        version (int): Версія контактів, до якої застосовано всі зміни.
+        events (dict[int, str]): Події VEVENT за ідентифікаторами контактів.
+        last_modified (Optional[datetime]): Найпізніший час зміни контактів у стрічці (UTC).
+        synced_at (datetime): Коли запис востаннє синхронізувався з базою даних.
+    """
+    version: int
+    events: dict[int, str] = field(default_factory=dict)
+    last_modified: Optional[datetime.datetime] = None
+    synced_at: datetime.datetime = field(default_factory=datetime.datetime.utcnow)
+
+    def touch(self, updated_at: datetime.datetime):
+        if self.last_modified is None or updated_at > self.last_modified:
+            self.last_modified = updated_at
+
+    def apply(self, changes: list) -> None:
+        """
+        Застосувати зміни з repo_get_contact_changes(): оновити події змінених контактів і прибрати видалені.
+
+        Зміни з версією, не більшою за вже застосовану, пропускаються, тому одночасні синхронізації
+        не повертають стрічку до старіших даних.
+        """
+        for contact in changes:
+            if contact.version <= self.version:
+                continue
+            if contact.deleted_at is None:
+                self.events[contact.id] = render_event(contact)
+            else:
+                self.events.pop(contact.id, None)
+            self.version = contact.version
+            self.touch(contact.updated_at)
+
+
+class BirthdayFeedCache:
+    """
+    Кеш стрічок днів народження у пам'яті процесу для `max_users` користувачів, що звертались останніми.
+
+    Стрічка не генерується заново при кожній зміні: запис доповнюється змінами з repo_get_contact_changes()
+    після збереженої версії. Повністю стрічка будується лише для нового запису, а також коли запис не
+    синхронізувався довше, ніж зберігаються надгробки видалених контактів, або ідентифікатори контактів
+    змінились після синхронізації (`users.contacts_resync_at`).
+    Книги, більші за `max_contacts`, не кешуються і віддаються потоком прямо з бази даних.
+
+    Attributes:
+        max_users (int): Максимальна кількість користувачів у кеші.
+        max_contacts (int): Максимальна кількість контактів у стрічці, що кешується.
+        stats (dict): Лічильники hits, incremental, rebuilds та uncached.
+    """
+
+    def __init__(self, max_users: int = 200, max_contacts: int = 20000):
+        self.max_users = max_users
+        self.max_contacts = max_contacts
+        self._entries: OrderedDict[int, FeedEntry] = OrderedDict()
+        self.stats = {"hits": 0, "incremental": 0, "rebuilds": 0, "uncached": 0}
+
+    def get(self, user_id: int) -> Optional[FeedEntry]:
+        entry = self._entries.get(user_id)
+        if entry is not None:
+            self._entries.move_to_end(user_id)
+        return entry
+
+    def put(self, user_id: int, entry: FeedEntry):
+        current = self._entries.get(user_id)
+        if current is not None and current.version > entry.version:
+            return
+        self._entries[user_id] = entry
+        self._entries.move_to_end(user_id)
+        while len(self._entries) > self.max_users:
+            self._entries.popitem(last=False)
+
+    def discard(self, user_id: int):
+        self._entries.pop(user_id, None)
+
+    def clear(self):
+        self._entries.clear()
+
+    async def load(self, user: User, version: int, db: AsyncSession) -> Optional[FeedEntry]:
+        """
+        Отримати актуальну стрічку користувача з кешу, доповнивши її змінами після збереженої версії.
+
+        Args:
+            user (User): Власник стрічки.
+            version (int): Поточна версія контактів користувача (repo_get_contacts_version()).
+            db (AsyncSession): Сесія бази даних шарда користувача.
+
+        Returns:
+            Optional[FeedEntry]: Стрічка або None, якщо книга контактів завелика для кешування.
+        """
+        entry = self.get(user.id)
+        retention = datetime.timedelta(days=settings.contacts_tombstone_retention_days)
+        if entry is not None and datetime.datetime.utcnow() - entry.synced_at >= retention:
+            # Надгробки видалених відтоді контактів могли бути вже остаточно видалені
+            entry = None
+        if entry is not None and user.contacts_resync_at is not None and entry.synced_at < user.contacts_resync_at:
+            # Після перенесення між шардами частина контактів має нові ідентифікатори
+            entry = None
+        if entry is None:
+            return await self._rebuild(user, version, db)
+
+        if entry.version >= version:
+            self.stats["hits"] += 1
+        else:
+            self.stats["incremental"] += 1
+            synced_at = datetime.datetime.utcnow()
+            while entry.version < version:
+                changes = await repo_get_contact_changes(user=user, since=entry.version, limit=CHANGES_PAGE_SIZE,
+                                                         db=db)
+                entry.apply(changes)
+                if len(changes) < CHANGES_PAGE_SIZE:
+                    # Остання версія могла належати надгробку, що вже остаточно видалений
+                    entry.version = max(entry.version, version)
+                    break
+            if len(entry.events) > self.max_contacts:
+                self.discard(user.id)
+                self.stats["uncached"] += 1
+                return None
+            entry.synced_at = synced_at
+        return entry
+
+    async def _rebuild(self, user: User, version: int, db: AsyncSession) -> Optional[FeedEntry]:
+        if await repo_get_contacts_count(user, db) > self.max_contacts:
+            self.discard(user.id)
+            self.stats["uncached"] += 1
+            return None
+        self.stats["rebuilds"] += 1
+        # Версію прочитано до контактів: зміни, що відбулись під час читання, буде застосовано повторно
+        entry = FeedEntry(version=version)
+        async for row in repo_stream_birthday_contacts(user, db):
+            entry.events[row.id] = render_event(row)
+            entry.touch(row.updated_at)
+        self.put(user.id, entry)
+        return entry
+
+
+birthday_feed_cache = BirthdayFeedCache(settings.birthday_feed_cache_users, settings.birthday_feed_cache_max_contacts)
+
+
+async def get_feed_user(token: str = Query(..., description="Feed token from POST /contacts/birthdays/feed-token"),
+                        db: AsyncSession = Depends(get_db)) -> User:
+    """
+    Отримати власника стрічки днів народження за токеном з URL.
+
+    Календарні застосунки не передають заголовок Authorization, тому стрічка автентифікується окремим
+    токеном, який користувач може відкликати або замінити.
+
+    Raises:
+        HTTPException(401): Якщо токен не видано або його відкликано.
+    """
+    user = await repo_get_user_by_feed_token(hash_feed_token(token), db)
+    await release_connection(db)
+    if user is None:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid feed token")
+    return user
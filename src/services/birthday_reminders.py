@@ -0,0 +1,158 @@
+import datetime
+import json
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Awaitable, Callable, Optional
+
+from src.DB.db import async_session
+from src.DB.shards import ShardMap, DEFAULT_SHARD, shard_map
+from src.conf.config import settings
+from src.repository.contacts_repo import repo_get_reminder_users, repo_get_upcoming_birthdays_for_users
+from src.services.email import send_birthday_digests
+
+
+@dataclass
+class BirthdayDigest:
+    """
+    Дайджест найближчих днів народження для одного користувача.
+
+    Attributes:
+        user_id (int): Ідентифікатор користувача.
+        email (str): Електронна пошта, на яку надсилається дайджест.
+        username (str): Ім'я користувача для звернення в листі.
+        contacts (list[dict]): Контакти з днями народження, впорядковані за найближчою датою.
+    """
+    user_id: int
+    email: str
+    username: str
+    contacts: list[dict] = field(default_factory=list)
+
+
+class ReminderCheckpoint:
+    """
+    Контрольна точка розсилки, що зберігається у JSON-файлі.
+
+    Після кожного надісланого пакета записується ідентифікатор останнього обробленого користувача,
+    тому перерваний запуск того ж дня продовжується з місця зупинки, а не з початку.
+    """
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+
+    def load(self, today: datetime.date) -> int:
+        """
+        Повертає ідентифікатор останнього обробленого сьогодні користувача або 0.
+        """
+        try:
+            data = json.loads(self.path.read_text())
+        except (FileNotFoundError, ValueError):
+            return 0
+        if data.get("date") != today.isoformat():
+            return 0
+        return int(data.get("last_user_id", 0))
+
+    def save(self, today: datetime.date, last_user_id: int):
+        """
+        Зберігає ідентифікатор останнього обробленого користувача для дати `today`.
+        """
+        self.path.write_text(json.dumps({"date": today.isoformat(), "last_user_id": last_user_id}))
+
+
+class BirthdayReminderJob:
+    """
+    Щоденна розсилка дайджестів найближчих днів народження всім користувачам.
+
+    Користувачі вибираються з основної бази даних сторінками по `batch_size` за ключем user_id. Для кожної
+    сторінки з кожного шарда одним запитом вибираються контакти його користувачів з днями народження у вікні,
+    сесії закриваються, і лише потім дайджести сторінки передаються поштовому сервісу одним пакетом.
+
+    Attributes:
+        session_factory: Фабрика асинхронних сесій основної бази даних.
+        sender: Корутина, яка надсилає пакет дайджестів.
+        batch_size (int): Кількість користувачів на сторінці і, відповідно, максимум дайджестів в одному пакеті.
+        checkpoint (ReminderCheckpoint): Контрольна точка для відновлення перерваного запуску.
+        days (int): Довжина вікна в днях.
+        shards (ShardMap): Карта шардів, з яких читаються контакти користувачів.
+    """
+
+    def __init__(self,
+                 session_factory=async_session,
+                 sender: Callable[[list[BirthdayDigest]], Awaitable] = send_birthday_digests,
+                 batch_size: int = settings.birthday_reminder_batch_size,
+                 checkpoint_path: str = settings.birthday_reminder_checkpoint,
+                 days: int = 7,
+                 shards: Optional[ShardMap] = None):
+        self.session_factory = session_factory
+        self.shards = shards or shard_map
+        self.sender = sender
+        self.batch_size = batch_size
+        self.checkpoint = ReminderCheckpoint(checkpoint_path)
+        self.days = days
+
+    async def run(self, today: Optional[datetime.date] = None) -> dict:
+        """
+        Виконати розсилку за вказану дату.
+
+        Args:
+            today (date, optional): Дата запуску. За замовчуванням - поточна дата.
+
+        Returns:
+            dict: Звіт із кількістю оброблених контактів, користувачів, пакетів та часом виконання.
+        """
+        today = today or datetime.date.today()
+        started = time.perf_counter()
+        last_user_id = self.checkpoint.load(today)
+        report = {"date": today.isoformat(), "resumed_after_user_id": last_user_id,
+                  "contacts": 0, "users": 0, "batches": 0}
+
+        while True:
+            # Сесія закривається до надсилання пошти: під час звернення до SMTP з'єднання з базою не утримується
+            async with self.session_factory() as db:
+                users = await repo_get_reminder_users(db, last_user_id, self.batch_size)
+                if not users:
+                    break
+
+            # Користувачі лишаються в основній базі, а їхні контакти читаються з шарда кожного користувача
+            user_ids_by_shard: dict[str, list[int]] = {}
+            for user in users:
+                user_ids_by_shard.setdefault(user.shard or DEFAULT_SHARD, []).append(user.id)
+            rows = []
+            for shard, user_ids in user_ids_by_shard.items():
+                async with self._contacts_session(shard) as db:
+                    rows += await repo_get_upcoming_birthdays_for_users(db, user_ids, today, self.days)
+
+            digests = {user.id: BirthdayDigest(user_id=user.id, email=user.email, username=user.username)
+                       for user in users}
+            for row in rows:
+                digests[row.user_id].contacts.append({"first_name": row.first_name, "last_name": row.last_name,
+                                                      "email": row.email, "b_day": row.b_day})
+            report["contacts"] += len(rows)
+            last_user_id = users[-1].id
+            await self._flush([digest for digest in digests.values() if digest.contacts], today, report,
+                              last_user_id)
+
+        report["seconds"] = round(time.perf_counter() - started, 3)
+        return report
+
+    def _contacts_session(self, shard: str):
+        if shard == DEFAULT_SHARD:
+            return self.session_factory()
+        return self.shards.session(shard)
+
+    async def _flush(self, batch: list[BirthdayDigest], today: datetime.date, report: dict, last_user_id: int):
+        if batch:
+            for digest in batch:
+                digest.contacts.sort(key=lambda c: self._days_until(c["b_day"], today))
+            await self.sender(batch)
+            report["users"] += len(batch)
+            report["batches"] += 1
+        self.checkpoint.save(today, last_user_id)
+
+    def _days_until(self, b_day: datetime.date, today: datetime.date) -> int:
+        for shift in range(self.days + 1):
+            day = today + datetime.timedelta(days=shift)
+            if (day.month, day.day) == (b_day.month, b_day.day):
+                return shift
+        # 29 лютого у невисокосний рік святкується 28 лютого
+        return self.days
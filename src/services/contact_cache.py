@@ -0,0 +1,271 @@
+import datetime
+import functools
+import hashlib
+import inspect
+import json
+import logging
+import time
+from collections import OrderedDict, namedtuple
+from typing import Any, Callable, Optional
+
+import redis.asyncio as redis
+
+from src.DB.models import Contact
+from src.conf.config import settings
+from src.services.tracing import current_span
+
+logger = logging.getLogger(__name__)
+
+_CONTACT_COLUMNS = frozenset(Contact.__mapper__.column_attrs.keys())
+
+
+def _encode_value(value):
+    if isinstance(value, datetime.datetime):
+        return {"$datetime": value.isoformat()}
+    if isinstance(value, datetime.date):
+        return {"$date": value.isoformat()}
+    raise TypeError(f"Object of type {type(value).__name__} is not cacheable")
+
+
+def _decode_value(value: dict):
+    if len(value) == 1:
+        if "$datetime" in value:
+            return datetime.datetime.fromisoformat(value["$datetime"])
+        if "$date" in value:
+            return datetime.date.fromisoformat(value["$date"])
+    return value
+
+
+def _contact_attributes(contact: Contact) -> dict:
+    # Лише завантажені колонки: для load_only(...) решта атрибутів лишається невстановленою
+    return {key: value for key, value in contact.__dict__.items() if key in _CONTACT_COLUMNS}
+
+
+@functools.lru_cache(maxsize=64)
+def _row_type(fields: tuple[str, ...]):
+    return namedtuple("ContactRow", fields)
+
+
+def encode_result(result) -> Optional[str]:
+    """
+    Серіалізувати результат функції читання контактів для кешу.
+
+    Підтримуються контакт, список контактів (зокрема частково завантажених через load_only) і список рядків
+    Core-запиту. Для інших значень повертається None - такі результати не кешуються.
+    """
+    if isinstance(result, Contact):
+        payload = {"kind": "contact", "value": _contact_attributes(result)}
+    elif isinstance(result, list) and all(isinstance(item, Contact) for item in result):
+        payload = {"kind": "contacts", "value": [_contact_attributes(contact) for contact in result]}
+    elif isinstance(result, list) and all(hasattr(item, "_fields") for item in result):
+        payload = {"kind": "rows", "fields": list(result[0]._fields), "value": [list(row) for row in result]}
+    else:
+        return None
+    return json.dumps(payload, default=_encode_value, separators=(",", ":"))
+
+
+def decode_result(raw) -> Any:
+    """
+    Відновити результат, збережений encode_result().
+
+    Контакти відновлюються як об'єкти Contact поза сесією, рядки - як іменовані кортежі з тими самими полями.
+    """
+    payload = json.loads(raw, object_hook=_decode_value)
+    if payload["kind"] == "contact":
+        return Contact(**payload["value"])
+    if payload["kind"] == "contacts":
+        return [Contact(**attributes) for attributes in payload["value"]]
+    row_type = _row_type(tuple(payload["fields"]))
+    return [row_type(*values) for values in payload["value"]]
+
+
+class InMemoryCacheBackend:
+    """
+    Сховище кешу в пам'яті процесу з тими ж операціями, що й у Redis. Для тестів і локального запуску.
+    """
+
+    def __init__(self, max_entries: int = 10000, clock: Callable[[], float] = time.monotonic):
+        self.max_entries = max_entries
+        self.clock = clock
+        self._values: OrderedDict[str, tuple[Optional[float], str]] = OrderedDict()
+
+    def _alive(self, key: str) -> Optional[str]:
+        entry = self._values.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at is not None and expires_at <= self.clock():
+            del self._values[key]
+            return None
+        return value
+
+    async def get(self, key: str) -> Optional[str]:
+        return self._alive(key)
+
+    async def set(self, key: str, value: str, ttl: Optional[float] = None, nx: bool = False) -> bool:
+        if nx and self._alive(key) is not None:
+            return False
+        self._values.pop(key, None)
+        self._values[key] = (self.clock() + ttl if ttl is not None else None, value)
+        while len(self._values) > self.max_entries:
+            self._values.popitem(last=False)
+        return True
+
+    async def incr(self, key: str, initial: int) -> int:
+        value = int(self._alive(key) or initial) + 1
+        await self.set(key, str(value))
+        return value
+
+
+class RedisCacheBackend:
+    """
+    Сховище кешу в Redis, спільне для всіх воркерів і перезапусків.
+    """
+
+    def __init__(self, client: redis.Redis):
+        self.client = client
+
+    async def get(self, key: str) -> Optional[str]:
+        return await self.client.get(key)
+
+    async def set(self, key: str, value: str, ttl: Optional[float] = None, nx: bool = False) -> bool:
+        return bool(await self.client.set(key, value, px=int(ttl * 1000) if ttl is not None else None, nx=nx))
+
+    async def incr(self, key: str, initial: int) -> int:
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.set(key, initial, nx=True)
+            pipe.incr(key)
+            _, value = await pipe.execute()
+        return value
+
+
+class ContactCache:
+    """
+    Кеш результатів читання контактів з простором імен для кожного користувача.
+
+    Ключ запису містить номер покоління користувача. Запис контактів збільшує покоління (див. bump()),
+    тож усі сторінки користувача стають недосяжними одразу, без пошуку і видалення ключів; старі записи
+    прибирає TTL. Покоління читається до запиту в базу даних, тому результат читання, що почалося до
+    запису, зберігається під старим поколінням і не повертається після запису.
+
+    Ключі поколінь не мають TTL: у Redis слід використовувати політику витіснення volatile-*, щоб вони
+    не витіснялися. Відсутнє покоління ініціалізується часом у мілісекундах, а не нулем, щоб не повторити
+    номер, під яким ще можуть лежати старі записи. Помилки сховища не ламають читання: запит іде в базу даних.
+
+    Attributes:
+        backend: Сховище (RedisCacheBackend або InMemoryCacheBackend); None, якщо кеш вимкнено.
+        ttl (float): Скільки секунд зберігається сторінка.
+        prefix (str): Префікс ключів з версією формату записів.
+        stats (dict): Лічильники hits, misses, stores та errors.
+    """
+
+    def __init__(self, backend, ttl: float = 300, prefix: str = "contacts:v1:"):
+        self.backend = backend
+        self.ttl = ttl
+        self.prefix = prefix
+        self.stats = {"hits": 0, "misses": 0, "stores": 0, "errors": 0}
+
+    def _generation_key(self, user_id: int) -> str:
+        return f"{self.prefix}{user_id}:generation"
+
+    async def generation(self, user_id: int) -> int:
+        key = self._generation_key(user_id)
+        value = await self.backend.get(key)
+        if value is None:
+            await self.backend.set(key, str(time.time_ns() // 1_000_000), nx=True)
+            value = await self.backend.get(key)
+        return int(value)
+
+    async def bump(self, user_id: int):
+        """
+        Збільшити покоління користувача після зміни його контактів. Нічого не робить, якщо кеш вимкнено.
+        """
+        if not settings.contacts_cache_enabled or self.backend is None:
+            return
+        try:
+            await self.backend.incr(self._generation_key(user_id), time.time_ns() // 1_000_000)
+        except redis.RedisError as e:
+            self.stats["errors"] += 1
+            logger.error("Contact cache generation bump failed for user %s, pages stay cached up to %ss: %s",
+                         user_id, self.ttl, e)
+
+    async def fetch(self, user_id: int, name: str, arguments: tuple, load: Callable) -> Any:
+        """
+        Повернути результат з кешу або виконати `load` і зберегти його результат.
+
+        Args:
+            user_id (int): Власник контактів.
+            name (str): Назва функції читання.
+            arguments (tuple): Аргументи виклику, що визначають результат.
+            load (Callable): Корутинна функція без аргументів, що читає результат з бази даних.
+        """
+        try:
+            generation = await self.generation(user_id)
+            digest = hashlib.sha256(repr(arguments).encode()).hexdigest()[:32]
+            key = f"{self.prefix}{user_id}:{generation}:{name}:{digest}"
+            raw = await self.backend.get(key)
+        except redis.RedisError as e:
+            self.stats["errors"] += 1
+            logger.warning("Contact cache is unavailable: %s", e)
+            return await load()
+
+        span = current_span()
+        if span is not None:
+            span.set_attribute("cache.hit", raw is not None)
+        if raw is not None:
+            self.stats["hits"] += 1
+            return decode_result(raw)
+
+        self.stats["misses"] += 1
+        result = await load()
+        encoded = encode_result(result)
+        if encoded is not None:
+            try:
+                await self.backend.set(key, encoded, self.ttl)
+                self.stats["stores"] += 1
+            except redis.RedisError as e:
+                self.stats["errors"] += 1
+                logger.warning("Contact cache is unavailable: %s", e)
+        return result
+
+
+def create_backend():
+    if not settings.contacts_cache_enabled:
+        # Вимкнений кеш не створює клієнт Redis і не звертається до сховища (див. cached і ContactCache.bump)
+        return None
+    if settings.contacts_cache_backend == "memory":
+        return InMemoryCacheBackend(settings.contacts_cache_max_entries)
+    return RedisCacheBackend(redis.Redis(host=settings.redis_host, port=settings.redis_port, db=0,
+                                         decode_responses=True))
+
+
+contact_cache = ContactCache(create_backend(), settings.contacts_cache_ttl)
+
+
+def _argument_key(value: Any):
+    if isinstance(value, list):
+        return tuple(value)
+    return value
+
+
+def cached(func: Callable) -> Callable:
+    """
+    Декоратор функцій читання контактів, що читає результат через спільний кеш contact_cache.
+
+    Ключ складається з ідентифікатора користувача (аргумент `user`), назви функції та решти аргументів, крім
+    сесії бази даних `db`. Вимикається налаштуванням `contacts_cache_enabled`.
+    """
+    signature = inspect.signature(func)
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        if not settings.contacts_cache_enabled:
+            return await func(*args, **kwargs)
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        arguments = tuple((name, _argument_key(value)) for name, value in bound.arguments.items()
+                          if name not in ("db", "user"))
+        return await contact_cache.fetch(bound.arguments["user"].id, func.__name__, arguments,
+                                         lambda: func(*args, **kwargs))
+
+    return wrapper
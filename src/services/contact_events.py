@@ -0,0 +1,205 @@
+import asyncio
+import json
+import logging
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable, Optional
+
+import redis.asyncio as redis
+
+from src.conf.config import settings
+
+logger = logging.getLogger(__name__)
+
+OVERFLOW_EVENT = {"type": "overflow"}
+
+
+class Subscription:
+    """
+    Підписка одного з'єднання (SSE або WebSocket) на події контактів користувача.
+
+    Буфер подій обмежений `maxsize`. Якщо клієнт не встигає читати події і буфер переповнюється,
+    непрочитані події відкидаються, а замість них клієнт отримує подію "overflow" - сигнал
+    синхронізуватися через GET /contacts/changes і перепідключитися.
+    """
+
+    def __init__(self, maxsize: int):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize)
+        self.overflowed = False
+
+    def put(self, event: dict):
+        if self.overflowed:
+            return
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflowed = True
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(OVERFLOW_EVENT)
+
+    async def get(self, timeout: float) -> Optional[dict]:
+        """
+        Отримати наступну подію або None, якщо за `timeout` секунд подій не було.
+        """
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class InMemoryBackend:
+    """
+    Pub/sub у межах одного процесу. Підходить для тестів і запуску з одним воркером.
+    """
+
+    def __init__(self):
+        self._deliver: Callable[[int, dict], None] = lambda user_id, event: None
+
+    def bind(self, deliver: Callable[[int, dict], None]):
+        self._deliver = deliver
+
+    async def publish(self, user_id: int, event: dict):
+        self._deliver(user_id, event)
+
+    async def subscribe(self, user_id: int):
+        pass
+
+    async def unsubscribe(self, user_id: int):
+        pass
+
+
+class RedisBackend:
+    """
+    Pub/sub через Redis для розсилки подій між воркерами.
+
+    Кожен воркер тримає одне pub/sub-з'єднання і підписується на канал користувача лише поки
+    в цьому воркері є хоча б одне відкрите з'єднання цього користувача.
+    """
+
+    def __init__(self, client: redis.Redis, prefix: str = "contacts:events:"):
+        self.client = client
+        self.prefix = prefix
+        self._deliver: Callable[[int, dict], None] = lambda user_id, event: None
+        self._pubsub = None
+        self._reader: Optional[asyncio.Task] = None
+
+    def bind(self, deliver: Callable[[int, dict], None]):
+        self._deliver = deliver
+
+    async def publish(self, user_id: int, event: dict):
+        await self.client.publish(f"{self.prefix}{user_id}", json.dumps(event))
+
+    async def subscribe(self, user_id: int):
+        if self._pubsub is None:
+            self._pubsub = self.client.pubsub()
+        await self._pubsub.subscribe(f"{self.prefix}{user_id}")
+        if self._reader is None or self._reader.done():
+            self._reader = asyncio.create_task(self._read())
+
+    async def unsubscribe(self, user_id: int):
+        if self._pubsub is not None:
+            await self._pubsub.unsubscribe(f"{self.prefix}{user_id}")
+
+    async def _read(self):
+        while True:
+            try:
+                message = await self._pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+            except Exception as e:
+                logger.warning("Contact events reader failed: %s", e)
+                await asyncio.sleep(1.0)
+                continue
+            if message is None or message["type"] != "message":
+                continue
+            channel = message["channel"]
+            channel = channel.decode() if isinstance(channel, bytes) else channel
+            self._deliver(int(channel[len(self.prefix):]), json.loads(message["data"]))
+
+
+class ContactEventBroker:
+    """
+    Розсилка подій створення, оновлення та видалення контактів відкритим з'єднанням користувача.
+
+    Події публікуються функціями запису репозиторію контактів і передаються між воркерами через
+    підключений бекенд pub/sub (InMemoryBackend або RedisBackend).
+
+    Attributes:
+        backend: Бекенд pub/sub.
+        buffer_size (int): Розмір буфера подій для одного з'єднання.
+    """
+
+    def __init__(self, backend, buffer_size: int = 100):
+        self.backend = backend
+        self.buffer_size = buffer_size
+        self._subscribers: dict[int, set[Subscription]] = {}
+        backend.bind(self.deliver)
+
+    async def publish(self, user_id: int, event: dict):
+        """
+        Опублікувати подію. Помилки бекенда логуються і не переривають запис контакту.
+        """
+        try:
+            await self.backend.publish(user_id, event)
+        except Exception as e:
+            logger.warning("Failed to publish contact event for user %s: %s", user_id, e)
+
+    def deliver(self, user_id: int, event: dict):
+        for subscription in self._subscribers.get(user_id, ()):
+            subscription.put(event)
+
+    @asynccontextmanager
+    async def subscribe(self, user_id: int) -> AsyncIterator[Subscription]:
+        subscription = Subscription(self.buffer_size)
+        subscribers = self._subscribers.setdefault(user_id, set())
+        subscribers.add(subscription)
+        if len(subscribers) == 1:
+            await self.backend.subscribe(user_id)
+        try:
+            yield subscription
+        finally:
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._subscribers[user_id]
+                await self.backend.unsubscribe(user_id)
+
+
+def format_sse(event: dict) -> str:
+    """
+    Відформатувати подію у формат Server-Sent Events.
+    """
+    lines = []
+    if "version" in event:
+        lines.append(f"id: {event['version']}")
+    lines.append(f"event: {event['type']}")
+    lines.append(f"data: {json.dumps(event)}")
+    return "\n".join(lines) + "\n\n"
+
+
+async def sse_stream(user_id: int, broker: Optional[ContactEventBroker] = None,
+                     heartbeat: Optional[float] = None) -> AsyncIterator[str]:
+    """
+    Потік подій контактів користувача у форматі Server-Sent Events.
+
+    Якщо подій немає `heartbeat` секунд, відправляється коментар keep-alive. Потік завершується після
+    події "overflow".
+    """
+    broker = broker or contact_events
+    heartbeat = heartbeat or settings.contact_events_heartbeat
+    async with broker.subscribe(user_id) as subscription:
+        yield "retry: 3000\n\n"
+        while True:
+            event = await subscription.get(heartbeat)
+            if event is None:
+                yield ": keep-alive\n\n"
+                continue
+            yield format_sse(event)
+            if event is OVERFLOW_EVENT:
+                break
+
+
+def create_backend():
+    if settings.contact_events_backend == "redis":
+        return RedisBackend(redis.Redis(host=settings.redis_host, port=settings.redis_port, db=0))
+    return InMemoryBackend()
+
+
+contact_events = ContactEventBroker(create_backend(), settings.contact_events_buffer_size)
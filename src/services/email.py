@@ -6,6 +6,8 @@ from pydantic import EmailStr
 
 from src.services import authservice as auth_service
 from src.conf.config import settings
+from src.services.resilience import Integration, IntegrationUnavailable, CircuitOpenError
+from src.services.tracing import traced
 
 
 conf = ConnectionConfig(
@@ -22,7 +24,16 @@ conf = ConnectionConfig(
     TEMPLATE_FOLDER=Path(__file__).parent / 'templates',
 )
 
+mail_integration = Integration(
+    "smtp",
+    timeout=settings.mail_timeout,
+    max_concurrency=settings.mail_max_concurrency,
+    failure_threshold=settings.circuit_breaker_failure_threshold,
+    reset_timeout=settings.circuit_breaker_reset_timeout,
+)
+
 
+@traced()
 async def send_email(email: EmailStr, username: str, host: str):
     try:
         token_verification = auth_service.authservice.create_email_token({"sub": email})
@@ -34,11 +45,12 @@ async def send_email(email: EmailStr, username: str, host: str):
         )
 
         fm = FastMail(conf)
-        await fm.send_message(message, template_name="email_template.html")
-    except ConnectionErrors as e:
+        await mail_integration.call(fm.send_message, message, template_name="email_template.html")
+    except (ConnectionErrors, IntegrationUnavailable) as e:
         print(e)
 
 
+@traced()
 async def send_email_for_reset_pswd(email: EmailStr, username: str, reset_token: str, host: str):
     try:
 
@@ -50,7 +62,35 @@ async def send_email_for_reset_pswd(email: EmailStr, username: str, reset_token:
         )
 
         fm = FastMail(conf)
-        await fm.send_message(message, template_name="email_to_reset_password.html")
+        await mail_integration.call(fm.send_message, message, template_name="email_to_reset_password.html")
 
-    except ConnectionErrors as e:
+    except (ConnectionErrors, IntegrationUnavailable) as e:
         print(e)
+
+
+@traced()
+async def send_birthday_digests(digests: list):
+    """
+    Надіслати пакет листів-нагадувань про найближчі дні народження контактів.
+
+    Для всього пакета використовується один екземпляр FastMail. Помилка з'єднання для одного листа
+    не зупиняє відправку решти пакета. Якщо запобіжник SMTP розімкнено, відправка пакета припиняється
+    з CircuitOpenError, тож запуск не зберігає контрольну точку і наступний запуск продовжить з цього пакета.
+
+    Args:
+        digests (list[BirthdayDigest]): Дайджести користувачів, яким потрібно надіслати нагадування.
+    """
+    fm = FastMail(conf)
+    for digest in digests:
+        try:
+            message = MessageSchema(
+                subject="Upcoming birthdays",
+                recipients=[digest.email],
+                template_body={"username": digest.username, "contacts": digest.contacts},
+                subtype=MessageType.html
+            )
+            await mail_integration.call(fm.send_message, message, template_name="birthday_digest.html")
+        except CircuitOpenError:
+            raise
+        except (ConnectionErrors, IntegrationUnavailable) as e:
+            print(e)
@@ -0,0 +1,166 @@
+import base64
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+import redis.asyncio as redis
+
+from src.conf.config import settings
+
+
+@dataclass
+class StoredResponse:
+    """
+    Відповідь, збережена для повторів запиту з тим самим ключем Idempotency-Key.
+
+    Attributes:
+        status (int): Код статусу.
+        headers (list[tuple[bytes, bytes]]): Заголовки у форматі ASGI.
+        body (bytes): Тіло відповіді.
+    """
+    status: int
+    headers: list[tuple[bytes, bytes]]
+    body: bytes
+
+    def to_dict(self) -> dict:
+        return {
+            "status": self.status,
+            "headers": [[name.decode("latin-1"), value.decode("latin-1")] for name, value in self.headers],
+            "body": base64.b64encode(self.body).decode(),
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "StoredResponse":
+        return cls(
+            status=data["status"],
+            headers=[(name.encode("latin-1"), value.encode("latin-1")) for name, value in data["headers"]],
+            body=base64.b64decode(data["body"]),
+        )
+
+
+@dataclass
+class IdempotencyRecord:
+    """
+    Стан ключа: запит ще виконується (`response` - None) або вже завершився.
+
+    Attributes:
+        fingerprint (str): Відбиток тіла запиту, з яким ключ було використано вперше.
+        response (Optional[StoredResponse]): Збережена відповідь.
+    """
+    fingerprint: str
+    response: Optional[StoredResponse] = None
+
+    def to_json(self) -> str:
+        return json.dumps({"fingerprint": self.fingerprint,
+                           "response": self.response.to_dict() if self.response is not None else None})
+
+    @classmethod
+    def from_json(cls, raw) -> "IdempotencyRecord":
+        data = json.loads(raw)
+        response = data["response"]
+        return cls(data["fingerprint"], StoredResponse.from_dict(response) if response is not None else None)
+
+
+class InMemoryIdempotencyStore:
+    """
+    Сховище ключів у пам'яті процесу. Підходить для тестів і запуску з одним воркером.
+
+    Записи впорядковані за часом останнього запису, тому прострочені прибираються з початку словника,
+    а при перевищенні `max_entries` відкидаються найстаріші.
+    """
+
+    def __init__(self, max_entries: int = 10000, clock: Callable[[], float] = time.monotonic):
+        self.max_entries = max_entries
+        self.clock = clock
+        self._records: OrderedDict[str, tuple[float, IdempotencyRecord]] = OrderedDict()
+
+    def _purge(self):
+        now = self.clock()
+        while self._records:
+            key, (expires_at, _) = next(iter(self._records.items()))
+            if expires_at > now and len(self._records) <= self.max_entries:
+                break
+            del self._records[key]
+
+    def _set(self, key: str, record: IdempotencyRecord, ttl: float):
+        self._records.pop(key, None)
+        self._records[key] = (self.clock() + ttl, record)
+        self._purge()
+
+    async def reserve(self, key: str, fingerprint: str, ttl: float) -> Optional[IdempotencyRecord]:
+        record = await self.get(key)
+        if record is not None:
+            return record
+        self._set(key, IdempotencyRecord(fingerprint), ttl)
+        return None
+
+    async def get(self, key: str) -> Optional[IdempotencyRecord]:
+        self._purge()
+        entry = self._records.get(key)
+        if entry is None or entry[0] <= self.clock():
+            return None
+        return entry[1]
+
+    async def complete(self, key: str, record: IdempotencyRecord, ttl: float):
+        self._set(key, record, ttl)
+
+    async def release(self, key: str):
+        self._records.pop(key, None)
+
+
+class RedisIdempotencyStore:
+    """
+    Сховище ключів у Redis, спільне для всіх воркерів. Ключ резервується атомарно командою SET NX.
+    """
+
+    def __init__(self, client: redis.Redis, prefix: str = "idempotency:"):
+        self.client = client
+        self.prefix = prefix
+
+    async def reserve(self, key: str, fingerprint: str, ttl: float) -> Optional[IdempotencyRecord]:
+        reserved = await self.client.set(self.prefix + key, IdempotencyRecord(fingerprint).to_json(),
+                                         nx=True, px=int(ttl * 1000))
+        if reserved:
+            return None
+        record = await self.get(key)
+        if record is None:
+            # Ключ зник між SET і GET - пробуємо зарезервувати ще раз
+            return await self.reserve(key, fingerprint, ttl)
+        return record
+
+    async def get(self, key: str) -> Optional[IdempotencyRecord]:
+        raw = await self.client.get(self.prefix + key)
+        return IdempotencyRecord.from_json(raw) if raw is not None else None
+
+    async def complete(self, key: str, record: IdempotencyRecord, ttl: float):
+        await self.client.set(self.prefix + key, record.to_json(), px=int(ttl * 1000))
+
+    async def release(self, key: str):
+        await self.client.delete(self.prefix + key)
+
+
+def scoped_key(method: str, path: str, authorization: bytes, idempotency_key: str) -> str:
+    """
+    Ключ сховища: Idempotency-Key діє лише для того самого маршруту і тих самих облікових даних,
+    тому клієнти не можуть отримати чужі відповіді, вгадавши ключ.
+    """
+    digest = hashlib.sha256()
+    for part in (method.encode(), path.encode(), authorization, idempotency_key.encode()):
+        digest.update(len(part).to_bytes(4, "big") + part)
+    return digest.hexdigest()
+
+
+def request_fingerprint(content_type: bytes, body: bytes) -> str:
+    return hashlib.sha256(content_type + b"\n" + body).hexdigest()
+
+
+def create_store():
+    if settings.idempotency_backend == "redis":
+        return RedisIdempotencyStore(redis.Redis(host=settings.redis_host, port=settings.redis_port, db=0))
+    return InMemoryIdempotencyStore(settings.idempotency_max_entries)
+
+
+idempotency_store = create_store()
@@ -0,0 +1,117 @@
+from typing import Optional
+from urllib.parse import parse_qs
+
+from src.conf.config import settings
+from src.services.pool_metrics import PoolMetrics, pool_metrics
+
+CRITICAL = "critical"
+READ = "read"
+WRITE = "write"
+BULK = "bulk"
+
+# Частка max_in_flight, до якої приймаються запити класу, і множник цільового часу очікування пулу,
+# після якого запити класу відхиляються (None - не відхиляються через пул)
+ADMISSION = {
+    CRITICAL: (1.0, None),
+    READ: (0.9, 4.0),
+    WRITE: (0.75, 2.0),
+    BULK: (0.5, 1.0),
+}
+
+# (метод, префікс шляху, клас) - перше правило, що підходить
+DEFAULT_RULES = (
+    ("*", "/auth/", CRITICAL),
+    ("*", "/admin/", CRITICAL),
+    ("GET", "/contacts/changes", BULK),
+    ("GET", "/", READ),
+    ("*", "/", WRITE),
+)
+
+# Довгі потоки подій тримають з'єднання годинами і не є навантаженням у момент прийому
+DEFAULT_EXEMPT_PATHS = ("/contacts/stream",)
+
+
+class AdmissionController:
+    """
+    Контроль прийому запитів одним воркером: під перевантаженням зайві запити відхиляються одразу (503),
+    а не чекають на з'єднання з базою даних, доки клієнт не відпаде за таймаутом.
+
+    Запит приймається, якщо кількість запитів, що виконуються, менша за частку `max_in_flight` його класу
+    пріоритету, і середній час очікування з'єднання в пулі за останні секунди не перевищує `pool_wait_target_ms`,
+    помножений на множник класу (див. ADMISSION). Тож першими відхиляються вивантаження та імпорти (bulk),
+    потім записи, читання, і в останню чергу - автентифікація (critical).
+
+    Attributes:
+        max_in_flight (int): Місткість воркера - кількість одночасних запитів.
+        pool_wait_target_ms (float): Цільовий час очікування з'єднання в пулі.
+        retry_after (int): Значення заголовка Retry-After у відхилених відповідях, секунд.
+        export_limit (int): GET-запит з параметром limit, більшим за це значення, вважається вивантаженням (bulk).
+        rules (tuple): Правила класифікації (метод, префікс шляху, клас).
+        exempt_paths (tuple): Префікси шляхів, що не враховуються і не відхиляються.
+        in_flight (int): Кількість прийнятих запитів, що виконуються зараз.
+        stats (dict): Кількість прийнятих і відхилених запитів за класами.
+    """
+
+    def __init__(self, max_in_flight: int = 100, pool_wait_target_ms: float = 50.0, retry_after: int = 1,
+                 export_limit: int = 500, rules: tuple = DEFAULT_RULES, exempt_paths: tuple = DEFAULT_EXEMPT_PATHS,
+                 metrics: Optional[PoolMetrics] = None):
+        self.max_in_flight = max_in_flight
+        self.pool_wait_target_ms = pool_wait_target_ms
+        self.retry_after = retry_after
+        self.export_limit = export_limit
+        self.rules = rules
+        self.exempt_paths = exempt_paths
+        self.metrics = metrics
+        self.in_flight = 0
+        self.stats = {priority: {"admitted": 0, "rejected": 0} for priority in ADMISSION}
+
+    def exempt(self, path: str) -> bool:
+        return path.startswith(self.exempt_paths)
+
+    def classify(self, method: str, path: str, query_string: bytes = b"") -> str:
+        """
+        Визначити клас пріоритету запиту.
+        """
+        priority = WRITE
+        for rule_method, prefix, rule_priority in self.rules:
+            if rule_method in ("*", method) and path.startswith(prefix):
+                priority = rule_priority
+                break
+        if priority == READ and query_string:
+            limit = parse_qs(query_string.decode("latin-1")).get("limit", ["0"])[0]
+            if limit.isdigit() and int(limit) > self.export_limit:
+                priority = BULK
+        return priority
+
+    def admit(self, priority: str) -> bool:
+        """
+        Прийняти або відхилити запит класу `priority`. Прийнятий запит має бути звільнений через release().
+        """
+        share, wait_factor = ADMISSION[priority]
+        admitted = self.in_flight < self.max_in_flight * share
+        if admitted and wait_factor is not None and self.metrics is not None:
+            admitted = self.metrics.recent_wait_ms() <= self.pool_wait_target_ms * wait_factor
+        self.stats[priority]["admitted" if admitted else "rejected"] += 1
+        if admitted:
+            self.in_flight += 1
+        return admitted
+
+    def release(self):
+        self.in_flight -= 1
+
+    def report(self) -> dict:
+        return {"in_flight": self.in_flight, "max_in_flight": self.max_in_flight,
+                "recent_pool_wait_ms": round(self.metrics.recent_wait_ms(), 3) if self.metrics else None,
+                "classes": self.stats}
+
+    def reset(self):
+        self.stats = {priority: {"admitted": 0, "rejected": 0} for priority in ADMISSION}
+
+
+admission_controller = AdmissionController(
+    max_in_flight=settings.load_shedding_max_in_flight,
+    pool_wait_target_ms=settings.load_shedding_pool_wait_ms,
+    retry_after=settings.load_shedding_retry_after,
+    export_limit=settings.load_shedding_export_limit,
+    metrics=pool_metrics if settings.pool_metrics_enabled else None,
+)
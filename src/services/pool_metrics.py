@@ -0,0 +1,181 @@
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+
+class RequestConnections:
+    """
+    Лічильник з'єднань пулу, які зараз утримує один HTTP-запит.
+
+    Attributes:
+        held (int): Кількість з'єднань, утримуваних зараз.
+        response_sent (bool): Чи відправлено відповідь повністю.
+        peak_after_response (int): Найбільша кількість з'єднань, утримуваних після відправки відповіді.
+    """
+
+    def __init__(self):
+        self.held = 0
+        self.response_sent = False
+        self.peak_after_response = 0
+
+
+_request_connections: ContextVar[Optional[RequestConnections]] = ContextVar("pool_metrics_request_connections",
+                                                                             default=None)
+
+
+class PoolMetrics:
+    """
+    Метрики зайнятості пулу з'єднань бази даних.
+
+    Рахує видачі з'єднань з пулу, кількість з'єднань, що використовуються зараз, і пікову кількість, час
+    утримання з'єднання та час очікування вільного з'єднання в пулі. У межах HTTP-запиту (див. track_request())
+    перевіряє, чи утримує запит з'єднання на момент відправки відповіді (тобто під час серіалізації) і будь-коли
+    після її завершення, поки виконуються фонові задачі. Другий лічильник збільшується лише після завершення
+    обробки запиту разом з фоновими задачами (request_finished()). Для правильного життєвого циклу сесії обидва
+    лічильники мають лишатися нульовими.
+
+    Attributes:
+        in_use (int): Кількість з'єднань, виданих з пулу зараз.
+        peak_in_use (int): Пікова кількість одночасно виданих з'єднань.
+        checkouts (int): Кількість видач з'єднань з пулу.
+        held_at_response_start (int): Відповіді, на початку відправки яких запит утримував з'єднання.
+        held_after_response (int): Запити, що утримували з'єднання після відправки відповіді (під час фонових
+            задач).
+        hold_times (deque): Час утримання останніх з'єднань у мілісекундах.
+        wait_times (deque): Час очікування останніх видач з'єднань: пари (час видачі, очікування в мілісекундах).
+    """
+
+    def __init__(self, max_samples: int = 1000):
+        self.in_use = 0
+        self.peak_in_use = 0
+        self.checkouts = 0
+        self.held_at_response_start = 0
+        self.held_after_response = 0
+        self.hold_times: deque = deque(maxlen=max_samples)
+        self.wait_times: deque = deque(maxlen=max_samples)
+        self._timed_pool_classes: dict[type, type] = {}
+
+    def install(self, engine: AsyncEngine):
+        """
+        Підключити метрики до пулу рушія бази даних.
+        """
+        sync_engine = engine.sync_engine
+        if event.contains(sync_engine, "checkout", self._checkout):
+            return
+        event.listen(sync_engine, "checkout", self._checkout)
+        event.listen(sync_engine, "checkin", self._checkin)
+        # Подій очікування в пулі немає, тому клас пулу замінюється підкласом, що вимірює _do_get();
+        # recreate() після dispose() створює пул того самого класу
+        pool = sync_engine.pool
+        pool.__class__ = self._timed_pool_class(type(pool))
+
+    def _timed_pool_class(self, pool_class: type) -> type:
+        if pool_class not in self._timed_pool_classes:
+            metrics = self
+
+            class TimedPool(pool_class):
+                def _do_get(self):
+                    started = time.perf_counter()
+                    try:
+                        return super()._do_get()
+                    finally:
+                        metrics.record_wait(time.perf_counter() - started)
+
+            TimedPool.__name__ = f"Timed{pool_class.__name__}"
+            self._timed_pool_classes[pool_class] = TimedPool
+        return self._timed_pool_classes[pool_class]
+
+    def record_wait(self, seconds: float):
+        self.wait_times.append((time.monotonic(), seconds * 1000))
+
+    def recent_wait_ms(self, window: float = 5.0) -> float:
+        """
+        Середній час очікування з'єднання в пулі за останні `window` секунд (0, якщо видач не було).
+        """
+        since = time.monotonic() - window
+        recent = []
+        for at, wait in reversed(self.wait_times):
+            if at < since:
+                break
+            recent.append(wait)
+        return sum(recent) / len(recent) if recent else 0.0
+
+    def _checkout(self, dbapi_connection, connection_record, connection_proxy):
+        self.checkouts += 1
+        self.in_use += 1
+        self.peak_in_use = max(self.peak_in_use, self.in_use)
+        request = _request_connections.get()
+        if request is not None:
+            request.held += 1
+            if request.response_sent:
+                request.peak_after_response = max(request.peak_after_response, request.held)
+        # З'єднання може повернутись у пул в іншому контексті, тому запит зберігається разом із з'єднанням
+        connection_record.info["pool_metrics_checkout"] = (time.perf_counter(), request)
+
+    def _checkin(self, dbapi_connection, connection_record):
+        checkout = connection_record.info.pop("pool_metrics_checkout", None)
+        if checkout is None:
+            return
+        started, request = checkout
+        self.in_use -= 1
+        self.hold_times.append((time.perf_counter() - started) * 1000)
+        if request is not None:
+            request.held -= 1
+
+    @contextmanager
+    def track_request(self):
+        """
+        Рахувати з'єднання, видані в межах блоку, як з'єднання одного HTTP-запиту.
+        """
+        request = RequestConnections()
+        token = _request_connections.set(request)
+        try:
+            yield request
+        finally:
+            _request_connections.reset(token)
+
+    def response_started(self, request: RequestConnections):
+        if request.held:
+            self.held_at_response_start += 1
+
+    def response_finished(self, request: RequestConnections):
+        request.response_sent = True
+        request.peak_after_response = request.held
+
+    def request_finished(self, request: RequestConnections):
+        """
+        Врахувати запит після завершення обробки, включно з фоновими задачами, що виконуються після відповіді.
+        """
+        if request.peak_after_response:
+            self.held_after_response += 1
+
+    def report(self) -> dict:
+        hold_times = sorted(self.hold_times)
+        wait_times = sorted(wait for _, wait in self.wait_times)
+        return {
+            "in_use": self.in_use,
+            "peak_in_use": self.peak_in_use,
+            "checkouts": self.checkouts,
+            "held_at_response_start": self.held_at_response_start,
+            "held_after_response": self.held_after_response,
+            "hold_ms_p50": round(hold_times[len(hold_times) // 2], 3) if hold_times else None,
+            "hold_ms_p99": round(hold_times[int(len(hold_times) * 0.99)], 3) if hold_times else None,
+            "wait_ms_p99": round(wait_times[int(len(wait_times) * 0.99)], 3) if wait_times else None,
+            "recent_wait_ms": round(self.recent_wait_ms(), 3),
+        }
+
+    def reset(self):
+        self.peak_in_use = self.in_use
+        self.checkouts = 0
+        self.held_at_response_start = 0
+        self.held_after_response = 0
+        self.hold_times.clear()
+        self.wait_times.clear()
+
+
+pool_metrics = PoolMetrics()
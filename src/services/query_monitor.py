@@ -0,0 +1,162 @@
+import json
+import logging
+import re
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from src.conf.config import settings
+
+logger = logging.getLogger(__name__)
+
+_request_statements: ContextVar[Optional[Counter]] = ContextVar("query_monitor_request_statements", default=None)
+
+_EXPLAINABLE = re.compile(r"^\s*(SELECT|WITH|UPDATE|DELETE)\b", re.IGNORECASE)
+_READ_ONLY = re.compile(r"^\s*SELECT\b", re.IGNORECASE)
+
+
+def _short_parameters(parameters) -> object:
+    if isinstance(parameters, dict):
+        return {key: repr(value)[:100] for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [repr(value)[:100] for value in parameters]
+    return repr(parameters)[:100]
+
+
+class QueryMonitor:
+    """
+    Монітор SQL-запитів на рівні рушія бази даних.
+
+    Запити, довші за `slow_threshold_ms`, записуються разом з параметрами у структурований лог і в кільцевий буфер
+    для адмін-ендпоінта. Для SELECT, UPDATE і DELETE додається план виконання (EXPLAIN для PostgreSQL,
+    EXPLAIN QUERY PLAN для SQLite).
+    У межах HTTP-запиту (див. track_request()) рахуються запити однакової форми: якщо форма повторюється
+    більше ніж `n_plus_one_threshold` разів, запит позначається як ймовірний N+1.
+
+    Attributes:
+        slow_threshold_ms (float): Поріг повільного запиту в мілісекундах.
+        n_plus_one_threshold (int): Максимальна кількість однакових запитів в одному HTTP-запиті.
+        explain (bool): Знімати план виконання повільних запитів.
+        analyze (bool): Використовувати EXPLAIN ANALYZE на PostgreSQL для SELECT (запит виконується повторно).
+        log_parameters (bool): Записувати параметри запитів.
+        slow_queries (deque): Останні повільні запити.
+        n_plus_one (deque): Останні HTTP-запити з ймовірним N+1.
+    """
+
+    def __init__(self, slow_threshold_ms: float = 200.0, n_plus_one_threshold: int = 10, explain: bool = True,
+                 analyze: bool = False, log_parameters: bool = True, max_entries: int = 100):
+        self.slow_threshold_ms = slow_threshold_ms
+        self.n_plus_one_threshold = n_plus_one_threshold
+        self.explain = explain
+        self.analyze = analyze
+        self.log_parameters = log_parameters
+        self.slow_queries: deque = deque(maxlen=max_entries)
+        self.n_plus_one: deque = deque(maxlen=max_entries)
+
+    def install(self, engine: AsyncEngine):
+        """
+        Підключити монітор до рушія бази даних.
+        """
+        sync_engine = engine.sync_engine
+        if event.contains(sync_engine, "after_cursor_execute", self._after_cursor_execute):
+            return
+        event.listen(sync_engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(sync_engine, "after_cursor_execute", self._after_cursor_execute)
+        event.listen(sync_engine, "handle_error", self._handle_error)
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_monitor_started", []).append(time.perf_counter())
+
+    def _handle_error(self, exception_context):
+        connection = exception_context.connection
+        if connection is not None and connection.info.get("query_monitor_started"):
+            connection.info["query_monitor_started"].pop()
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        elapsed_ms = (time.perf_counter() - conn.info["query_monitor_started"].pop()) * 1000
+        statements = _request_statements.get()
+        if statements is not None:
+            statements[statement] += 1
+        if elapsed_ms < self.slow_threshold_ms:
+            return
+
+        entry = {
+            "event": "slow_query",
+            "at": datetime.utcnow().isoformat(),
+            "duration_ms": round(elapsed_ms, 2),
+            "statement": statement,
+            "parameters": _short_parameters(parameters) if self.log_parameters else None,
+            "plan": None,
+        }
+        streaming = context is not None and context.execution_options.get("stream_results")
+        if self.explain and not executemany and not streaming and _EXPLAINABLE.match(statement):
+            entry["plan"] = self._explain(conn, statement, parameters)
+        self.slow_queries.append(entry)
+        logger.warning(json.dumps(entry, default=str))
+
+    def _explain(self, conn, statement: str, parameters) -> Optional[list]:
+        if conn.dialect.name == "postgresql":
+            # ANALYZE виконує запит повторно, тому застосовується лише до SELECT
+            analyze = self.analyze and _READ_ONLY.match(statement)
+            prefix = "EXPLAIN (ANALYZE, FORMAT JSON) " if analyze else "EXPLAIN (FORMAT JSON) "
+        elif conn.dialect.name == "sqlite":
+            prefix = "EXPLAIN QUERY PLAN "
+        else:
+            return None
+        # Окремий курсор DBAPI, щоб план не проходив через події рушія і не рахувався як запит
+        cursor = conn.connection.cursor()
+        try:
+            cursor.execute(prefix + statement, parameters)
+            return [list(row) for row in cursor.fetchall()]
+        except Exception as e:
+            logger.info("EXPLAIN failed: %s", e)
+            return None
+        finally:
+            cursor.close()
+
+    def check_request(self, method: str, path: str, statements: Counter):
+        """
+        Позначити HTTP-запит як ймовірний N+1, якщо одна форма SQL-запиту повторювалась забагато разів.
+        """
+        repeated = {statement: count for statement, count in statements.items() if count > self.n_plus_one_threshold}
+        if not repeated:
+            return
+        entry = {"event": "n_plus_one", "at": datetime.utcnow().isoformat(), "method": method, "path": path,
+                 "statements": [{"statement": statement, "count": count} for statement, count in repeated.items()]}
+        self.n_plus_one.append(entry)
+        logger.warning(json.dumps(entry))
+
+    @contextmanager
+    def track_request(self, method: str, path: str):
+        """
+        Рахувати SQL-запити, виконані в межах блоку, і перевірити їх на N+1 після його завершення.
+        """
+        statements = Counter()
+        token = _request_statements.set(statements)
+        try:
+            yield statements
+        finally:
+            _request_statements.reset(token)
+            self.check_request(method, path, statements)
+
+    def report(self) -> dict:
+        return {"slow_queries": list(self.slow_queries), "n_plus_one": list(self.n_plus_one)}
+
+    def reset(self):
+        self.slow_queries.clear()
+        self.n_plus_one.clear()
+
+
+query_monitor = QueryMonitor(
+    slow_threshold_ms=settings.query_monitor_slow_ms,
+    n_plus_one_threshold=settings.query_monitor_n_plus_one,
+    explain=settings.query_monitor_explain,
+    analyze=settings.query_monitor_analyze,
+    log_parameters=settings.query_monitor_log_parameters,
+)
@@ -0,0 +1,113 @@
+import time
+from collections import OrderedDict
+from typing import Callable, Optional
+
+import redis.asyncio as redis
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from src.DB.db import replica_session
+from src.conf.config import settings
+
+
+class InMemoryStickinessStore:
+    """
+    Користувачі, що нещодавно змінювали контакти, у пам'яті процесу. Підходить для тестів і запуску з одним
+    воркером: з кількома воркерами наступне читання може потрапити у воркер, що не бачив запису.
+
+    Записи впорядковані за часом запису, тому прострочені прибираються з початку словника,
+    а при перевищенні `max_entries` відкидаються найстаріші.
+    """
+
+    def __init__(self, window: float, max_entries: int = 100000, clock: Callable[[], float] = time.monotonic):
+        self.window = window
+        self.max_entries = max_entries
+        self.clock = clock
+        self._until: OrderedDict[int, float] = OrderedDict()
+
+    def _purge(self):
+        now = self.clock()
+        while self._until:
+            user_id, until = next(iter(self._until.items()))
+            if until > now and len(self._until) <= self.max_entries:
+                break
+            del self._until[user_id]
+
+    async def mark(self, user_id: int):
+        self._until.pop(user_id, None)
+        self._until[user_id] = self.clock() + self.window
+        self._purge()
+
+    async def is_sticky(self, user_id: int) -> bool:
+        until = self._until.get(user_id)
+        return until is not None and until > self.clock()
+
+
+class RedisStickinessStore:
+    """
+    Користувачі, що нещодавно змінювали контакти, у Redis - спільні для всіх воркерів.
+    """
+
+    def __init__(self, client: redis.Redis, window: float, prefix: str = "replica_sticky:"):
+        self.client = client
+        self.window = window
+        self.prefix = prefix
+
+    async def mark(self, user_id: int):
+        await self.client.set(f"{self.prefix}{user_id}", 1, px=int(self.window * 1000))
+
+    async def is_sticky(self, user_id: int) -> bool:
+        return bool(await self.client.exists(f"{self.prefix}{user_id}"))
+
+
+class ReplicaRouter:
+    """
+    Вибір бази даних для запитів, що лише читають контакти: репліка або основна база даних.
+
+    Репліка відстає від основної бази, тому після зміни контактів користувач на `window` секунд
+    "прилипає" до основної бази (read-your-writes): його читання бачать власні записи, навіть якщо
+    репліка їх ще не отримала. Вікно має перевищувати звичайне відставання репліки.
+
+    Attributes:
+        sessionmaker (Optional[async_sessionmaker]): Фабрика сесій репліки; None - репліку не налаштовано.
+        stickiness: Сховище користувачів, що нещодавно змінювали контакти.
+        stats (dict): Лічильники читань replica, primary та sticky (з них - через нещодавній запис).
+    """
+
+    def __init__(self, sessionmaker: Optional[async_sessionmaker], stickiness):
+        self.sessionmaker = sessionmaker
+        self.stickiness = stickiness
+        self.stats = {"replica": 0, "primary": 0, "sticky": 0}
+
+    async def mark_write(self, user_id: int):
+        """
+        Позначити, що користувач щойно змінив контакти в основній базі даних.
+        """
+        if self.sessionmaker is not None:
+            await self.stickiness.mark(user_id)
+
+    async def replica_session(self, user_id: int) -> Optional[AsyncSession]:
+        """
+        Відкрити сесію репліки для читання контактів користувача.
+
+        Returns:
+            Optional[AsyncSession]: Сесія репліки або None, якщо читати потрібно з основної бази даних.
+        """
+        if self.sessionmaker is None:
+            self.stats["primary"] += 1
+            return None
+        if await self.stickiness.is_sticky(user_id):
+            self.stats["primary"] += 1
+            self.stats["sticky"] += 1
+            return None
+        self.stats["replica"] += 1
+        return self.sessionmaker()
+
+
+def create_stickiness_store():
+    if settings.replica_sticky_backend == "redis":
+        return RedisStickinessStore(redis.Redis(host=settings.redis_host, port=settings.redis_port, db=0),
+                                    settings.replica_sticky_seconds)
+    return InMemoryStickinessStore(settings.replica_sticky_seconds, settings.replica_sticky_max_users)
+
+
+replica_router = ReplicaRouter(replica_session, create_stickiness_store())
@@ -0,0 +1,203 @@
+import asyncio
+import functools
+import logging
+import time
+from typing import Any, Callable
+
+from src.services.tracing import tracer
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class IntegrationUnavailable(Exception):
+    """
+    Зовнішній сервіс недоступний: виклик не виконано або не завершено вчасно.
+    """
+
+    def __init__(self, integration: str, reason: str):
+        super().__init__(f"{integration}: {reason}")
+        self.integration = integration
+        self.reason = reason
+
+
+class CircuitOpenError(IntegrationUnavailable):
+    def __init__(self, integration: str):
+        super().__init__(integration, "circuit breaker is open")
+
+
+class BulkheadFullError(IntegrationUnavailable):
+    def __init__(self, integration: str):
+        super().__init__(integration, "too many concurrent calls")
+
+
+class IntegrationTimeoutError(IntegrationUnavailable):
+    def __init__(self, integration: str, timeout: float):
+        super().__init__(integration, f"no response in {timeout}s")
+
+
+class CircuitBreaker:
+    """
+    Запобіжник виклику зовнішнього сервісу.
+
+    Після `failure_threshold` невдалих викликів поспіль запобіжник розмикається (open) і виклики одразу
+    відхиляються. Через `reset_timeout` секунд пропускається один пробний виклик (half_open): успіх замикає
+    запобіжник, невдача - знову розмикає.
+
+    Attributes:
+        state (str): Стан запобіжника: closed, open або half_open.
+        failures (int): Кількість невдалих викликів поспіль.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.state = CLOSED
+        self.failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+
+    def allow(self) -> bool:
+        """
+        Чи можна виконати виклик зараз. У стані half_open дозволяється лише один пробний виклик.
+        """
+        if self.state == OPEN and self.clock() - self._opened_at >= self.reset_timeout:
+            self.state = HALF_OPEN
+        if self.state == CLOSED:
+            return True
+        if self.state == HALF_OPEN and not self._probing:
+            self._probing = True
+            return True
+        return False
+
+    def release(self):
+        """
+        Звільнити пробний виклик, який так і не дійшов до сервісу (наприклад, відхилений обмеженням паралельності).
+        """
+        self._probing = False
+
+    def record_success(self):
+        self._probing = False
+        self.failures = 0
+        self.state = CLOSED
+
+    def record_failure(self):
+        self._probing = False
+        self.failures += 1
+        if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+            self.state = OPEN
+            self._opened_at = self.clock()
+
+
+class Integration:
+    """
+    Шар стійкості для викликів одного зовнішнього сервісу (Cloudinary, SMTP).
+
+    Кожен виклик має граничний час `timeout` (разом з очікуванням вільного місця), кількість одночасних
+    викликів обмежена `max_concurrency` (bulkhead), а запобіжник CircuitBreaker відхиляє виклики, поки
+    сервіс не відповідає. Синхронні функції виконуються в пулі потоків: потік, що не вклався в час,
+    продовжує займати місце в обмеженні паралельності, доки не завершиться.
+
+    Attributes:
+        name (str): Назва сервісу в метриках і повідомленнях про помилки.
+        timeout (float): Граничний час виклику в секундах.
+        max_concurrency (int): Максимальна кількість одночасних викликів.
+        breaker (CircuitBreaker): Запобіжник сервісу.
+        stats (dict): Лічильники calls, successes, failures, timeouts, rejected та short_circuited.
+        in_flight (int): Кількість викликів, що виконуються зараз.
+    """
+
+    def __init__(self, name: str, timeout: float = 10.0, max_concurrency: int = 4, failure_threshold: int = 5,
+                 reset_timeout: float = 30.0):
+        self.name = name
+        self.timeout = timeout
+        self.max_concurrency = max_concurrency
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self.stats = {"calls": 0, "successes": 0, "failures": 0, "timeouts": 0, "rejected": 0,
+                      "short_circuited": 0}
+        self.in_flight = 0
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def call(self, fn: Callable, *args, **kwargs) -> Any:
+        """
+        Виконати виклик сервісу: корутинну функцію - в циклі подій, звичайну - в пулі потоків.
+        Під час трасування виклик, разом з очікуванням місця, записується клієнтським спаном integration.<name>.
+
+        Raises:
+            CircuitOpenError: Якщо запобіжник розімкнено.
+            BulkheadFullError: Якщо місце для виклику не звільнилося до граничного часу.
+            IntegrationTimeoutError: Якщо сервіс не відповів до граничного часу.
+        """
+        if not tracer.recording():
+            return await self._call(fn, *args, **kwargs)
+        attributes = {"peer.service": self.name, "circuit.state": self.breaker.state}
+        with tracer.span(f"integration.{self.name}", "client", attributes):
+            return await self._call(fn, *args, **kwargs)
+
+    async def _call(self, fn: Callable, *args, **kwargs) -> Any:
+        self.stats["calls"] += 1
+        state = self.breaker.state
+        if not self.breaker.allow():
+            self.stats["short_circuited"] += 1
+            raise CircuitOpenError(self.name)
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.timeout
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), self.timeout)
+        except asyncio.TimeoutError:
+            self.breaker.release()
+            self.stats["rejected"] += 1
+            raise BulkheadFullError(self.name) from None
+
+        self.in_flight += 1
+        is_coroutine = asyncio.iscoroutinefunction(fn)
+        if is_coroutine:
+            operation = asyncio.ensure_future(fn(*args, **kwargs))
+        else:
+            operation = loop.run_in_executor(None, functools.partial(fn, *args, **kwargs))
+        operation.add_done_callback(self._release)
+        try:
+            result = await asyncio.wait_for(asyncio.shield(operation), max(deadline - loop.time(), 0))
+        except asyncio.TimeoutError:
+            # Корутину можна скасувати одразу, а потік звільнить місце лише після завершення
+            if is_coroutine:
+                operation.cancel()
+            self.stats["timeouts"] += 1
+            self._failed(state)
+            raise IntegrationTimeoutError(self.name, self.timeout) from None
+        except asyncio.CancelledError:
+            if is_coroutine:
+                operation.cancel()
+            self.breaker.release()
+            raise
+        except Exception:
+            self.stats["failures"] += 1
+            self._failed(state)
+            raise
+        self.stats["successes"] += 1
+        self.breaker.record_success()
+        if state != CLOSED:
+            logger.warning("Circuit breaker for %s is closed", self.name)
+        return result
+
+    def _release(self, operation: asyncio.Future):
+        self.in_flight -= 1
+        self._semaphore.release()
+        if not operation.cancelled():
+            # Результат потоку, що не вклався в час, нікому не потрібен
+            operation.exception()
+
+    def _failed(self, state: str):
+        self.breaker.record_failure()
+        if self.breaker.state == OPEN and state != OPEN:
+            logger.warning("Circuit breaker for %s is open after %s failures", self.name, self.breaker.failures)
+
+    def report(self) -> dict:
+        return {"state": self.breaker.state, "in_flight": self.in_flight, "max_concurrency": self.max_concurrency,
+                **self.stats}
@@ -0,0 +1,105 @@
+from contextvars import ContextVar
+from datetime import date, datetime
+from typing import Any, Callable, Sequence
+
+import msgpack
+from fastapi import Request, Response
+from fastapi.responses import JSONResponse
+from sqlalchemy import Row
+
+from src.DB.db import SessionReleasingRoute
+from src.services.tracing import traced
+
+MSGPACK_MEDIA_TYPES = ("application/msgpack", "application/x-msgpack")
+
+_msgpack_requested: ContextVar[bool] = ContextVar("msgpack_requested", default=False)
+
+
+def parse_quality_header(value: str) -> dict[str, float]:
+    """
+    Розібрати заголовок на кшталт Accept або Accept-Encoding у словник значення -> вага (q).
+
+    Args:
+        value (str): Значення заголовка, наприклад "application/msgpack, application/json;q=0.5".
+
+    Returns:
+        dict[str, float]: Значення заголовка у нижньому регістрі та їхні ваги.
+    """
+    result = {}
+    for part in value.split(","):
+        item, *params = part.strip().split(";")
+        item = item.strip().lower()
+        if not item:
+            continue
+        quality = 1.0
+        for param in params:
+            name, _, raw = param.strip().partition("=")
+            if name.strip() == "q":
+                try:
+                    quality = float(raw)
+                except ValueError:
+                    quality = 0.0
+        result[item] = quality
+    return result
+
+
+def accepts_msgpack(accept: str) -> bool:
+    """
+    Перевірити, чи клієнт віддає перевагу MessagePack перед JSON у заголовку Accept.
+    """
+    qualities = parse_quality_header(accept)
+    msgpack_quality = max((qualities.get(media_type, 0.0) for media_type in MSGPACK_MEDIA_TYPES), default=0.0)
+    json_quality = max(qualities.get("application/json", 0.0), qualities.get("*/*", 0.0))
+    return msgpack_quality > 0 and msgpack_quality >= json_quality
+
+
+def encode_rows(rows: Sequence[Row]) -> list[dict]:
+    """
+    Перетворити рядки Core-запиту на словники, придатні для NegotiatedResponse, без pydantic-моделей.
+
+    Дати кодуються у формат ISO 8601, як це робить jsonable_encoder.
+    """
+    if not rows:
+        return []
+    keys = rows[0]._fields
+    return [
+        {key: value.isoformat() if isinstance(value, (date, datetime)) else value for key, value in zip(keys, row)}
+        for row in rows
+    ]
+
+
+class NegotiatedResponse(JSONResponse):
+    """
+    Відповідь, що кодується у MessagePack, якщо клієнт запросив його заголовком Accept, і в JSON - інакше.
+    """
+
+    @traced("response.render")
+    def render(self, content: Any) -> bytes:
+        if _msgpack_requested.get():
+            self.media_type = MSGPACK_MEDIA_TYPES[0]
+            return msgpack.packb(content, use_bin_type=True)
+        return super().render(content)
+
+
+class NegotiatedRoute(SessionReleasingRoute):
+    """
+    Маршрут, який перед викликом обробника визначає формат відповіді з заголовка Accept.
+    З'єднання сесій бази даних повертаються в пул до кодування відповіді (див. SessionReleasingRoute).
+
+    Використовується разом з NegotiatedResponse як default_response_class роутера,
+    щоб дані кодувалися одразу в потрібний формат, без проміжного JSON.
+    """
+
+    def get_route_handler(self) -> Callable:
+        route_handler = super().get_route_handler()
+
+        async def negotiated_route_handler(request: Request) -> Response:
+            token = _msgpack_requested.set(accepts_msgpack(request.headers.get("accept", "")))
+            try:
+                response = await route_handler(request)
+            finally:
+                _msgpack_requested.reset(token)
+            response.headers.add_vary_header("Accept")
+            return response
+
+        return negotiated_route_handler
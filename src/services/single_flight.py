@@ -0,0 +1,111 @@
+import asyncio
+import functools
+import inspect
+from typing import Any, Awaitable, Callable, Hashable
+
+from src.conf.config import settings
+
+
+class SingleFlight:
+    """
+    Об'єднання однакових одночасних викликів у межах одного процесу (воркера).
+
+    Поки виконується виклик з певним ключем, інші виклики з тим самим ключем не запускають
+    власний запит до бази даних, а чекають і отримують результат першого ("лідера").
+
+    Attributes:
+        stats (dict): Лічильники: calls - усі виклики, executions - реально виконані,
+                      coalesced - виклики, що отримали результат чужого виклику.
+    """
+
+    def __init__(self):
+        self._calls: dict[Hashable, asyncio.Future] = {}
+        self.stats = {"calls": 0, "executions": 0, "coalesced": 0}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable]) -> Any:
+        """
+        Виконати `fn` або приєднатися до вже запущеного виклику з тим самим ключем.
+
+        Args:
+            key (Hashable): Ключ виклику. Перший елемент - ідентифікатор користувача.
+            fn (Callable): Корутинна функція без аргументів, що виконує запит.
+
+        Returns:
+            Any: Результат виклику.
+        """
+        self.stats["calls"] += 1
+        future = self._calls.get(key)
+        if future is not None:
+            self.stats["coalesced"] += 1
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if future.cancelled():
+                    # Лідера скасовано - виконуємо запит самостійно
+                    return await self.do(key, fn)
+                raise
+
+        future = asyncio.get_running_loop().create_future()
+        self._calls[key] = future
+        self.stats["executions"] += 1
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as exc:
+            future.set_exception(exc)
+            # Позначаємо виняток як отриманий, якщо ніхто не чекав на результат
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            if self._calls.get(key) is future:
+                del self._calls[key]
+
+    def forget(self, user_id: int):
+        """
+        Від'єднати виклики користувача, що виконуються, від нових викликів.
+
+        Викликається після запису, щоб наступні читання не отримали результат запиту,
+        розпочатого до цього запису.
+        """
+        for key in [key for key in self._calls if key[0] == user_id]:
+            del self._calls[key]
+
+
+single_flight = SingleFlight()
+
+
+def _key_part(value: Any) -> Hashable:
+    if hasattr(value, "__table__") and hasattr(value, "id"):
+        return value.__class__.__name__, value.id
+    if isinstance(value, list):
+        return tuple(value)
+    return value
+
+
+def coalesced(func: Callable) -> Callable:
+    """
+    Декоратор функцій читання репозиторію, що об'єднує однакові одночасні виклики через single_flight.
+
+    Ключ виклику складається з ідентифікатора користувача (аргумент `user`), назви функції та решти
+    аргументів, крім сесії бази даних `db`. Вимикається налаштуванням `single_flight_enabled`.
+    """
+    signature = inspect.signature(func)
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        if not settings.single_flight_enabled:
+            return await func(*args, **kwargs)
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        user = bound.arguments.get("user")
+        key = (getattr(user, "id", None), func.__name__) + tuple(
+            (name, _key_part(value)) for name, value in bound.arguments.items() if name not in ("db", "user")
+        )
+        return await single_flight.do(key, lambda: func(*args, **kwargs))
+
+    return wrapper
@@ -0,0 +1,334 @@
+import asyncio
+import functools
+import json
+import logging
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Iterator, NamedTuple, Optional
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from src.conf.config import settings
+
+logger = logging.getLogger(__name__)
+
+_TRACEPARENT = re.compile(r"^([0-9a-f]{2})-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+_INVALID_TRACE_ID = "0" * 32
+_INVALID_SPAN_ID = "0" * 16
+
+
+class SpanContext(NamedTuple):
+    """
+    Ідентифікатори батьківського спана з іншого процесу (заголовок traceparent).
+    """
+    trace_id: str
+    span_id: str
+    sampled: bool
+
+
+def parse_traceparent(value: Optional[str]) -> Optional[SpanContext]:
+    """
+    Розібрати заголовок traceparent за W3C Trace Context. Некоректний заголовок ігнорується.
+    """
+    if not value:
+        return None
+    match = _TRACEPARENT.match(value.strip().lower())
+    if match is None:
+        return None
+    version, trace_id, span_id, flags = match.groups()
+    if version == "ff" or trace_id == _INVALID_TRACE_ID or span_id == _INVALID_SPAN_ID:
+        return None
+    return SpanContext(trace_id, span_id, bool(int(flags, 16) & 1))
+
+
+def format_traceparent(span) -> str:
+    return f"00-{span.trace_id}-{span.span_id}-{'01' if span.sampled else '00'}"
+
+
+class Span:
+    """
+    Вимірювана операція в межах трасування.
+
+    Спан, не вибраний семплером (`sampled` = False), лише передає ідентифікатор трасування дочірнім операціям
+    і в заголовок traceparent: дочірні спани для нього не створюються і не експортуються.
+
+    Attributes:
+        name (str): Назва операції.
+        trace_id (str): Ідентифікатор трасування (32 шістнадцяткові символи).
+        span_id (str): Ідентифікатор спана (16 шістнадцяткових символів).
+        parent_id (Optional[str]): Ідентифікатор батьківського спана.
+        sampled (bool): Чи записується трасування.
+        kind (str): server, client або internal.
+        attributes (dict): Атрибути операції.
+        status (str): ok або error.
+    """
+
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "sampled", "kind", "attributes", "status",
+                 "start_ns", "end_ns")
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str], sampled: bool, kind: str = "internal",
+                 attributes: Optional[dict] = None):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.sampled = sampled
+        self.kind = kind
+        self.attributes = attributes or {}
+        self.status = "ok"
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+
+    def set_attribute(self, key: str, value):
+        self.attributes[key] = value
+
+    def record_exception(self, exc: BaseException):
+        self.status = "error"
+        self.attributes["exception.type"] = type(exc).__name__
+        self.attributes["exception.message"] = str(exc)[:500]
+
+    def end(self):
+        self.end_ns = time.time_ns()
+
+    @property
+    def duration_ms(self) -> float:
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e6
+
+    def to_dict(self) -> dict:
+        return {"name": self.name, "trace_id": self.trace_id, "span_id": self.span_id, "parent_id": self.parent_id,
+                "kind": self.kind, "start_ns": self.start_ns, "end_ns": self.end_ns,
+                "duration_ms": round(self.duration_ms, 3), "status": self.status, "attributes": self.attributes}
+
+
+class TraceIdRatioSampler:
+    """
+    Семплер на початку трасування: вибирає частку `rate` трасувань за ідентифікатором трасування,
+    тому рішення однакове в усіх сервісах, що отримали той самий trace_id без прапорця sampled.
+    """
+
+    def __init__(self, rate: float):
+        self.rate = rate
+        self._bound = int(max(0.0, min(rate, 1.0)) * (1 << 64))
+
+    def should_sample(self, trace_id: str) -> bool:
+        return int(trace_id[16:], 16) < self._bound
+
+
+class ConsoleExporter:
+    """
+    Експорт завершених спанів у лог одним JSON-рядком на спан.
+    """
+
+    def export(self, span: Span):
+        logger.info(json.dumps(span.to_dict(), default=str))
+
+    def shutdown(self):
+        pass
+
+
+class FileExporter:
+    """
+    Експорт завершених спанів у файл JSON Lines. Записи буферизуються і скидаються на диск
+    пачками по `flush_every` спанів і під час shutdown().
+    """
+
+    def __init__(self, path: str, flush_every: int = 100):
+        self.path = path
+        self.flush_every = flush_every
+        self._buffer: list[str] = []
+        self._lock = threading.Lock()
+
+    def export(self, span: Span):
+        with self._lock:
+            self._buffer.append(json.dumps(span.to_dict(), default=str))
+            if len(self._buffer) >= self.flush_every:
+                self._flush()
+
+    def _flush(self):
+        if not self._buffer:
+            return
+        with open(self.path, "a") as file:
+            file.write("\n".join(self._buffer) + "\n")
+        self._buffer.clear()
+
+    def shutdown(self):
+        with self._lock:
+            self._flush()
+
+
+class InMemoryExporter:
+    """
+    Експорт у список у пам'яті - для тестів.
+    """
+
+    def __init__(self):
+        self.spans: list[Span] = []
+
+    def export(self, span: Span):
+        self.spans.append(span)
+
+    def shutdown(self):
+        pass
+
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("tracing_current_span", default=None)
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+class Tracer:
+    """
+    Трасування запитів у стилі OpenTelemetry без зовнішніх залежностей.
+
+    Поточний спан зберігається в ContextVar, тому вкладені операції однієї задачі asyncio автоматично стають
+    дочірніми. Рішення про запис приймається один раз для трасування (head sampling): семплером для нового
+    трасування або прапорцем sampled батька з заголовка traceparent. Для невибраних трасувань і вимкненого
+    трасування декоратор traced() викликає функцію напряму.
+
+    Attributes:
+        exporter: Експортер завершених спанів (ConsoleExporter, FileExporter, InMemoryExporter).
+        sampler (TraceIdRatioSampler): Семплер нових трасувань.
+        enabled (bool): Чи увімкнено трасування.
+        max_statement_length (int): Максимальна довжина SQL-запиту в атрибуті db.statement.
+    """
+
+    def __init__(self, exporter, sampler: TraceIdRatioSampler, enabled: bool = True,
+                 max_statement_length: int = 1000):
+        self.exporter = exporter
+        self.sampler = sampler
+        self.enabled = enabled
+        self.max_statement_length = max_statement_length
+
+    def start_span(self, name: str, kind: str = "internal", attributes: Optional[dict] = None,
+                   parent=None) -> Span:
+        """
+        Створити спан, дочірній до `parent` (спан або SpanContext) чи до поточного спана.
+        """
+        parent = parent if parent is not None else _current_span.get()
+        if parent is None:
+            trace_id = os.urandom(16).hex()
+            return Span(name, trace_id, None, self.sampler.should_sample(trace_id), kind, attributes)
+        return Span(name, parent.trace_id, parent.span_id, parent.sampled, kind, attributes)
+
+    def end_span(self, span: Span):
+        span.end()
+        if span.sampled:
+            try:
+                self.exporter.export(span)
+            except Exception as e:
+                logger.warning("Span export failed: %s", e)
+
+    @contextmanager
+    def span(self, name: str, kind: str = "internal", attributes: Optional[dict] = None,
+             parent=None) -> Iterator[Span]:
+        """
+        Виконати блок у новому спані, що стає поточним на час блоку.
+        """
+        span = self.start_span(name, kind, attributes, parent)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as exc:
+            span.record_exception(exc)
+            raise
+        finally:
+            _current_span.reset(token)
+            self.end_span(span)
+
+    def recording(self) -> bool:
+        """
+        Чи потрібно створювати дочірній спан: трасування увімкнено, і поточне трасування записується.
+        """
+        if not self.enabled:
+            return False
+        parent = _current_span.get()
+        return parent is None or parent.sampled
+
+    def install(self, engine: AsyncEngine):
+        """
+        Записувати спан db.query для кожного SQL-запиту рушія в межах трасування, що записується.
+        """
+        sync_engine = engine.sync_engine
+        if event.contains(sync_engine, "after_cursor_execute", self._after_cursor_execute):
+            return
+        event.listen(sync_engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(sync_engine, "after_cursor_execute", self._after_cursor_execute)
+        event.listen(sync_engine, "handle_error", self._handle_error)
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        parent = _current_span.get()
+        if parent is None or not parent.sampled:
+            # Запит поза трасуванням (скрипти, міграції) не починає нового трасування
+            conn.info.setdefault("tracing_spans", []).append(None)
+            return
+        span = self.start_span("db.query", "client", {
+            "db.system": conn.dialect.name,
+            "db.statement": statement[:self.max_statement_length],
+            "db.executemany": executemany,
+        }, parent)
+        conn.info.setdefault("tracing_spans", []).append(span)
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        span = conn.info["tracing_spans"].pop()
+        if span is not None:
+            if cursor.rowcount is not None and cursor.rowcount >= 0:
+                span.set_attribute("db.rowcount", cursor.rowcount)
+            self.end_span(span)
+
+    def _handle_error(self, exception_context):
+        connection = exception_context.connection
+        if connection is None or not connection.info.get("tracing_spans"):
+            return
+        span = connection.info["tracing_spans"].pop()
+        if span is not None:
+            span.record_exception(exception_context.original_exception)
+            self.end_span(span)
+
+
+def create_exporter():
+    if settings.tracing_exporter == "file":
+        return FileExporter(settings.tracing_file)
+    return ConsoleExporter()
+
+
+tracer = Tracer(create_exporter(), TraceIdRatioSampler(settings.tracing_sample_rate), settings.tracing_enabled)
+
+
+def traced(name: Optional[str] = None, kind: str = "internal") -> Callable:
+    """
+    Декоратор, що виконує функцію у спані `name` (за замовчуванням - "<модуль>.<функція>").
+
+    Якщо трасування вимкнено або поточне трасування не записується, функція викликається напряму.
+    Асинхронні генератори не підтримуються: їх ітерують інші задачі, а поточний спан прив'язаний до задачі.
+    """
+
+    def decorator(func: Callable) -> Callable:
+        span_name = name or f"{func.__module__.rsplit('.', 1)[-1]}.{func.__name__}"
+
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                if not tracer.recording():
+                    return await func(*args, **kwargs)
+                with tracer.span(span_name, kind):
+                    return await func(*args, **kwargs)
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not tracer.recording():
+                return func(*args, **kwargs)
+            with tracer.span(span_name, kind):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,138 @@
+import datetime
+import re
+import unittest
+from unittest.mock import patch
+
+from sqlalchemy import event, insert
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+
+from src.DB.models import Base, Contact, User
+from src.repository import contacts_repo, contacts_read_repo, users_repo
+from src.schemas.Contacts_Schemas import ContactCreate, ContactUpdate, ContactListFilters
+from src.schemas.User_Schemas import UserCreate
+from src.services.query_monitor import QueryMonitor
+
+FULL_SCAN = re.compile(r"^SCAN (contacts|users|contact_version_counters)\b")
+
+
+class TestRepositoryQueryPlans(unittest.IsolatedAsyncioTestCase):
+    """
+    Кожен запит репозиторіїв виконується на заповненій базі SQLite з монітором запитів, що знімає EXPLAIN QUERY PLAN
+    для всіх запитів. Тест падає, якщо план містить повне сканування таблиці.
+    """
+
+    async def asyncSetUp(self):
+        self.engine = create_async_engine("sqlite+aiosqlite://")
+        self.session_factory = async_sessionmaker(bind=self.engine, class_=AsyncSession, expire_on_commit=False)
+        async with self.engine.begin() as connection:
+            await connection.run_sync(Base.metadata.create_all)
+            await connection.execute(insert(User), [
+                {"id": i, "username": f"user{i}", "email": f"user{i}@example.com", "password": "x",
+                 "is_activated": True}
+                for i in range(1, 51)
+            ])
+            await connection.execute(insert(Contact), [
+                {"first_name": f"First{i}", "last_name": f"Last{i}", "email": f"contact{i}@example.com",
+                 "phone": "0", "b_day": datetime.date(1990, 1, 1) + datetime.timedelta(days=i),
+                 "user_id": i % 50 + 1}
+                for i in range(2000)
+            ])
+        self.monitor = QueryMonitor(slow_threshold_ms=0)
+        self.monitor.install(self.engine)
+        self.user = User(id=1, email="user1@example.com")
+        self.body = ContactCreate(first_name="John", last_name="Doe", email="john@example.com", phone="0",
+                                  b_day="1990-07-10")
+        self.db = self.session_factory()
+        settings_patch = patch.multiple("src.repository.contacts_repo.settings", autocomplete_cache_enabled=False,
+                                        single_flight_enabled=False)
+        settings_patch.start()
+        self.addCleanup(settings_patch.stop)
+
+    async def asyncTearDown(self):
+        await self.db.close()
+        await self.engine.dispose()
+
+    async def assert_no_full_scans(self, call):
+        self.monitor.reset()
+        await call
+        explained = [entry for entry in self.monitor.slow_queries if entry["plan"] is not None]
+        self.assertTrue(explained, "no statements were explained")
+        for entry in explained:
+            for row in entry["plan"]:
+                self.assertIsNone(FULL_SCAN.match(row[3]), f"{row[3]}\n{entry['statement']}")
+
+    async def test_contacts_reads(self):
+        await self.assert_no_full_scans(contacts_repo.get_specific_contact_belongs_to_user(1, self.user, self.db))
+        await self.assert_no_full_scans(contacts_repo.repo_get_contacts(self.db, self.user, 10, 20))
+        await self.assert_no_full_scans(contacts_repo.repo_get_contacts_query(self.user, "first1", 10, 0, self.db))
+        await self.assert_no_full_scans(contacts_repo.repo_count_contacts_query(self.user, "first1", 100, self.db))
+        await self.assert_no_full_scans(contacts_repo.repo_get_contacts_count(self.user, self.db))
+        await self.assert_no_full_scans(contacts_repo.repo_autocomplete_contacts(self.user, "fir", 10, self.db))
+        await self.assert_no_full_scans(contacts_repo.repo_get_upcoming_birthday_contacts(self.user, self.db))
+        await self.assert_no_full_scans(contacts_repo.repo_get_contact_changes(self.user, -1, 100, self.db))
+        await self.assert_no_full_scans(contacts_repo.repo_get_contacts_version(self.user, self.db))
+
+    async def test_birthday_stream(self):
+        # Монітор не виконує EXPLAIN для потокових результатів, тому план запиту знімається тут
+        statements = []
+
+        def record(conn, cursor, statement, parameters, *args):
+            statements.append((statement, parameters))
+
+        event.listen(self.engine.sync_engine, "before_cursor_execute", record)
+        rows = [row async for row in contacts_repo.repo_stream_birthday_contacts(self.user, self.db)]
+        event.remove(self.engine.sync_engine, "before_cursor_execute", record)
+        self.assertEqual(len(rows), 40)
+        self.assertTrue(statements, "no statements were executed")
+        connection = await self.db.connection()
+        for statement, parameters in statements:
+            plan = (await connection.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters)).all()
+            for row in plan:
+                self.assertIsNone(FULL_SCAN.match(row[3]), f"{row[3]}\n{statement}")
+
+    async def test_contact_list_filters_and_sorts(self):
+        # Кожна дозволена комбінація фільтра і сортування, з курсором і без, читається за індексом без сортування
+        combinations = [
+            {}, {"sort": "last_name"}, {"sort": "first_name", "descending": True}, {"sort": "b_day"},
+            {"has_notes": True, "sort": "last_name"}, {"name_prefix": "first1"},
+            {"b_day_from": datetime.date(1990, 3, 1), "b_day_to": datetime.date(1991, 3, 1), "sort": "b_day"},
+            {"email_domain": "Example.com"},
+        ]
+        cursors = {"id": (5, 5), "last_name": ("Last5", 5), "first_name": ("First5", 5),
+                   "b_day": (datetime.date(1990, 6, 1), 5)}
+        for combination in combinations:
+            for after in (None, cursors[combination.get("sort", "id")]):
+                filters = ContactListFilters(**combination, after=after)
+                with self.subTest(filters=filters):
+                    await self.assert_no_full_scans(contacts_read_repo.repo_read_contacts(self.db, self.user, 10, 0,
+                                                                                          filters=filters))
+                    await self.assert_no_full_scans(contacts_repo.repo_get_contacts(self.db, self.user, 10, 0,
+                                                                                    filters=filters))
+                    plans = [row[3] for entry in self.monitor.slow_queries for row in entry["plan"] or []]
+                    self.assertFalse([plan for plan in plans if "TEMP B-TREE" in plan], plans)
+
+    async def test_contacts_writes(self):
+        await self.assert_no_full_scans(contacts_repo.repo_create_new_contact(self.user, self.body, self.db))
+        await self.assert_no_full_scans(
+            contacts_repo.repo_update_contact_db(1, self.user, ContactUpdate(**self.body.dict()), self.db))
+        await self.assert_no_full_scans(contacts_repo.repo_delete_contact_db(1, self.user, self.db))
+        await self.assert_no_full_scans(contacts_repo.repo_purge_contact_tombstones(datetime.datetime.utcnow(),
+                                                                                    self.db))
+
+    async def test_birthday_reminder_queries(self):
+        await self.assert_no_full_scans(contacts_repo.repo_get_reminder_users(self.db, 10, 20))
+        await self.assert_no_full_scans(contacts_repo.repo_get_upcoming_birthdays_for_users(
+            self.db, list(range(1, 21)), datetime.date(2023, 1, 1)))
+
+    async def test_users_queries(self):
+        await self.assert_no_full_scans(users_repo.repo_user_authentication_by_email("user2@example.com", self.db))
+        await self.assert_no_full_scans(users_repo.repo_create_user(
+            UserCreate(username="new", email="new@example.com", password="x"), self.db))
+        user = await users_repo.repo_user_authentication_by_email("user3@example.com", self.db)
+        await self.assert_no_full_scans(users_repo.repo_update_refresh_token(user, "token", self.db))
+        await self.assert_no_full_scans(users_repo.confirmed_email("user3@example.com", self.db))
+        await self.assert_no_full_scans(users_repo.update_avatar("user3@example.com", "avatar", self.db))
+        await self.assert_no_full_scans(users_repo.add_reset_token_to_db(user, "reset", self.db))
+        await self.assert_no_full_scans(users_repo.repo_update_password(user, "hash", self.db))
+        await self.assert_no_full_scans(users_repo.repo_set_feed_token(user, "feed-hash", self.db))
+        await self.assert_no_full_scans(users_repo.repo_get_user_by_feed_token("feed-hash", self.db))
@@ -0,0 +1,413 @@
+import datetime
+
+import msgpack
+import pytest
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
+from sqlalchemy.pool import StaticPool
+from jose import jwt
+
+from src.DB.db import get_db
+from src.DB.models import Base, Contact, User
+from src.conf.config import settings
+from src.routes.contacts import encode_sync_token
+from src.services.autocomplete import autocomplete_cache
+from src.services.birthday_feed import birthday_feed_cache
+from src.services.authservice import authservice as auth_service
+from src.services.tracing import InMemoryExporter, TraceIdRatioSampler, tracer
+from main import app
+
+engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+async_session = async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+
+current_user = User(id=1, username="deadpool", email="deadpool@example.com", password="x", is_activated=True)
+
+
+async def seed():
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.drop_all)
+        await connection.run_sync(Base.metadata.create_all)
+    async with async_session() as session:
+        session.add(User(id=1, username="deadpool", email="deadpool@example.com", password="x", is_activated=True))
+        session.add(Contact(id=1, first_name="Wade", last_name="Wilson", email="wade@example.com", phone="0",
+                            b_day=datetime.date(1991, 2, 1), rest_data="x" * 1000, user_id=1))
+        session.add(Contact(id=2, first_name="Peter", last_name="Parker", email="peter@example.com", phone="1",
+                            b_day=datetime.date(2001, 8, 10), user_id=1))
+        await session.commit()
+
+
+@pytest.fixture(scope="module")
+def contacts_client():
+    async def override_get_db():
+        async with async_session() as session:
+            yield session
+
+    async def override_get_current_user():
+        return current_user
+
+    saved_overrides = dict(app.dependency_overrides)
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[auth_service.get_current_user] = override_get_current_user
+    with TestClient(app) as client:
+        client.portal.call(seed)
+        yield client
+    app.dependency_overrides.clear()
+    app.dependency_overrides.update(saved_overrides)
+
+
+def test_get_contacts_full_rows(contacts_client):
+    response = contacts_client.get("/contacts/")
+    assert response.status_code == 200, response.text
+    payload = response.json()
+    assert [contact["id"] for contact in payload] == [1, 2]
+    assert payload[0]["rest_data"] == "x" * 1000
+    assert payload[1]["rest_data"] is None
+
+
+def test_get_contacts_sparse_fields(contacts_client):
+    response = contacts_client.get("/contacts/", params={"fields": "first_name,last_name"})
+    assert response.status_code == 200, response.text
+    assert response.json() == [{"id": 1, "first_name": "Wade", "last_name": "Wilson"},
+                               {"id": 2, "first_name": "Peter", "last_name": "Parker"}]
+
+
+def test_get_contact_by_id_sparse_fields(contacts_client):
+    response = contacts_client.get("/contacts/1", params={"fields": "email"})
+    assert response.status_code == 200, response.text
+    assert response.json() == {"id": 1, "email": "wade@example.com"}
+
+
+def test_get_contacts_query_sparse_fields(contacts_client):
+    response = contacts_client.get("/contacts/query/", params={"query": "park", "fields": "b_day"})
+    assert response.status_code == 200, response.text
+    assert response.json() == [{"id": 2, "b_day": "2001-08-10"}]
+
+
+def test_get_contacts_total_count(contacts_client):
+    total = int(contacts_client.get("/contacts/", params={"limit": 1}).headers["X-Total-Count"])
+    created = contacts_client.post("/contacts/", json={"first_name": "Logan", "last_name": "Howlett",
+                                                       "email": "logan@example.com", "phone": "5",
+                                                       "b_day": "1950-05-05"}).json()
+    assert contacts_client.get("/contacts/").headers["X-Total-Count"] == str(total + 1)
+    assert contacts_client.delete(f"/contacts/{created['id']}").status_code == 200
+    assert contacts_client.get("/contacts/").headers["X-Total-Count"] == str(total)
+
+
+def test_get_contacts_query_capped_count(contacts_client, monkeypatch):
+    response = contacts_client.get("/contacts/query/", params={"query": "example"})
+    assert response.headers["X-Total-Count-Exact"] == "true"
+    assert int(response.headers["X-Total-Count"]) >= 2
+    monkeypatch.setattr(settings, "contacts_search_count_cap", 1)
+    response = contacts_client.get("/contacts/query/", params={"query": "example"})
+    assert response.headers["X-Total-Count"] == "1"
+    assert response.headers["X-Total-Count-Exact"] == "false"
+
+
+@pytest.mark.parametrize("cache_enabled", [True, False])
+def test_autocomplete(contacts_client, monkeypatch, cache_enabled):
+    monkeypatch.setattr(settings, "autocomplete_cache_enabled", cache_enabled)
+    autocomplete_cache.clear()
+    response = contacts_client.get("/contacts/autocomplete", params={"prefix": "PE"})
+    assert response.status_code == 200, response.text
+    assert [contact["id"] for contact in response.json()] == [2]
+    assert set(response.json()[0]) == {"id", "first_name", "last_name", "email"}
+
+    created = contacts_client.post("/contacts/", json={"first_name": "Pepper", "last_name": "Potts",
+                                                       "email": "pepper@example.com", "phone": "6",
+                                                       "b_day": "1980-01-01"}).json()
+    response = contacts_client.get("/contacts/autocomplete", params={"prefix": "pe"})
+    assert [contact["id"] for contact in response.json()] == [2, created["id"]]
+    assert contacts_client.delete(f"/contacts/{created['id']}").status_code == 200
+    assert contacts_client.get("/contacts/autocomplete", params={"prefix": "pep"}).json() == []
+
+
+def test_autocomplete_prefix_is_literal(contacts_client, monkeypatch):
+    monkeypatch.setattr(settings, "autocomplete_cache_enabled", False)
+    assert contacts_client.get("/contacts/autocomplete", params={"prefix": "%"}).json() == []
+
+
+@pytest.fixture
+def compressed_notes_contact(contacts_client):
+    # Нотатки довші за rest_data_compression_threshold зберігаються стиснутими; не-ASCII символи і null в полях
+    created = contacts_client.post("/contacts/", json={"first_name": "Тарас", "last_name": "Zzz \"quoted\"",
+                                                       "email": "taras@example.com", "phone": "7",
+                                                       "b_day": "1814-03-09", "rest_data": "нотатка ✓ " * 300})
+    assert created.status_code == 201, created.text
+    yield created.json()
+    assert contacts_client.delete(f"/contacts/{created.json()['id']}").status_code == 200
+
+
+@pytest.mark.parametrize("path, params", [
+    ("/contacts/", {}),
+    ("/contacts/", {"fields": "b_day,email", "limit": 1, "offset": 1}),
+    ("/contacts/", {"fields": "rest_data,b_day"}),
+    ("/contacts/", {"sort": "b_day", "descending": "true", "limit": 2}),
+    ("/contacts/", {"sort": "last_name", "has_notes": "true"}),
+    ("/contacts/query/", {"query": "example"}),
+    ("/contacts/query/", {"query": "park", "fields": "b_day"}),
+])
+def test_fast_read_path_matches_orm_path(contacts_client, compressed_notes_contact, monkeypatch, path, params):
+    monkeypatch.setattr(settings, "contacts_fast_read_endpoints", [])
+    orm_response = contacts_client.get(path, params=params)
+    monkeypatch.setattr(settings, "contacts_fast_read_endpoints", ["list", "query"])
+    fast_response = contacts_client.get(path, params=params)
+    assert fast_response.status_code == orm_response.status_code == 200, fast_response.text
+    assert fast_response.content == orm_response.content
+    for header in ("content-type", "X-Total-Count", "X-Total-Count-Exact", "X-Next-Cursor"):
+        assert fast_response.headers.get(header) == orm_response.headers.get(header), header
+
+
+def test_fast_read_path_msgpack(contacts_client, monkeypatch):
+    monkeypatch.setattr(settings, "contacts_fast_read_endpoints", ["list"])
+    response = contacts_client.get("/contacts/", params={"fields": "b_day"}, headers={"Accept": "application/msgpack"})
+    assert response.headers["content-type"] == "application/msgpack"
+    assert msgpack.unpackb(response.content) == [{"id": 1, "b_day": "1991-02-01"}, {"id": 2, "b_day": "2001-08-10"}]
+
+
+def test_get_contacts_unknown_field(contacts_client):
+    response = contacts_client.get("/contacts/", params={"fields": "first_name,password"})
+    assert response.status_code == 422
+    assert response.json()["detail"] == "Unknown contact fields: password"
+
+
+def test_get_contacts_msgpack(contacts_client):
+    response = contacts_client.get("/contacts/", params={"fields": "first_name"},
+                                   headers={"Accept": "application/msgpack"})
+    assert response.status_code == 200, response.text
+    assert response.headers["content-type"] == "application/msgpack"
+    assert "Accept" in response.headers["vary"]
+    assert msgpack.unpackb(response.content) == [{"id": 1, "first_name": "Wade"}, {"id": 2, "first_name": "Peter"}]
+
+
+def test_get_contacts_json_preferred_over_msgpack(contacts_client):
+    response = contacts_client.get("/contacts/1", params={"fields": "email"},
+                                   headers={"Accept": "application/json, application/msgpack;q=0.5"})
+    assert response.headers["content-type"] == "application/json"
+
+
+@pytest.mark.parametrize("encoding", ["gzip", "br"])
+def test_get_contacts_compressed_above_threshold(contacts_client, encoding):
+    response = contacts_client.get("/contacts/", headers={"Accept-Encoding": encoding})
+    assert response.status_code == 200, response.text
+    assert response.headers["content-encoding"] == encoding
+    assert response.json()[0]["rest_data"] == "x" * 1000
+
+
+def test_get_contacts_small_response_not_compressed(contacts_client):
+    response = contacts_client.get("/contacts/", params={"fields": "first_name"},
+                                   headers={"Accept-Encoding": "gzip, br"})
+    assert "content-encoding" not in response.headers
+
+
+def test_contact_changes_since_token(contacts_client):
+    response = contacts_client.get("/contacts/changes")
+    assert response.status_code == 200, response.text
+    initial = response.json()
+    assert {contact["id"] for contact in initial["changed"]} >= {1, 2}
+    assert initial["has_more"] is False
+
+    created = contacts_client.post("/contacts/", json={"first_name": "Bruce", "last_name": "Banner",
+                                                       "email": "bruce@example.com", "phone": "2",
+                                                       "b_day": "1970-12-18"}).json()
+    contacts_client.put(f"/contacts/{created['id']}", json={**created, "phone": "3"})
+    assert contacts_client.delete("/contacts/2").status_code == 200
+
+    response = contacts_client.get("/contacts/changes", params={"since": initial["next_since"]})
+    changes = response.json()
+    assert [contact["id"] for contact in changes["changed"]] == [created["id"]]
+    assert changes["changed"][0]["phone"] == "3"
+    assert changes["deleted"] == [2]
+    assert contacts_client.get("/contacts/2").status_code == 404
+
+    response = contacts_client.get("/contacts/changes", params={"since": changes["next_since"]})
+    assert response.json()["changed"] == [] and response.json()["deleted"] == []
+
+
+def test_contact_changes_expired_token(contacts_client):
+    issued_at = datetime.datetime.utcnow() - datetime.timedelta(days=settings.contacts_tombstone_retention_days + 1)
+    expired = jwt.encode({"sub": "1", "ver": 5, "iat": issued_at, "exp": issued_at + datetime.timedelta(days=1),
+                          "scope": "sync_token"}, key=settings.secret_key, algorithm=settings.algorithm)
+    response = contacts_client.get("/contacts/changes", params={"since": expired})
+    assert response.status_code == 410
+    response = contacts_client.get("/contacts/changes", params={"since": "garbage"})
+    assert response.status_code == 400
+
+
+def test_contact_changes_rejects_forged_token(contacts_client):
+    forged = jwt.encode({"sub": "1", "ver": 0, "scope": "sync_token"}, key="not-the-secret",
+                        algorithm=settings.algorithm)
+    assert contacts_client.get("/contacts/changes", params={"since": forged}).status_code == 400
+    other_user = encode_sync_token(0, user_id=2)
+    assert contacts_client.get("/contacts/changes", params={"since": other_user}).status_code == 400
+
+
+def test_contact_events_websocket(contacts_client):
+    token = contacts_client.portal.call(auth_service.create_access_token, {"sub": current_user.email})
+    with contacts_client.websocket_connect(f"/contacts/stream/ws?token={token}") as websocket:
+        created = contacts_client.post("/contacts/", json={"first_name": "Natasha", "last_name": "Romanoff",
+                                                           "email": "natasha@example.com", "phone": "4",
+                                                           "b_day": "1984-11-22"}).json()
+        event = websocket.receive_json()
+        assert event["type"] == "created"
+        assert event["id"] == created["id"]
+
+
+def test_contact_events_websocket_requires_valid_token(contacts_client):
+    with pytest.raises(WebSocketDisconnect) as exc:
+        with contacts_client.websocket_connect("/contacts/stream/ws?token=invalid") as websocket:
+            websocket.receive_json()
+    assert exc.value.code == 1008
+
+
+def feed_uids(text: str) -> set[str]:
+    return {line[len("UID:"):] for line in text.split("\r\n") if line.startswith("UID:")}
+
+
+def test_birthday_feed(contacts_client):
+    birthday_feed_cache.clear()
+    assert contacts_client.get("/contacts/birthdays.ics", params={"token": "invalid"}).status_code == 401
+
+    issued = contacts_client.post("/contacts/birthdays/feed-token")
+    assert issued.status_code == 200, issued.text
+    token = issued.json()["token"]
+    assert issued.json()["feed_url"].endswith(f"/contacts/birthdays.ics?token={token}")
+
+    response = contacts_client.get("/contacts/birthdays.ics", params={"token": token})
+    assert response.status_code == 200, response.text
+    assert response.headers["content-type"] == "text/calendar; charset=utf-8"
+    assert response.text.startswith("BEGIN:VCALENDAR\r\n") and response.text.endswith("END:VCALENDAR\r\n")
+    assert "contact-1-birthday@contacts-api" in feed_uids(response.text)
+    etag, last_modified = response.headers["etag"], response.headers["last-modified"]
+
+    assert contacts_client.get("/contacts/birthdays.ics", params={"token": token},
+                               headers={"If-None-Match": etag}).status_code == 304
+    assert contacts_client.get("/contacts/birthdays.ics", params={"token": token},
+                               headers={"If-Modified-Since": last_modified}).status_code == 304
+
+    rebuilds = birthday_feed_cache.stats["rebuilds"]
+    created = contacts_client.post("/contacts/", json={"first_name": "Steve", "last_name": "Rogers",
+                                                       "email": "steve@example.com", "phone": "5",
+                                                       "b_day": "1920-07-04"}).json()
+    response = contacts_client.get("/contacts/birthdays.ics", params={"token": token},
+                                   headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+    assert f"contact-{created['id']}-birthday@contacts-api" in feed_uids(response.text)
+    assert "DTSTART;VALUE=DATE:19200704" in response.text
+
+    assert contacts_client.delete(f"/contacts/{created['id']}").status_code == 200
+    response = contacts_client.get("/contacts/birthdays.ics", params={"token": token})
+    assert f"contact-{created['id']}-birthday@contacts-api" not in feed_uids(response.text)
+    assert birthday_feed_cache.stats["rebuilds"] == rebuilds
+
+    # Повна перебудова дає ту саму стрічку, що й доповнення змінами
+    birthday_feed_cache.clear()
+    assert contacts_client.get("/contacts/birthdays.ics", params={"token": token}).text == response.text
+
+
+def test_birthday_feed_streams_large_books_uncached(contacts_client, monkeypatch):
+    token = contacts_client.post("/contacts/birthdays/feed-token").json()["token"]
+    cached = contacts_client.get("/contacts/birthdays.ics", params={"token": token})
+    birthday_feed_cache.clear()
+    monkeypatch.setattr(birthday_feed_cache, "max_contacts", 0)
+
+    response = contacts_client.get("/contacts/birthdays.ics", params={"token": token})
+    assert response.status_code == 200
+    assert feed_uids(response.text) == feed_uids(cached.text)
+    assert response.headers["etag"] == cached.headers["etag"]
+    assert "last-modified" not in response.headers
+    assert birthday_feed_cache.get(current_user.id) is None
+    assert contacts_client.get("/contacts/birthdays.ics", params={"token": token},
+                               headers={"If-None-Match": response.headers["etag"]}).status_code == 304
+
+
+def test_birthday_feed_token_rotation_and_revocation(contacts_client):
+    old_token = contacts_client.post("/contacts/birthdays/feed-token").json()["token"]
+    new_token = contacts_client.post("/contacts/birthdays/feed-token").json()["token"]
+    assert contacts_client.get("/contacts/birthdays.ics", params={"token": old_token}).status_code == 401
+    assert contacts_client.get("/contacts/birthdays.ics", params={"token": new_token}).status_code == 200
+
+    assert contacts_client.delete("/contacts/birthdays/feed-token").status_code == 204
+    assert contacts_client.get("/contacts/birthdays.ics", params={"token": new_token}).status_code == 401
+
+
+def test_create_contact_idempotency_key(contacts_client):
+    body = {"first_name": "Tony", "last_name": "Stark", "email": "tony@example.com", "phone": "6",
+            "b_day": "1970-05-29"}
+    first = contacts_client.post("/contacts/", json=body, headers={"Idempotency-Key": "create-tony"})
+    retry = contacts_client.post("/contacts/", json=body, headers={"Idempotency-Key": "create-tony"})
+    assert first.status_code == retry.status_code == 201
+    assert retry.json()["id"] == first.json()["id"]
+    assert retry.headers["idempotent-replayed"] == "true"
+    tonies = contacts_client.get("/contacts/query/", params={"query": "stark"}).json()
+    assert [contact["id"] for contact in tonies] == [first.json()["id"]]
+
+
+def read_all_pages(client, params: dict, limit: int = 2) -> list[dict]:
+    contacts, cursor = [], None
+    while True:
+        response = client.get("/contacts/", params={**params, "limit": limit, **({"after": cursor} if cursor else {})})
+        assert response.status_code == 200, response.text
+        assert "x-total-count" not in response.headers
+        contacts += response.json()
+        cursor = response.headers.get("x-next-cursor")
+        if cursor is None:
+            return contacts
+
+
+@pytest.mark.parametrize("fast_path", [True, False])
+def test_get_contacts_sorted_keyset_pages(contacts_client, monkeypatch, fast_path):
+    monkeypatch.setattr(settings, "contacts_fast_read_endpoints", ["list"] if fast_path else [])
+    everyone = contacts_client.get("/contacts/", params={"limit": 100}).json()
+
+    by_last_name = read_all_pages(contacts_client, {"sort": "last_name", "fields": "first_name"})
+    assert [(c["last_name"], c["id"]) for c in by_last_name] == sorted((c["last_name"], c["id"]) for c in everyone)
+    assert set(by_last_name[0]) == {"id", "first_name", "last_name"}
+
+    by_b_day_desc = read_all_pages(contacts_client, {"sort": "-b_day"})
+    assert [c["id"] for c in by_b_day_desc] == [c["id"] for c in sorted(everyone, key=lambda c: (c["b_day"], c["id"]),
+                                                                        reverse=True)]
+
+
+@pytest.mark.parametrize("params, expected", [
+    ({"name_prefix": "WA"}, lambda c: c["first_name"].lower().startswith("wa") or
+                                      c["last_name"].lower().startswith("wa")),
+    ({"b_day_from": "1970-01-01", "b_day_to": "1990-12-31", "sort": "b_day"},
+     lambda c: "1970-01-01" <= c["b_day"] <= "1990-12-31"),
+    ({"email_domain": "EXAMPLE.com"}, lambda c: c["email"].endswith("@example.com")),
+    ({"has_notes": "true"}, lambda c: c["rest_data"] is not None),
+    ({"has_notes": "false", "sort": "first_name"}, lambda c: c["rest_data"] is None),
+])
+def test_get_contacts_filters(contacts_client, params, expected):
+    everyone = contacts_client.get("/contacts/", params={"limit": 100}).json()
+    filtered = read_all_pages(contacts_client, params)
+    assert sorted(c["id"] for c in filtered) == sorted(c["id"] for c in everyone if expected(c))
+    assert filtered
+
+
+@pytest.mark.parametrize("params, status_code", [
+    ({"sort": "email"}, 422),
+    ({"name_prefix": "wa", "email_domain": "example.com"}, 422),
+    ({"b_day_from": "1970-01-01", "sort": "last_name"}, 422),
+    ({"sort": "last_name", "after": "garbage"}, 400),
+    ({"sort": "b_day", "after": "WyJpZCIsIDEsIDFd"}, 400),
+    ({"sort": "id", "after": "WyJpZCIsIDEsIDFd", "offset": 5}, 422),
+])
+def test_get_contacts_rejects_unsupported_list_parameters(contacts_client, params, status_code):
+    assert contacts_client.get("/contacts/", params=params).status_code == status_code
+
+
+def test_get_contact_by_id_traced(contacts_client, monkeypatch):
+    exporter = InMemoryExporter()
+    monkeypatch.setattr(tracer, "exporter", exporter)
+    monkeypatch.setattr(tracer, "sampler", TraceIdRatioSampler(1.0))
+    monkeypatch.setattr(tracer, "enabled", True)
+    assert contacts_client.get("/contacts/1").status_code == 200
+    spans = {span.name: span for span in exporter.spans}
+    route, endpoint = spans["route /contacts/{id}"], spans["endpoint.get_contact_by_id"]
+    assert route.parent_id is None
+    assert endpoint.parent_id == route.span_id
+    assert spans["contacts_repo.repo_get_contact_by_id"].parent_id == endpoint.span_id
+    assert spans["response.render"].parent_id == route.span_id
+    assert {span.trace_id for span in exporter.spans} == {route.trace_id}
@@ -0,0 +1,58 @@
+import unittest
+
+from src.services.autocomplete import ContactTrie, AutocompleteCache
+
+CONTACTS = [
+    {"id": 2, "first_name": "Peter", "last_name": "Parker", "email": "spidey@example.com"},
+    {"id": 1, "first_name": "Wade", "last_name": "Wilson", "email": "wade@example.com"},
+    {"id": 3, "first_name": "Wanda", "last_name": "Maximoff", "email": "wanda@example.com"},
+]
+
+
+class TestContactTrie(unittest.TestCase):
+    def setUp(self):
+        self.trie = ContactTrie(CONTACTS)
+
+    def test_search_matches_any_field_case_insensitive(self):
+        self.assertEqual([c["id"] for c in self.trie.search("WA", 10)], [1, 3])
+        self.assertEqual([c["id"] for c in self.trie.search("par", 10)], [2])
+        self.assertEqual([c["id"] for c in self.trie.search("spi", 10)], [2])
+
+    def test_contact_listed_once_when_fields_share_prefix(self):
+        self.assertEqual([c["id"] for c in self.trie.search("w", 10)], [1, 3])
+
+    def test_search_limit_and_missing_prefix(self):
+        self.assertEqual([c["id"] for c in self.trie.search("w", 1)], [1])
+        self.assertEqual(self.trie.search("xyz", 10), [])
+
+
+class TestAutocompleteCache(unittest.TestCase):
+    def test_invalidate_drops_trie(self):
+        cache = AutocompleteCache()
+        cache.put(1, ContactTrie(CONTACTS), 5)
+        self.assertIsNotNone(cache.get(1, 5))
+        cache.invalidate(1)
+        self.assertIsNone(cache.get(1, 5))
+
+    def test_trie_of_other_version_is_not_returned(self):
+        # Контакти змінено через інший воркер: цей процес не отримував invalidate()
+        cache = AutocompleteCache()
+        cache.put(1, ContactTrie(CONTACTS), 5)
+        self.assertIsNone(cache.get(1, 6))
+        self.assertIsNone(cache.get(1, 5))
+        self.assertEqual(cache.stats, {"hits": 0, "misses": 2, "invalidations": 1})
+
+    def test_trie_of_older_version_is_not_stored(self):
+        cache = AutocompleteCache()
+        cache.put(1, ContactTrie(CONTACTS), 6)
+        cache.put(1, ContactTrie([]), 5)
+        self.assertEqual(len(cache.get(1, 6).contacts), 3)
+
+    def test_least_recently_used_user_evicted(self):
+        cache = AutocompleteCache(max_users=2)
+        for user_id in (1, 2):
+            cache.put(user_id, ContactTrie([]), 0)
+        cache.get(1, 0)
+        cache.put(3, ContactTrie([]), 0)
+        self.assertIsNone(cache.get(2, 0))
+        self.assertIsNotNone(cache.get(1, 0))
@@ -0,0 +1,90 @@
+import datetime
+import unittest
+from types import SimpleNamespace
+
+from src.services.birthday_feed import FeedEntry, BirthdayFeedCache, escape_text, fold_line, render_event, \
+    etag_matches, not_modified_since, http_date
+
+UPDATED_AT = datetime.datetime(2026, 10, 1, 12, 30, 15)
+
+
+def contact(id: int, version: int, b_day=datetime.date(1991, 2, 1), first_name="Wade", last_name="Wilson",
+            deleted_at=None):
+    return SimpleNamespace(id=id, version=version, first_name=first_name, last_name=last_name, b_day=b_day,
+                           updated_at=UPDATED_AT, deleted_at=deleted_at)
+
+
+class TestRendering(unittest.TestCase):
+    def test_event(self):
+        event = render_event(contact(7, 1))
+        self.assertEqual(event.split("\r\n"), [
+            "BEGIN:VEVENT",
+            "UID:contact-7-birthday@contacts-api",
+            "DTSTAMP:20261001T123015Z",
+            "DTSTART;VALUE=DATE:19910201",
+            "RRULE:FREQ=YEARLY",
+            "SUMMARY:Birthday: Wade Wilson",
+            "TRANSP:TRANSPARENT",
+            "END:VEVENT",
+            "",
+        ])
+
+    def test_leap_day_birthday_falls_on_last_day_of_february(self):
+        event = render_event(contact(7, 1, b_day=datetime.date(1996, 2, 29)))
+        self.assertIn("RRULE:FREQ=YEARLY;BYMONTH=2;BYMONTHDAY=-1\r\n", event)
+
+    def test_escape_text(self):
+        self.assertEqual(escape_text("a,b;c\\d\ne"), "a\\,b\\;c\\\\d\\ne")
+
+    def test_fold_long_utf8_line(self):
+        line = "SUMMARY:" + "День народження " * 10
+        folded = fold_line(line)
+        physical = folded[:-2].split("\r\n")
+        self.assertTrue(all(len(part.encode()) <= 75 for part in physical))
+        self.assertTrue(all(part.startswith(" ") for part in physical[1:]))
+        self.assertEqual("".join(part[1:] if i else part for i, part in enumerate(physical)), line)
+
+
+class TestConditionalRequests(unittest.TestCase):
+    def test_etag_matches(self):
+        self.assertTrue(etag_matches('"a", "bday-1-5"', '"bday-1-5"'))
+        self.assertTrue(etag_matches('W/"bday-1-5"', '"bday-1-5"'))
+        self.assertTrue(etag_matches("*", '"bday-1-5"'))
+        self.assertFalse(etag_matches('"bday-1-4"', '"bday-1-5"'))
+        self.assertFalse(etag_matches(None, '"bday-1-5"'))
+
+    def test_not_modified_since(self):
+        self.assertTrue(not_modified_since(http_date(UPDATED_AT), UPDATED_AT))
+        self.assertFalse(not_modified_since(http_date(UPDATED_AT - datetime.timedelta(seconds=1)), UPDATED_AT))
+        self.assertFalse(not_modified_since("garbage", UPDATED_AT))
+        self.assertFalse(not_modified_since(http_date(UPDATED_AT), None))
+
+
+class TestFeedEntry(unittest.TestCase):
+    def test_apply_updates_and_removes_events(self):
+        entry = FeedEntry(version=0, events={1: render_event(contact(1, 0)), 2: render_event(contact(2, 0))})
+        entry.apply([contact(1, 1, first_name="Deadpool"), contact(2, 2, deleted_at=UPDATED_AT), contact(3, 3)])
+        self.assertEqual(entry.version, 3)
+        self.assertEqual(sorted(entry.events), [1, 3])
+        self.assertIn("Birthday: Deadpool Wilson", entry.events[1])
+        self.assertEqual(entry.last_modified, UPDATED_AT)
+
+    def test_apply_skips_already_applied_versions(self):
+        entry = FeedEntry(version=0)
+        entry.apply([contact(1, 1), contact(1, 2, first_name="Deadpool")])
+        entry.apply([contact(1, 1)])
+        self.assertEqual(entry.version, 2)
+        self.assertIn("Deadpool", entry.events[1])
+
+
+class TestBirthdayFeedCache(unittest.TestCase):
+    def test_put_keeps_newer_entry_and_evicts_least_recent(self):
+        cache = BirthdayFeedCache(max_users=2)
+        cache.put(1, FeedEntry(version=5))
+        cache.put(1, FeedEntry(version=4))
+        self.assertEqual(cache.get(1).version, 5)
+        cache.put(2, FeedEntry(version=1))
+        cache.get(1)
+        cache.put(3, FeedEntry(version=1))
+        self.assertIsNone(cache.get(2))
+        self.assertIsNotNone(cache.get(1))
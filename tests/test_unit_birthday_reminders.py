@@ -0,0 +1,115 @@
+import contextlib
+import datetime
+import os
+import tempfile
+import unittest
+
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from sqlalchemy.pool import StaticPool
+
+from src.DB.models import Base, Contact, User
+from src.DB.shards import ShardMap, DEFAULT_SHARD, create_shard_schema, move_user_contacts
+from src.repository.contacts_repo import upcoming_birthday_keys
+from src.services.birthday_reminders import BirthdayReminderJob
+
+
+class TestBirthdayReminderJob(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+        self.session_factory = async_sessionmaker(bind=self.engine, class_=AsyncSession, expire_on_commit=False)
+        self.checkpoint = os.path.join(tempfile.mkdtemp(), "checkpoint.json")
+        self.today = datetime.date(2023, 12, 29)
+        self.sent = []
+
+        async with self.engine.begin() as connection:
+            await connection.run_sync(Base.metadata.create_all)
+        async with self.session_factory() as session:
+            for user_id in (1, 2, 3):
+                session.add(User(id=user_id, username=f"user{user_id}", email=f"user{user_id}@example.com",
+                                 password="x", is_activated=user_id != 3))
+            for user_id, b_day in ((1, datetime.date(1990, 1, 2)), (1, datetime.date(1985, 12, 30)),
+                                   (1, datetime.date(1980, 6, 1)), (2, datetime.date(2000, 12, 29)),
+                                   (3, datetime.date(2000, 12, 29))):
+                session.add(Contact(first_name="John", last_name="Doe", email="john@example.com", phone="0",
+                                    b_day=b_day, user_id=user_id))
+            await session.commit()
+
+    async def asyncTearDown(self):
+        await self.engine.dispose()
+
+    async def sender(self, digests):
+        self.sent.append(list(digests))
+
+    def test_upcoming_birthday_keys_wraps_year(self):
+        keys = upcoming_birthday_keys(self.today, 7)
+        self.assertEqual(keys, [1229, 1230, 1231, 101, 102, 103, 104, 105])
+
+    def test_upcoming_birthday_keys_includes_leap_day(self):
+        self.assertIn(229, upcoming_birthday_keys(datetime.date(2023, 2, 25), 7))
+
+    async def test_run_groups_contacts_per_user_in_batches(self):
+        job = BirthdayReminderJob(session_factory=self.session_factory, sender=self.sender, batch_size=1,
+                                  checkpoint_path=self.checkpoint)
+        report = await job.run(self.today)
+
+        self.assertEqual(report["contacts"], 3)
+        self.assertEqual(report["users"], 2)
+        self.assertEqual(report["batches"], 2)
+        first_digest = self.sent[0][0]
+        self.assertEqual(first_digest.email, "user1@example.com")
+        self.assertEqual([c["b_day"] for c in first_digest.contacts],
+                         [datetime.date(1985, 12, 30), datetime.date(1990, 1, 2)])
+
+    async def test_run_resumes_from_checkpoint(self):
+        async def failing_sender(digests):
+            if digests[0].user_id == 2:
+                raise ConnectionError("SMTP is down")
+            await self.sender(digests)
+
+        job = BirthdayReminderJob(session_factory=self.session_factory, sender=failing_sender, batch_size=1,
+                                  checkpoint_path=self.checkpoint)
+        with self.assertRaises(ConnectionError):
+            await job.run(self.today)
+
+        job.sender = self.sender
+        report = await job.run(self.today)
+        self.assertEqual(report["resumed_after_user_id"], 1)
+        self.assertEqual([batch[0].user_id for batch in self.sent], [1, 2])
+
+    async def test_run_releases_session_before_sending(self):
+        open_sessions = []
+
+        @contextlib.asynccontextmanager
+        async def tracking_session_factory():
+            async with self.session_factory() as session:
+                open_sessions.append(session)
+                try:
+                    yield session
+                finally:
+                    open_sessions.remove(session)
+
+        async def sender(digests):
+            self.assertEqual(open_sessions, [])
+            await self.sender(digests)
+
+        job = BirthdayReminderJob(session_factory=tracking_session_factory, sender=sender, batch_size=1,
+                                  checkpoint_path=self.checkpoint)
+        report = await job.run(self.today)
+        self.assertEqual(report["batches"], 2)
+
+    async def test_run_reads_contacts_of_moved_user_from_shard(self):
+        shard = create_async_engine(f"sqlite+aiosqlite:///{os.path.join(tempfile.mkdtemp(), 'shard_1.db')}")
+        await create_shard_schema(shard)
+        shards = ShardMap({DEFAULT_SHARD: self.engine, "shard_1": shard})
+        await move_user_contacts("user2@example.com", "shard_1", shards=shards, session_factory=self.session_factory)
+
+        job = BirthdayReminderJob(session_factory=self.session_factory, sender=self.sender, batch_size=10,
+                                  checkpoint_path=self.checkpoint, shards=shards)
+        report = await job.run(self.today)
+        await shard.dispose()
+
+        self.assertEqual(report["contacts"], 3)
+        digests = self.sent[0]
+        self.assertEqual([digest.user_id for digest in digests], [1, 2])
+        self.assertEqual(digests[1].email, "user2@example.com")
+        self.assertEqual([c["b_day"] for c in digests[1].contacts], [datetime.date(2000, 12, 29)])
@@ -0,0 +1,63 @@
+import datetime
+import unittest
+
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+
+from src.DB.models import Base, Contact, User
+from src.DB.types import PLAIN, ZLIB, pack_text, unpack_text
+
+
+class TestPackText(unittest.TestCase):
+    def test_small_value_stored_plain(self):
+        self.assertEqual(pack_text("note", threshold=10), PLAIN + b"note")
+
+    def test_large_value_compressed(self):
+        value = "long note " * 200
+        packed = pack_text(value, threshold=1024)
+        self.assertTrue(packed.startswith(ZLIB))
+        self.assertLess(len(packed), len(value))
+        self.assertEqual(unpack_text(packed), value)
+
+    def test_incompressible_value_stored_plain(self):
+        value = "".join(chr(0x4E00 + (i * 7919) % 20000) for i in range(1000))
+        packed = pack_text(value, threshold=16)
+        self.assertEqual(unpack_text(packed), value)
+        self.assertLessEqual(len(packed), len(value.encode("utf-8")) + 1)
+
+    def test_none(self):
+        self.assertIsNone(pack_text(None))
+        self.assertIsNone(unpack_text(None))
+
+
+class TestCompressedTextColumn(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.engine = create_async_engine("sqlite+aiosqlite://")
+        self.session_factory = async_sessionmaker(bind=self.engine, class_=AsyncSession, expire_on_commit=False)
+        async with self.engine.begin() as connection:
+            await connection.run_sync(Base.metadata.create_all)
+        self.notes = {1: "short", 2: "ünïcode note " * 500, 3: None}
+        async with self.session_factory() as session:
+            session.add(User(id=1, username="deadpool", email="deadpool@example.com", password="x"))
+            for contact_id, note in self.notes.items():
+                session.add(Contact(id=contact_id, first_name="Wade", last_name="Wilson", email="wade@example.com",
+                                    phone="0", b_day=datetime.date(1991, 2, 1), rest_data=note, user_id=1))
+            await session.commit()
+
+    async def asyncTearDown(self):
+        await self.engine.dispose()
+
+    async def test_round_trip_through_orm_and_core(self):
+        async with self.session_factory() as session:
+            contacts = (await session.execute(select(Contact).order_by(Contact.id))).scalars().all()
+            rows = (await session.execute(select(Contact.id, Contact.rest_data))).all()
+        self.assertEqual({contact.id: contact.rest_data for contact in contacts}, self.notes)
+        self.assertEqual(dict(rows), self.notes)
+
+    async def test_large_note_compressed_at_rest(self):
+        async with self.engine.connect() as connection:
+            stored = dict((await connection.execute(text("SELECT id, rest_data FROM contacts"))).all())
+        self.assertEqual(stored[1], PLAIN + b"short")
+        self.assertTrue(stored[2].startswith(ZLIB))
+        self.assertLess(len(stored[2]), len(self.notes[2].encode("utf-8")) // 10)
+        self.assertIsNone(stored[3])
@@ -0,0 +1,195 @@
+import datetime
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+
+import redis.asyncio as redis
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+
+from src.DB.models import Base, Contact, User
+from src.conf.config import settings
+from src.repository.contacts_read_repo import repo_read_contacts
+from src.repository.contacts_repo import repo_create_new_contact, repo_get_contact_by_id, repo_get_contacts, \
+    repo_get_contacts_query
+from src.schemas.Contacts_Schemas import ContactCreate, ContactListFilters
+from src.services.contact_cache import ContactCache, InMemoryCacheBackend, contact_cache, create_backend, \
+    decode_result, encode_result
+from src.services.serialization import encode_rows
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class FailingBackend:
+    async def get(self, key):
+        raise redis.ConnectionError("down")
+
+    async def set(self, key, value, ttl=None, nx=False):
+        raise redis.ConnectionError("down")
+
+    async def incr(self, key, initial):
+        raise redis.ConnectionError("down")
+
+
+class TestCodec(unittest.TestCase):
+    def test_contacts_round_trip(self):
+        contact = Contact(id=1, first_name="Wade", last_name="Wilson", email="wade@example.com", phone="0",
+                          b_day=datetime.date(1991, 2, 1), rest_data=None, user_id=1,
+                          updated_at=datetime.datetime(2024, 5, 1, 12, 30), version=3)
+        [restored] = decode_result(encode_result([contact]))
+        self.assertIsInstance(restored, Contact)
+        self.assertEqual((restored.b_day, restored.updated_at, restored.version),
+                         (contact.b_day, contact.updated_at, 3))
+        self.assertEqual(decode_result(encode_result(contact)).first_name, "Wade")
+
+    def test_partially_loaded_contact_keeps_unset_fields_unset(self):
+        restored = decode_result(encode_result(Contact(id=1, email="wade@example.com")))
+        self.assertEqual(set(restored.__dict__) - {"_sa_instance_state"}, {"id", "email"})
+
+    def test_rows_round_trip(self):
+        class Row(tuple):
+            _fields = ("id", "b_day")
+
+        rows = decode_result(encode_result([Row((1, datetime.date(1991, 2, 1)))]))
+        self.assertEqual(rows[0]._fields, ("id", "b_day"))
+        self.assertEqual(encode_rows(rows), [{"id": 1, "b_day": "1991-02-01"}])
+        self.assertEqual(decode_result(encode_result([])), [])
+
+    def test_unsupported_results_are_not_cached(self):
+        self.assertIsNone(encode_result({"message": "deleted"}))
+        self.assertIsNone(encode_result(None))
+
+
+class TestContactCache(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.clock = FakeClock()
+        self.cache = ContactCache(InMemoryCacheBackend(clock=self.clock), ttl=60)
+        self.loads = 0
+        settings_patch = patch.object(settings, "contacts_cache_enabled", True)
+        settings_patch.start()
+        self.addCleanup(settings_patch.stop)
+
+    async def load(self):
+        self.loads += 1
+        return [Contact(id=self.loads, first_name="Wade")]
+
+    async def test_read_through_and_generation_bump(self):
+        first = await self.cache.fetch(1, "repo_get_contacts", (("limit", 10),), self.load)
+        second = await self.cache.fetch(1, "repo_get_contacts", (("limit", 10),), self.load)
+        self.assertEqual((first[0].id, second[0].id, self.loads), (1, 1, 1))
+
+        await self.cache.fetch(1, "repo_get_contacts", (("limit", 20),), self.load)
+        await self.cache.fetch(2, "repo_get_contacts", (("limit", 10),), self.load)
+        self.assertEqual(self.loads, 3)
+
+        await self.cache.bump(1)
+        third = await self.cache.fetch(1, "repo_get_contacts", (("limit", 10),), self.load)
+        other_user = await self.cache.fetch(2, "repo_get_contacts", (("limit", 10),), self.load)
+        self.assertEqual((third[0].id, other_user[0].id, self.loads), (4, 3, 4))
+        self.assertEqual(self.cache.stats, {"hits": 2, "misses": 4, "stores": 4, "errors": 0})
+
+    async def test_entries_expire(self):
+        await self.cache.fetch(1, "repo_get_contacts", (), self.load)
+        self.clock.now = 60
+        await self.cache.fetch(1, "repo_get_contacts", (), self.load)
+        self.assertEqual(self.loads, 2)
+
+    async def test_workers_share_backend(self):
+        other_worker = ContactCache(self.cache.backend, ttl=60)
+        await self.cache.fetch(1, "repo_get_contacts", (), self.load)
+        self.assertEqual((await other_worker.fetch(1, "repo_get_contacts", (), self.load))[0].id, 1)
+        await other_worker.bump(1)
+        self.assertEqual((await self.cache.fetch(1, "repo_get_contacts", (), self.load))[0].id, 2)
+
+    async def test_unavailable_backend_falls_back_to_database(self):
+        cache = ContactCache(FailingBackend())
+        self.assertEqual((await cache.fetch(1, "repo_get_contacts", (), self.load))[0].id, 1)
+        await cache.bump(1)
+        self.assertEqual(cache.stats["errors"], 2)
+
+
+class TestCachedRepository(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.engine = create_async_engine(f"sqlite+aiosqlite:///{os.path.join(tempfile.mkdtemp(), 'cache.db')}")
+        self.session_factory = async_sessionmaker(bind=self.engine, class_=AsyncSession, expire_on_commit=False)
+        async with self.engine.begin() as connection:
+            await connection.run_sync(Base.metadata.create_all)
+        async with self.session_factory() as session:
+            session.add(User(id=1, username="deadpool", email="deadpool@example.com", password="x",
+                             is_activated=True))
+            session.add(Contact(id=1, first_name="Wade", last_name="Wilson", email="wade@example.com", phone="0",
+                                b_day=datetime.date(1991, 2, 1), user_id=1))
+            await session.commit()
+        self.user = User(id=1)
+        self.queries = 0
+
+        def count_query(*args):
+            self.queries += 1
+
+        event.listen(self.engine.sync_engine, "before_cursor_execute", count_query)
+        self.patches = [patch.object(settings, "contacts_cache_enabled", True),
+                        patch.object(contact_cache, "backend", InMemoryCacheBackend())]
+        for active in self.patches:
+            active.start()
+
+    async def asyncTearDown(self):
+        for active in self.patches:
+            active.stop()
+        await self.engine.dispose()
+
+    async def test_pages_are_served_from_cache_until_write(self):
+        async with self.session_factory() as db:
+            first = await repo_get_contacts(db=db, user=self.user, limit=10, offset=0)
+        async with self.session_factory() as db:
+            cached = await repo_get_contacts(db=db, user=self.user, limit=10, offset=0)
+        self.assertEqual(self.queries, 1)
+        self.assertEqual([(c.id, c.first_name, c.b_day) for c in cached],
+                         [(c.id, c.first_name, c.b_day) for c in first])
+
+        async with self.session_factory() as db:
+            await repo_create_new_contact(self.user, ContactCreate(first_name="Peter", last_name="Parker",
+                                                                   email="peter@example.com", phone="1",
+                                                                   b_day=datetime.date(2001, 8, 10)), db)
+        self.queries = 0
+        async with self.session_factory() as db:
+            contacts = await repo_get_contacts(db=db, user=self.user, limit=10, offset=0)
+            found = await repo_get_contacts_query(user=self.user, query="park", limit=10, offset=0, db=db)
+            contact = await repo_get_contact_by_id(id=contacts[-1].id, user=self.user, db=db, fields=["email"])
+        self.assertEqual([c.first_name for c in contacts], ["Wade", "Peter"])
+        self.assertEqual([c.last_name for c in found], ["Parker"])
+        self.assertEqual(contact.email, "peter@example.com")
+        self.assertEqual(self.queries, 3)
+
+    async def test_fast_path_rows_and_filters(self):
+        filters = ContactListFilters(sort="b_day", descending=True)
+        async with self.session_factory() as db:
+            rows = await repo_read_contacts(db=db, user=self.user, limit=10, offset=0, fields=["first_name"],
+                                            filters=filters)
+            cached = await repo_read_contacts(db=db, user=self.user, limit=10, offset=0, fields=["first_name"],
+                                              filters=filters)
+            other = await repo_read_contacts(db=db, user=self.user, limit=10, offset=0, fields=["last_name"],
+                                             filters=filters)
+        self.assertEqual(encode_rows(cached), encode_rows(rows))
+        self.assertEqual(encode_rows(other), [{"last_name": "Wilson"}])
+        self.assertEqual(self.queries, 2)
+
+    async def test_disabled_cache_never_touches_backend(self):
+        backend = MagicMock()
+        with patch.object(settings, "contacts_cache_enabled", False), \
+                patch.object(contact_cache, "backend", backend):
+            self.assertIsNone(create_backend())
+            async with self.session_factory() as db:
+                await repo_get_contacts(db=db, user=self.user, limit=10, offset=0)
+                await repo_read_contacts(db=db, user=self.user, limit=10, offset=0)
+                await repo_create_new_contact(self.user, ContactCreate(first_name="Peter", last_name="Parker",
+                                                                       email="peter@example.com", phone="1",
+                                                                       b_day=datetime.date(2001, 8, 10)), db)
+            await contact_cache.bump(1)
+        self.assertEqual(backend.mock_calls, [])
@@ -0,0 +1,41 @@
+import asyncio
+import unittest
+
+from src.services.contact_events import ContactEventBroker, InMemoryBackend, format_sse, sse_stream
+
+
+class TestContactEvents(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.broker = ContactEventBroker(InMemoryBackend(), buffer_size=3)
+
+    async def test_events_delivered_only_to_user_subscriptions(self):
+        async with self.broker.subscribe(1) as first, self.broker.subscribe(1) as second, \
+                self.broker.subscribe(2) as other:
+            await self.broker.publish(1, {"type": "created", "id": 5, "version": 1})
+
+            self.assertEqual(await first.get(0.1), {"type": "created", "id": 5, "version": 1})
+            self.assertEqual(await second.get(0.1), {"type": "created", "id": 5, "version": 1})
+            self.assertIsNone(await other.get(0.01))
+        self.assertEqual(self.broker._subscribers, {})
+
+    async def test_buffer_overflow_replaces_events_with_overflow(self):
+        async with self.broker.subscribe(1) as subscription:
+            for version in range(5):
+                await self.broker.publish(1, {"type": "updated", "id": 1, "version": version})
+
+            self.assertEqual(await subscription.get(0.1), {"type": "overflow"})
+            self.assertIsNone(await subscription.get(0.01))
+
+    async def test_sse_stream(self):
+        stream = sse_stream(1, self.broker, heartbeat=0.01)
+        self.assertEqual(await stream.__anext__(), "retry: 3000\n\n")
+        self.assertEqual(await stream.__anext__(), ": keep-alive\n\n")
+
+        await self.broker.publish(1, {"type": "deleted", "id": 7, "version": 3})
+        self.assertEqual(await stream.__anext__(), format_sse({"type": "deleted", "id": 7, "version": 3}))
+        await stream.aclose()
+        self.assertEqual(self.broker._subscribers, {})
+
+    def test_format_sse(self):
+        self.assertEqual(format_sse({"type": "created", "id": 1, "version": 2}),
+                         'id: 2\nevent: created\ndata: {"type": "created", "id": 1, "version": 2}\n\n')
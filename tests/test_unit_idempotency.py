@@ -0,0 +1,157 @@
+import asyncio
+import unittest
+
+import httpx
+from fastapi import FastAPI, HTTPException, Request
+
+from src.middleware.idempotency import IdempotencyMiddleware
+from src.services.idempotency import InMemoryIdempotencyStore, IdempotencyRecord, StoredResponse
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def create_app(store, wait_timeout: float = 5.0, terminal_statuses=()) -> tuple[FastAPI, list]:
+    app = FastAPI()
+    calls = []
+
+    @app.post("/contacts/", status_code=201)
+    async def create(request: Request):
+        body = await request.json()
+        calls.append(body)
+        await asyncio.sleep(body.get("delay", 0))
+        if body.get("fail"):
+            raise HTTPException(status_code=503, detail="Unavailable")
+        if body.get("status"):
+            raise HTTPException(status_code=body["status"], detail="Rejected")
+        return {"id": len(calls), **body}
+
+    @app.post("/other")
+    async def other():
+        calls.append("other")
+        return {"id": len(calls)}
+
+    app.add_middleware(IdempotencyMiddleware, store=store, paths=["/contacts/"], wait_timeout=wait_timeout,
+                       poll_interval=0.01, terminal_statuses=terminal_statuses)
+    return app, calls
+
+
+class TestIdempotencyMiddleware(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.store = InMemoryIdempotencyStore()
+        self.app, self.calls = create_app(self.store)
+        self.client = httpx.AsyncClient(app=self.app, base_url="http://test")
+
+    async def asyncTearDown(self):
+        await self.client.aclose()
+
+    async def test_retry_replays_first_response(self):
+        first = await self.client.post("/contacts/", json={"name": "Wade"}, headers={"Idempotency-Key": "k1"})
+        retry = await self.client.post("/contacts/", json={"name": "Wade"}, headers={"Idempotency-Key": "k1"})
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual((retry.status_code, retry.json()), (201, first.json()))
+        self.assertEqual(retry.headers["idempotent-replayed"], "true")
+        self.assertNotIn("idempotent-replayed", first.headers)
+        self.assertEqual(len(self.calls), 1)
+
+    async def test_concurrent_duplicates_execute_once(self):
+        responses = await asyncio.gather(*(
+            self.client.post("/contacts/", json={"name": "Wade", "delay": 0.1}, headers={"Idempotency-Key": "k1"})
+            for _ in range(5)
+        ))
+        self.assertEqual(len(self.calls), 1)
+        self.assertEqual({response.json()["id"] for response in responses}, {1})
+        self.assertEqual(sum(response.headers.get("idempotent-replayed") == "true" for response in responses), 4)
+
+    async def test_duplicate_gets_409_when_first_request_is_too_slow(self):
+        app, calls = create_app(self.store, wait_timeout=0.05)
+        async with httpx.AsyncClient(app=app, base_url="http://test") as client:
+            first, duplicate = await asyncio.gather(
+                client.post("/contacts/", json={"delay": 0.3}, headers={"Idempotency-Key": "k1"}),
+                client.post("/contacts/", json={"delay": 0.3}, headers={"Idempotency-Key": "k1"}),
+            )
+        self.assertEqual(sorted([first.status_code, duplicate.status_code]), [201, 409])
+        self.assertEqual(len(calls), 1)
+
+    async def test_key_reused_with_different_body(self):
+        await self.client.post("/contacts/", json={"name": "Wade"}, headers={"Idempotency-Key": "k1"})
+        response = await self.client.post("/contacts/", json={"name": "Peter"}, headers={"Idempotency-Key": "k1"})
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(len(self.calls), 1)
+
+    async def test_keys_are_scoped_by_credentials(self):
+        await self.client.post("/contacts/", json={}, headers={"Idempotency-Key": "k1", "Authorization": "Bearer a"})
+        await self.client.post("/contacts/", json={}, headers={"Idempotency-Key": "k1", "Authorization": "Bearer b"})
+        self.assertEqual(len(self.calls), 2)
+
+    async def test_server_errors_are_not_stored(self):
+        failed = await self.client.post("/contacts/", json={"fail": True}, headers={"Idempotency-Key": "k1"})
+        retry = await self.client.post("/contacts/", json={"fail": True}, headers={"Idempotency-Key": "k1"})
+        self.assertEqual((failed.status_code, retry.status_code), (503, 503))
+        self.assertEqual(len(self.calls), 2)
+        self.assertNotIn("idempotent-replayed", retry.headers)
+
+    async def test_client_errors_release_the_key(self):
+        for status in (400, 404, 429):
+            key = {"Idempotency-Key": f"k{status}"}
+            failed = await self.client.post("/contacts/", json={"status": status}, headers=key)
+            retry = await self.client.post("/contacts/", json={"status": status}, headers=key)
+            self.assertEqual((failed.status_code, retry.status_code), (status, status))
+            self.assertNotIn("idempotent-replayed", retry.headers)
+        self.assertEqual(len(self.calls), 6)
+
+    async def test_terminal_statuses_are_stored(self):
+        app, calls = create_app(InMemoryIdempotencyStore(), terminal_statuses=[409])
+        async with httpx.AsyncClient(app=app, base_url="http://test") as client:
+            first = await client.post("/contacts/", json={"status": 409}, headers={"Idempotency-Key": "k1"})
+            retry = await client.post("/contacts/", json={"status": 409}, headers={"Idempotency-Key": "k1"})
+        self.assertEqual((first.status_code, retry.status_code), (409, 409))
+        self.assertEqual(retry.headers["idempotent-replayed"], "true")
+        self.assertEqual(len(calls), 1)
+
+    async def test_requests_without_key_or_on_other_paths_are_not_affected(self):
+        await self.client.post("/contacts/", json={})
+        await self.client.post("/contacts/", json={})
+        await self.client.post("/other", headers={"Idempotency-Key": "k1"})
+        await self.client.post("/other", headers={"Idempotency-Key": "k1"})
+        self.assertEqual(len(self.calls), 4)
+
+    async def test_invalid_key(self):
+        response = await self.client.post("/contacts/", json={}, headers={"Idempotency-Key": "k" * 256})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.calls, [])
+
+
+class TestInMemoryIdempotencyStore(unittest.IsolatedAsyncioTestCase):
+    async def test_reserve_complete_and_expire(self):
+        clock = FakeClock()
+        store = InMemoryIdempotencyStore(clock=clock)
+        self.assertIsNone(await store.reserve("k", "f", ttl=10))
+        self.assertEqual(await store.reserve("k", "f", ttl=10), IdempotencyRecord("f"))
+
+        response = StoredResponse(201, [(b"content-type", b"application/json")], b"{}")
+        await store.complete("k", IdempotencyRecord("f", response), ttl=100)
+        clock.now = 50
+        self.assertEqual((await store.get("k")).response, response)
+        clock.now = 100
+        self.assertIsNone(await store.get("k"))
+        self.assertIsNone(await store.reserve("k", "f", ttl=10))
+
+    async def test_release_and_max_entries(self):
+        store = InMemoryIdempotencyStore(max_entries=2)
+        await store.reserve("a", "f", ttl=10)
+        await store.release("a")
+        self.assertIsNone(await store.get("a"))
+        for key in ("a", "b", "c"):
+            await store.reserve(key, "f", ttl=10)
+        self.assertIsNone(await store.get("a"))
+        self.assertIsNotNone(await store.get("c"))
+
+    def test_record_json_round_trip(self):
+        record = IdempotencyRecord("f", StoredResponse(201, [(b"x-a", b"1")], b"\x00\xff"))
+        self.assertEqual(IdempotencyRecord.from_json(record.to_json()), record)
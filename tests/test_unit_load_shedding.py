@@ -0,0 +1,62 @@
+import unittest
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.middleware.load_shedding import LoadSheddingMiddleware
+from src.services.load_shedding import AdmissionController, CRITICAL, READ, WRITE, BULK
+from src.services.pool_metrics import PoolMetrics
+
+
+class TestAdmissionController(unittest.TestCase):
+    def setUp(self):
+        self.metrics = PoolMetrics()
+        self.controller = AdmissionController(max_in_flight=10, pool_wait_target_ms=50, export_limit=500,
+                                              metrics=self.metrics)
+
+    def test_classify(self):
+        self.assertEqual(self.controller.classify("POST", "/auth/login"), CRITICAL)
+        self.assertEqual(self.controller.classify("GET", "/contacts/", b"limit=10"), READ)
+        self.assertEqual(self.controller.classify("GET", "/contacts/", b"limit=10000"), BULK)
+        self.assertEqual(self.controller.classify("GET", "/contacts/changes"), BULK)
+        self.assertEqual(self.controller.classify("DELETE", "/contacts/1"), WRITE)
+        self.assertTrue(self.controller.exempt("/contacts/stream"))
+
+    def test_lower_priorities_shed_first_by_in_flight(self):
+        self.controller.in_flight = 6
+        self.assertFalse(self.controller.admit(BULK))
+        self.assertTrue(self.controller.admit(WRITE))
+        self.controller.in_flight = 9
+        self.assertFalse(self.controller.admit(READ))
+        self.assertTrue(self.controller.admit(CRITICAL))
+        self.assertFalse(self.controller.admit(CRITICAL))
+        self.assertEqual(self.controller.stats[CRITICAL], {"admitted": 1, "rejected": 1})
+
+    def test_lower_priorities_shed_first_by_pool_wait(self):
+        self.metrics.record_wait(0.120)
+        self.assertFalse(self.controller.admit(BULK))
+        self.assertFalse(self.controller.admit(WRITE))
+        self.assertTrue(self.controller.admit(READ))
+        self.metrics.record_wait(0.400)
+        self.assertFalse(self.controller.admit(READ))
+        self.assertTrue(self.controller.admit(CRITICAL))
+
+
+class TestLoadSheddingMiddleware(unittest.TestCase):
+    def test_rejected_with_retry_after(self):
+        controller = AdmissionController(max_in_flight=1, retry_after=3)
+        app = FastAPI()
+        app.add_middleware(LoadSheddingMiddleware, controller=controller)
+
+        @app.get("/contacts/")
+        async def contacts():
+            return []
+
+        client = TestClient(app)
+        self.assertEqual(client.get("/contacts/").status_code, 200)
+        self.assertEqual(controller.in_flight, 0)
+        controller.in_flight = 1
+        response = client.get("/contacts/")
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.headers["Retry-After"], "3")
+        self.assertEqual(controller.stats[READ], {"admitted": 1, "rejected": 1})
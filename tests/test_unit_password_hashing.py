@@ -0,0 +1,30 @@
+import unittest
+from unittest.mock import patch
+
+from src.services.authservice import Auth, create_password_context
+
+
+class TestPasswordHashing(unittest.TestCase):
+    def setUp(self):
+        self.auth = Auth()
+        patcher = patch.object(Auth, "pwd_cxt", create_password_context("bcrypt", 4))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_hash_uses_configured_rounds(self):
+        self.assertTrue(self.auth.generate_password_hash("secret").startswith("$2b$04$"))
+
+    def test_current_hash_not_rehashed(self):
+        hashed = self.auth.generate_password_hash("secret")
+        self.assertEqual(self.auth.check_password_and_rehash(hashed, "secret"), (True, None))
+
+    def test_hash_rehashed_after_rounds_change(self):
+        old_hash = create_password_context("bcrypt", 5).hash("secret")
+        password_ok, new_hash = self.auth.check_password_and_rehash(old_hash, "secret")
+        self.assertTrue(password_ok)
+        self.assertTrue(new_hash.startswith("$2b$04$"))
+        self.assertTrue(self.auth.check_password_hash(new_hash, "secret"))
+
+    def test_wrong_password_not_rehashed(self):
+        old_hash = create_password_context("bcrypt", 5).hash("secret")
+        self.assertEqual(self.auth.check_password_and_rehash(old_hash, "wrong"), (False, None))
@@ -0,0 +1,105 @@
+import unittest
+
+from fastapi import APIRouter, BackgroundTasks, Depends, FastAPI
+from fastapi.routing import APIRoute
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+
+from src.DB.db import SessionReleasingRoute
+from src.DB.models import Base, User
+from src.middleware.pool_metrics import PoolMetricsMiddleware
+from src.services.authservice import authservice as auth_service
+from src.services.pool_metrics import PoolMetrics
+
+
+def create_app(metrics: PoolMetrics, session_factory, route_class,
+               query_in_background: bool = False) -> tuple[FastAPI, dict]:
+    observed = {}
+
+    async def get_session():
+        async with session_factory() as session:
+            yield session
+
+    async def record_background_work():
+        observed["in_use_in_background"] = metrics.in_use
+        if query_in_background:
+            async with session_factory() as session:
+                await session.execute(select(User))
+        observed["held_after_response_in_background"] = metrics.held_after_response
+
+    router = APIRouter(route_class=route_class)
+
+    @router.get("/users")
+    async def list_users(bg_task: BackgroundTasks, db: AsyncSession = Depends(get_session)):
+        users = (await db.execute(select(User))).scalars().all()
+        bg_task.add_task(record_background_work)
+        return [{"id": user.id, "email": user.email} for user in users]
+
+    app = FastAPI()
+    app.add_middleware(PoolMetricsMiddleware, metrics=metrics)
+    app.include_router(router)
+    return app, observed
+
+
+class TestPoolMetrics(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.engine = create_async_engine("sqlite+aiosqlite://")
+        self.session_factory = async_sessionmaker(bind=self.engine, class_=AsyncSession, expire_on_commit=False)
+        self.metrics = PoolMetrics()
+        self.metrics.install(self.engine)
+        async with self.engine.begin() as connection:
+            await connection.run_sync(Base.metadata.create_all)
+        async with self.session_factory() as session:
+            session.add(User(id=1, username="deadpool", email="deadpool@example.com", password="x"))
+            await session.commit()
+
+    async def asyncTearDown(self):
+        await self.engine.dispose()
+
+    async def test_checkout_counted(self):
+        async with self.session_factory() as session:
+            self.assertEqual(self.metrics.in_use, 0)
+            await session.execute(select(User))
+            self.assertEqual(self.metrics.in_use, 1)
+        report = self.metrics.report()
+        self.assertEqual(report["in_use"], 0)
+        self.assertGreaterEqual(report["peak_in_use"], 1)
+        self.assertIsNotNone(report["hold_ms_p99"])
+
+    async def test_get_current_user_releases_connection(self):
+        token = await auth_service.create_access_token(data={"sub": "deadpool@example.com"})
+        async with self.session_factory() as session:
+            user = await auth_service.get_current_user(token=token, db=session)
+            self.assertEqual(self.metrics.in_use, 0)
+            self.assertEqual(user.email, "deadpool@example.com")
+
+    def request_users(self, route_class, query_in_background: bool = False) -> dict:
+        app, observed = create_app(self.metrics, self.session_factory, route_class, query_in_background)
+        with TestClient(app) as client:
+            response = client.get("/users")
+        self.assertEqual(response.json(), [{"id": 1, "email": "deadpool@example.com"}])
+        return observed
+
+    async def test_connection_released_before_serialization_and_background_work(self):
+        self.metrics.reset()
+        observed = self.request_users(SessionReleasingRoute)
+        self.assertEqual(observed["in_use_in_background"], 0)
+        self.assertEqual(self.metrics.held_at_response_start, 0)
+        self.assertEqual(self.metrics.held_after_response, 0)
+
+    async def test_connection_held_without_early_release(self):
+        self.metrics.reset()
+        observed = self.request_users(APIRoute)
+        self.assertEqual(observed["in_use_in_background"], 1)
+        self.assertEqual(self.metrics.held_at_response_start, 1)
+        self.assertEqual(self.metrics.held_after_response, 1)
+        # Лічильник збільшується лише після завершення фонових задач
+        self.assertEqual(observed["held_after_response_in_background"], 0)
+
+    async def test_connection_checked_out_by_background_task(self):
+        self.metrics.reset()
+        observed = self.request_users(SessionReleasingRoute, query_in_background=True)
+        self.assertEqual(observed["in_use_in_background"], 0)
+        self.assertEqual(self.metrics.held_at_response_start, 0)
+        self.assertEqual(self.metrics.held_after_response, 1)
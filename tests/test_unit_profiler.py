@@ -0,0 +1,52 @@
+import os
+import tempfile
+import time
+import unittest
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.middleware.profiler import ProfilerMiddleware, create_profile_token
+
+SECRET = "profiler-secret"
+
+
+async def busy_route():
+    deadline = time.perf_counter() + 0.05
+    while time.perf_counter() < deadline:
+        sum(range(1000))
+    return {"ok": True}
+
+
+class TestProfilerMiddleware(unittest.TestCase):
+    def setUp(self):
+        self.output_dir = tempfile.mkdtemp()
+
+    def client(self, **kwargs) -> TestClient:
+        app = FastAPI()
+        app.get("/busy")(busy_route)
+        app.add_middleware(ProfilerMiddleware, output_dir=self.output_dir, secret_key=SECRET, **kwargs)
+        return TestClient(app)
+
+    def test_signed_header_profiles_request(self):
+        token = create_profile_token(SECRET, "HS256", trace_memory=True)
+        response = self.client().get("/busy", headers={"X-Profile": token, "X-Request-ID": "req-1"})
+        self.assertEqual(response.headers["X-Profile-Id"], "req-1")
+        with open(os.path.join(self.output_dir, "req-1.folded")) as file:
+            folded = file.read()
+        self.assertIn("busy_route", folded)
+        stack, count = folded.splitlines()[0].rsplit(" ", 1)
+        self.assertGreater(int(count), 0)
+        self.assertTrue(os.path.exists(os.path.join(self.output_dir, "req-1.tracemalloc.txt")))
+
+    def test_invalid_signature_is_ignored(self):
+        token = create_profile_token("other-secret", "HS256")
+        response = self.client().get("/busy", headers={"X-Profile": token})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("X-Profile-Id", response.headers)
+        self.assertEqual(os.listdir(self.output_dir), [])
+
+    def test_sample_rate(self):
+        response = self.client(sample_rate=1.0).get("/busy")
+        profile_id = response.headers["X-Profile-Id"]
+        self.assertEqual(os.listdir(self.output_dir), [f"{profile_id}.folded"])
@@ -0,0 +1,79 @@
+import unittest
+
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from src.DB.models import Base, Contact, User
+from src.conf.config import settings
+from src.services.authservice import authservice as auth_service
+from src.services.query_monitor import QueryMonitor, query_monitor
+from main import app
+
+
+class TestQueryMonitor(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.engine = create_async_engine("sqlite+aiosqlite://")
+        async with self.engine.begin() as connection:
+            await connection.run_sync(Base.metadata.create_all)
+
+    async def asyncTearDown(self):
+        await self.engine.dispose()
+
+    async def test_slow_query_recorded_with_plan(self):
+        monitor = QueryMonitor(slow_threshold_ms=0)
+        monitor.install(self.engine)
+        async with self.engine.connect() as connection:
+            await connection.execute(select(Contact).where(Contact.user_id == 1))
+        entry = monitor.slow_queries[-1]
+        self.assertIn("FROM contacts", entry["statement"])
+        self.assertEqual(entry["parameters"], ["1"])
+        self.assertTrue(any("ix_contacts_user_id" in str(row) for row in entry["plan"]))
+
+    async def test_fast_query_not_recorded(self):
+        monitor = QueryMonitor(slow_threshold_ms=10_000)
+        monitor.install(self.engine)
+        async with self.engine.connect() as connection:
+            await connection.execute(select(Contact))
+        self.assertEqual(len(monitor.slow_queries), 0)
+
+    async def test_repeated_statement_flagged_as_n_plus_one(self):
+        monitor = QueryMonitor(n_plus_one_threshold=3)
+        monitor.install(self.engine)
+        with monitor.track_request("GET", "/contacts/"):
+            async with self.engine.connect() as connection:
+                for user_id in range(5):
+                    await connection.execute(select(Contact).where(Contact.user_id == user_id))
+                await connection.execute(select(User))
+        entry = monitor.n_plus_one[-1]
+        self.assertEqual(entry["path"], "/contacts/")
+        self.assertEqual([statement["count"] for statement in entry["statements"]], [5])
+
+
+class TestQueryReportEndpoint(unittest.TestCase):
+    def setUp(self):
+        self.saved_overrides = dict(app.dependency_overrides)
+        self.saved_admins = settings.admin_emails
+        settings.admin_emails = ["admin@example.com"]
+
+    def tearDown(self):
+        app.dependency_overrides.clear()
+        app.dependency_overrides.update(self.saved_overrides)
+        settings.admin_emails = self.saved_admins
+
+    def login(self, email: str):
+        app.dependency_overrides[auth_service.get_current_user] = lambda: User(id=1, email=email)
+
+    def test_report_requires_admin(self):
+        self.login("user@example.com")
+        self.assertEqual(TestClient(app).get("/admin/queries").status_code, 403)
+
+    def test_report_for_admin(self):
+        self.login("admin@example.com")
+        query_monitor.slow_queries.append({"event": "slow_query", "statement": "SELECT 1"})
+        client = TestClient(app)
+        response = client.get("/admin/queries")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn({"event": "slow_query", "statement": "SELECT 1"}, response.json()["slow_queries"])
+        self.assertEqual(client.delete("/admin/queries").status_code, 204)
+        self.assertEqual(query_monitor.report()["slow_queries"], [])
@@ -0,0 +1,147 @@
+import datetime
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import httpx
+from sqlalchemy import delete, insert, select
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+
+from src.DB.db import get_db
+from src.DB.models import Base, Contact, ContactVersionCounter, User
+from src.services.authservice import authservice as auth_service
+from src.services.read_replica import InMemoryStickinessStore, ReplicaRouter, replica_router
+from src.services.single_flight import single_flight
+from main import app
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestStickiness(unittest.IsolatedAsyncioTestCase):
+    async def test_user_sticks_to_primary_for_window(self):
+        clock = FakeClock()
+        store = InMemoryStickinessStore(window=5.0, clock=clock)
+        await store.mark(1)
+        self.assertTrue(await store.is_sticky(1))
+        self.assertFalse(await store.is_sticky(2))
+        clock.now = 4.9
+        self.assertTrue(await store.is_sticky(1))
+        clock.now = 5.0
+        self.assertFalse(await store.is_sticky(1))
+
+    async def test_oldest_users_are_evicted(self):
+        store = InMemoryStickinessStore(window=5.0, max_entries=2, clock=FakeClock())
+        for user_id in (1, 2, 3):
+            await store.mark(user_id)
+        self.assertEqual([await store.is_sticky(user_id) for user_id in (1, 2, 3)], [False, True, True])
+
+    async def test_router_without_replica_reads_primary(self):
+        router = ReplicaRouter(None, InMemoryStickinessStore(window=5.0))
+        await router.mark_write(1)
+        self.assertIsNone(await router.replica_session(1))
+        self.assertEqual(router.stats, {"replica": 0, "primary": 1, "sticky": 0})
+
+
+class TestReadReplicaRouting(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        workdir = tempfile.mkdtemp()
+        self.primary = create_async_engine(f"sqlite+aiosqlite:///{os.path.join(workdir, 'primary.db')}")
+        self.replica = create_async_engine(f"sqlite+aiosqlite:///{os.path.join(workdir, 'replica.db')}")
+        self.primary_session = async_sessionmaker(bind=self.primary, class_=AsyncSession, expire_on_commit=False)
+        replica_session = async_sessionmaker(bind=self.replica, class_=AsyncSession, expire_on_commit=False)
+        for engine in (self.primary, self.replica):
+            async with engine.begin() as connection:
+                await connection.run_sync(Base.metadata.create_all)
+        async with self.primary_session() as session:
+            session.add(User(id=1, username="deadpool", email="deadpool@example.com", password="x",
+                             is_activated=True))
+            session.add(Contact(id=1, first_name="Wade", last_name="Wilson", email="wade@example.com", phone="0",
+                                b_day=datetime.date(1991, 2, 1), user_id=1))
+            await session.commit()
+        await self.replicate()
+
+        self.clock = FakeClock()
+        self.router = ReplicaRouter(replica_session, InMemoryStickinessStore(window=5.0, clock=self.clock))
+        self.patches = [patch.object(replica_router, "sessionmaker", self.router.sessionmaker),
+                        patch.object(replica_router, "stickiness", self.router.stickiness),
+                        patch.object(replica_router, "stats", self.router.stats)]
+        for active in self.patches:
+            active.start()
+
+        async def override_get_db():
+            async with self.primary_session() as db:
+                yield db
+
+        async def override_get_current_user():
+            return User(id=1, username="deadpool", email="deadpool@example.com", is_activated=True)
+
+        self.saved_overrides = dict(app.dependency_overrides)
+        app.dependency_overrides[get_db] = override_get_db
+        app.dependency_overrides[auth_service.get_current_user] = override_get_current_user
+        self.client = httpx.AsyncClient(app=app, base_url="http://test")
+
+    async def asyncTearDown(self):
+        await self.client.aclose()
+        app.dependency_overrides.clear()
+        app.dependency_overrides.update(self.saved_overrides)
+        for active in self.patches:
+            active.stop()
+        single_flight.forget(1)
+        await self.primary.dispose()
+        await self.replica.dispose()
+
+    async def replicate(self):
+        """
+        Скопіювати контакти й лічильники з основної бази в репліку - замість потокової реплікації.
+        """
+        async with self.primary.connect() as source, self.replica.begin() as target:
+            for model in (Contact, ContactVersionCounter):
+                rows = (await source.execute(select(model.__table__))).mappings().all()
+                await target.execute(delete(model.__table__))
+                if rows:
+                    await target.execute(insert(model.__table__), [dict(row) for row in rows])
+
+    async def test_reads_go_to_replica(self):
+        async with self.replica.begin() as connection:
+            await connection.execute(Contact.__table__.update().values(first_name="Replica"))
+        for path in ("/contacts/", "/contacts/query/?query=wilson", "/contacts/1"):
+            response = await self.client.get(path)
+            self.assertEqual(response.status_code, 200, response.text)
+            self.assertIn('"first_name":"Replica"', response.text, path)
+        self.assertEqual(self.router.stats, {"replica": 3, "primary": 0, "sticky": 0})
+
+    async def test_read_your_writes_after_create(self):
+        body = {"first_name": "Peter", "last_name": "Parker", "email": "peter@example.com", "phone": "1",
+                "b_day": "2001-08-10"}
+        created = await self.client.post("/contacts/", json=body)
+        self.assertEqual(created.status_code, 201, created.text)
+        contact_id = created.json()["id"]
+
+        # Репліка ще не отримала новий контакт, але автор запису читає з основної бази
+        self.assertEqual((await self.client.get(f"/contacts/{contact_id}")).status_code, 200)
+        listed = await self.client.get("/contacts/")
+        self.assertEqual([contact["id"] for contact in listed.json()], [1, contact_id])
+        self.assertEqual(listed.headers["x-total-count"], "2")
+        self.assertEqual(self.router.stats, {"replica": 0, "primary": 2, "sticky": 2})
+
+        # Після вікна читання повертаються на репліку
+        self.clock.now = 5.0
+        self.assertEqual((await self.client.get(f"/contacts/{contact_id}")).status_code, 404)
+        await self.replicate()
+        self.assertEqual((await self.client.get(f"/contacts/{contact_id}")).status_code, 200)
+        self.assertEqual(self.router.stats["replica"], 2)
+
+    async def test_writes_use_primary(self):
+        self.assertEqual((await self.client.delete("/contacts/1")).status_code, 200)
+        async with self.primary_session() as session:
+            contact = await session.get(Contact, 1)
+        self.assertIsNotNone(contact.deleted_at)
+        self.assertEqual((await self.client.get("/contacts/1")).status_code, 404)
+        self.assertEqual(self.router.stats, {"replica": 0, "primary": 1, "sticky": 1})
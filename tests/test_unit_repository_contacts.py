@@ -4,11 +4,14 @@ from unittest.mock import AsyncMock, MagicMock
 
 import pytest
 from fastapi import HTTPException
-from sqlalchemy.ext.asyncio import AsyncSession
-from src.DB.models import Contact, User
+from sqlalchemy import event
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
+from src.DB.models import Base, Contact, User
 from src.repository.contacts_repo import repo_get_contacts, get_specific_contact_belongs_to_user, \
     repo_update_contact_db, repo_get_contact_by_id, repo_create_new_contact, repo_delete_contact_db, \
-    repo_get_contacts_query, repo_get_upcoming_birthday_contacts
+    repo_get_contacts_query, repo_get_upcoming_birthday_contacts, repo_purge_contact_tombstones, \
+    repo_get_contacts_count
 from src.schemas.Contacts_Schemas import ContactCreate, ContactUpdate
 
 
@@ -69,6 +72,8 @@ class TestContactRepository(unittest.IsolatedAsyncioTestCase):
             b_day="1999-07-10",
             rest_data="",
         )
+        self.async_session.execute.return_value = MagicMock()
+        self.async_session.execute.return_value.scalar.return_value = 1
         result = await repo_create_new_contact(user=self.user, body=body, db=self.async_session)
         print(result)
         self.assertEqual(result.first_name, body.first_name)
@@ -85,11 +90,14 @@ class TestContactRepository(unittest.IsolatedAsyncioTestCase):
             b_day="1999-07-10",
             rest_data="",
         )
+        self.async_session.execute.return_value = MagicMock()
+        self.async_session.execute.return_value.scalar.return_value = 2
         with unittest.mock.patch('src.repository.contacts_repo.get_specific_contact_belongs_to_user',
                                  return_value=existing_contact):
             result = await repo_update_contact_db(id=1, user=self.user, db=self.async_session, body=body)
             self.assertTrue(hasattr(result, "phone"))
             self.assertEqual(body.phone, existing_contact.phone)
+            self.assertEqual(existing_contact.version, 2)
 
     async def test_repo_update_contact_db_id_not_found(self):
         expected_contact = None
@@ -121,12 +129,18 @@ class TestContactRepository(unittest.IsolatedAsyncioTestCase):
         existing_contact = Contact(id=1, first_name="John", last_name="Doe", email="test@example.com",
                                    user_id=self.user.id)
         contact_name = f'{existing_contact.first_name} {existing_contact.last_name}'
+        self.async_session.execute.return_value = MagicMock()
+        self.async_session.execute.return_value.scalar.return_value = 3
         with unittest.mock.patch('src.repository.contacts_repo.get_specific_contact_belongs_to_user',
                                  return_value=existing_contact):
             result = await repo_delete_contact_db(id=1, user=self.user, db=self.async_session)
             expected_msg = {"message": f"Contact '{contact_name}' successfully deleted"}
         self.assertEqual(result, expected_msg)
         self.assertIn(f'{contact_name}', result['message'])
+        # Контакт стає надгробком, а не видаляється фізично
+        self.async_session.delete.assert_not_called()
+        self.assertIsNotNone(existing_contact.deleted_at)
+        self.assertEqual(existing_contact.version, 3)
 
     async def test_repo_get_contacts_query(self):
         contact1 = Contact(id=1, first_name="John", last_name="Doe", email="testJohn@example.com",
@@ -206,3 +220,61 @@ class TestContactRepository(unittest.IsolatedAsyncioTestCase):
         self.assertIsInstance(result, list)
         for contact in result:
             self.assertIsInstance(contact, Contact)
+
+
+class TestContactVersions(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.engine = create_async_engine("sqlite+aiosqlite://")
+        self.session_factory = async_sessionmaker(bind=self.engine, class_=AsyncSession, expire_on_commit=False)
+        async with self.engine.begin() as connection:
+            await connection.run_sync(Base.metadata.create_all)
+        self.user = User(id=1, email="user@example.com")
+        self.body = ContactCreate(first_name="John", last_name="Doe", email="test@example.com",
+                                  phone="0123456789", b_day="1999-07-10", rest_data="")
+
+    async def asyncTearDown(self):
+        await self.engine.dispose()
+
+    async def test_versions_are_not_reused_after_purge(self):
+        async with self.session_factory() as session:
+            first = await repo_create_new_contact(user=self.user, body=self.body, db=session)
+            second = await repo_create_new_contact(user=self.user, body=self.body, db=session)
+            created_versions = (first.version, second.version)
+            await repo_delete_contact_db(id=second.id, user=self.user, db=session)
+            await repo_purge_contact_tombstones(datetime.datetime.utcnow() + datetime.timedelta(seconds=1), session)
+            third = await repo_create_new_contact(user=self.user, body=self.body, db=session)
+        self.assertEqual(created_versions, (1, 2))
+        self.assertEqual(second.version, 3)
+        self.assertEqual(third.version, 4)
+
+    async def test_contact_count_follows_writes(self):
+        async with self.session_factory() as session:
+            first = await repo_create_new_contact(user=self.user, body=self.body, db=session)
+            await repo_create_new_contact(user=self.user, body=self.body, db=session)
+            self.assertEqual(await repo_get_contacts_count(self.user, session), 2)
+            await repo_delete_contact_db(id=first.id, user=self.user, db=session)
+            self.assertEqual(await repo_get_contacts_count(self.user, session), 1)
+
+    async def test_duplicate_version_rejected(self):
+        async with self.session_factory() as session:
+            contact = await repo_create_new_contact(user=self.user, body=self.body, db=session)
+            session.add(Contact(first_name="Jane", last_name="Doe", email="jane@example.com", phone="1",
+                                b_day=datetime.date(2000, 1, 1), user_id=self.user.id, version=contact.version))
+            with self.assertRaises(IntegrityError):
+                await session.commit()
+
+    async def test_contacts_are_counted_only_for_missing_counter(self):
+        statements = []
+
+        def record(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        event.listen(self.engine.sync_engine, "before_cursor_execute", record)
+        async with self.session_factory() as session:
+            await repo_create_new_contact(user=self.user, body=self.body, db=session)
+            first_write = len(statements)
+            await repo_create_new_contact(user=self.user, body=self.body, db=session)
+            self.assertEqual(await repo_get_contacts_count(self.user, session), 2)
+        counts = [i for i, statement in enumerate(statements) if "count(" in statement.lower()]
+        self.assertEqual(len(counts), 1)
+        self.assertLess(counts[0], first_write)
@@ -5,7 +5,7 @@ from unittest.mock import AsyncMock
 from sqlalchemy.ext.asyncio import AsyncSession
 from src.DB.models import Contact, User
 from src.repository.users_repo import repo_create_user, repo_user_authentication_by_email, repo_update_refresh_token, \
-    confirmed_email, update_avatar, add_reset_token_to_db
+    confirmed_email, update_avatar, add_reset_token_to_db, repo_update_password
 from src.schemas.User_Schemas import UserCreate
 from src.services.authservice import authservice as auth_service
 
@@ -45,6 +45,11 @@ class TestUserRepository(unittest.IsolatedAsyncioTestCase):
         self.assertTrue(hasattr(self.user, "refresh_token"))
         self.assertEqual(self.user.refresh_token, refresh_token_)
 
+    async def test_repo_update_password(self):
+        await repo_update_password(user=self.user, password_hash="$2b$04$new", db=self.async_session)
+        self.assertEqual(self.user.password, "$2b$04$new")
+        self.async_session.commit.assert_awaited_once()
+
     async def test_confirmed_email(self):
         expected_user = self.user
         self.assertFalse(self.user.is_activated, True)
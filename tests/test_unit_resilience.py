@@ -0,0 +1,243 @@
+import asyncio
+import io
+import json
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+import cloudinary
+from fastapi_mail import ConnectionConfig
+
+from src.services import email
+from src.services.avatar import UploadImage
+from src.services.birthday_reminders import BirthdayDigest
+from src.services.resilience import Integration, CircuitBreaker, CircuitOpenError, BulkheadFullError, \
+    IntegrationTimeoutError, CLOSED, OPEN, HALF_OPEN
+
+
+class FakeSMTPServer:
+    """
+    Мінімальний SMTP-сервер на локальному порту із затримкою перед привітанням і відмовою обслуговування.
+    """
+
+    def __init__(self, delay: float = 0.0, fail: bool = False):
+        self.delay = delay
+        self.fail = fail
+        self.messages = []
+        self.port = None
+        self._server = None
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            writer.write(b"421 Service not available\r\n")
+            await writer.drain()
+            writer.close()
+            return
+        writer.write(b"220 fake ESMTP\r\n")
+        while line := await reader.readline():
+            command = line[:4].upper()
+            if command == b"DATA":
+                writer.write(b"354 End data with <CR><LF>.<CR><LF>\r\n")
+                await writer.drain()
+                self.messages.append(await reader.readuntil(b"\r\n.\r\n"))
+                writer.write(b"250 OK\r\n")
+            elif command == b"QUIT":
+                writer.write(b"221 Bye\r\n")
+                await writer.drain()
+                break
+            else:
+                writer.write(b"250 OK\r\n")
+            await writer.drain()
+        writer.close()
+
+    async def __aenter__(self):
+        self._server = await asyncio.start_server(self.handle, "127.0.0.1", 0)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self._server.close()
+
+    def connection_config(self) -> ConnectionConfig:
+        return ConnectionConfig(MAIL_USERNAME="user", MAIL_PASSWORD="password", MAIL_FROM="noreply@example.com",
+                                MAIL_PORT=self.port, MAIL_SERVER="127.0.0.1", MAIL_STARTTLS=False, MAIL_SSL_TLS=False,
+                                USE_CREDENTIALS=False, VALIDATE_CERTS=False,
+                                TEMPLATE_FOLDER=email.conf.TEMPLATE_FOLDER)
+
+
+class FakeCloudinaryServer:
+    """
+    HTTP-сервер у фоновому потоці, що відповідає як API завантаження Cloudinary, із затримкою і помилками.
+    """
+
+    def __init__(self, delay: float = 0.0, fail: bool = False):
+        self.delay = delay
+        self.fail = fail
+        self.uploads = 0
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                self.rfile.read(int(self.headers["Content-Length"]))
+                time.sleep(fake.delay)
+                if fake.fail:
+                    status, body = 500, {"error": {"message": "fake failure"}}
+                else:
+                    fake.uploads += 1
+                    status, body = 200, {"public_id": "avatar", "version": 42}
+                payload = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self._server.server_address[1]}"
+
+    def __enter__(self):
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    def setUp(self):
+        self.now = 0.0
+        self.breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10, clock=lambda: self.now)
+
+    def test_opens_after_consecutive_failures(self):
+        self.breaker.record_failure()
+        self.breaker.record_success()
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, CLOSED)
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, OPEN)
+        self.assertFalse(self.breaker.allow())
+
+    def test_half_open_allows_single_probe(self):
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.now = 10
+        self.assertTrue(self.breaker.allow())
+        self.assertEqual(self.breaker.state, HALF_OPEN)
+        self.assertFalse(self.breaker.allow())
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, OPEN)
+        self.now = 20
+        self.assertTrue(self.breaker.allow())
+        self.breaker.record_success()
+        self.assertEqual(self.breaker.state, CLOSED)
+
+
+class TestIntegration(unittest.IsolatedAsyncioTestCase):
+    async def test_bulkhead_rejects_calls_over_limit(self):
+        integration = Integration("test", timeout=0.1, max_concurrency=1)
+        blocker = asyncio.ensure_future(integration.call(time.sleep, 0.3))
+        await asyncio.sleep(0)
+        with self.assertRaises(BulkheadFullError):
+            await integration.call(asyncio.sleep, 0)
+        with self.assertRaises(IntegrationTimeoutError):
+            await blocker
+        self.assertEqual(integration.stats["rejected"], 1)
+        await asyncio.sleep(0.3)
+        self.assertEqual(integration.in_flight, 0)
+        await integration.call(asyncio.sleep, 0)
+        self.assertEqual(integration.stats["successes"], 1)
+
+    async def test_timed_out_thread_keeps_its_slot(self):
+        integration = Integration("test", timeout=0.05, max_concurrency=1)
+        with self.assertRaises(IntegrationTimeoutError):
+            await integration.call(time.sleep, 0.3)
+        self.assertEqual(integration.in_flight, 1)
+        await asyncio.sleep(0.4)
+        self.assertEqual(integration.in_flight, 0)
+
+
+class TestSMTPResilience(unittest.IsolatedAsyncioTestCase):
+    async def send(self, server: FakeSMTPServer, integration: Integration):
+        with patch.object(email, "conf", server.connection_config()), \
+                patch.object(email, "mail_integration", integration):
+            await email.send_email("user@example.com", "user", "http://testserver/")
+
+    async def test_message_delivered(self):
+        integration = Integration("smtp", timeout=2)
+        async with FakeSMTPServer() as server:
+            await self.send(server, integration)
+        self.assertEqual(len(server.messages), 1)
+        self.assertEqual(integration.report()["successes"], 1)
+
+    async def test_slow_server_times_out_and_opens_circuit(self):
+        integration = Integration("smtp", timeout=0.1, failure_threshold=2, reset_timeout=60)
+        async with FakeSMTPServer(delay=1) as server:
+            started = time.perf_counter()
+            for _ in range(3):
+                await self.send(server, integration)
+            self.assertLess(time.perf_counter() - started, 0.5)
+        report = integration.report()
+        self.assertEqual(report["state"], OPEN)
+        self.assertEqual(report["timeouts"], 2)
+        self.assertEqual(report["short_circuited"], 1)
+        self.assertEqual(server.messages, [])
+
+    async def test_server_errors_open_circuit(self):
+        integration = Integration("smtp", timeout=2, failure_threshold=2, reset_timeout=60)
+        async with FakeSMTPServer(fail=True) as server:
+            for _ in range(2):
+                await self.send(server, integration)
+        self.assertEqual(integration.report()["failures"], 2)
+        self.assertEqual(integration.report()["state"], OPEN)
+
+    async def test_birthday_digests_stop_when_circuit_open(self):
+        integration = Integration("smtp", timeout=2, failure_threshold=1, reset_timeout=60)
+        integration.breaker.record_failure()
+        with patch.object(email, "mail_integration", integration):
+            with self.assertRaises(CircuitOpenError):
+                await email.send_birthday_digests([BirthdayDigest(1, "user@example.com", "user", [])])
+
+
+class TestCloudinaryResilience(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.upload_prefix = cloudinary.config().upload_prefix
+
+    def tearDown(self):
+        cloudinary.config(upload_prefix=self.upload_prefix)
+
+    async def upload(self, server: FakeCloudinaryServer, integration: Integration):
+        cloudinary.config(upload_prefix=server.url)
+        with patch("src.services.avatar.cloudinary_integration", integration):
+            return await UploadImage.upload(io.BytesIO(b"image"), "avatar")
+
+    async def test_upload(self):
+        integration = Integration("cloudinary", timeout=2)
+        with FakeCloudinaryServer() as server:
+            result = await self.upload(server, integration)
+        self.assertEqual(result["version"], 42)
+        self.assertEqual(integration.report()["successes"], 1)
+
+    async def test_slow_upload_times_out(self):
+        integration = Integration("cloudinary", timeout=0.1, failure_threshold=1, reset_timeout=60)
+        with FakeCloudinaryServer(delay=0.5) as server:
+            with self.assertRaises(IntegrationTimeoutError):
+                await self.upload(server, integration)
+            with self.assertRaises(CircuitOpenError):
+                await self.upload(server, integration)
+            await asyncio.sleep(0.6)
+        self.assertEqual(integration.report()["state"], OPEN)
+        self.assertEqual(integration.report()["in_flight"], 0)
+
+    async def test_failed_upload_recorded(self):
+        integration = Integration("cloudinary", timeout=2)
+        with FakeCloudinaryServer(fail=True) as server:
+            with self.assertRaises(cloudinary.exceptions.Error):
+                await self.upload(server, integration)
+        self.assertEqual(integration.report()["failures"], 1)
@@ -0,0 +1,117 @@
+import datetime
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from fastapi import HTTPException
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+
+from src.DB.models import Base, Contact, ContactVersionCounter, User
+from src.DB.shards import ShardMap, DEFAULT_SHARD, create_shard_schema, move_user_contacts, count_user_contacts, \
+    get_shard_db
+from src.routes.contacts import decode_sync_token, encode_sync_token
+
+
+class TestShards(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        workdir = tempfile.mkdtemp()
+        self.primary = create_async_engine(f"sqlite+aiosqlite:///{os.path.join(workdir, 'primary.db')}")
+        self.shard = create_async_engine(f"sqlite+aiosqlite:///{os.path.join(workdir, 'shard_1.db')}")
+        self.shards = ShardMap({DEFAULT_SHARD: self.primary, "shard_1": self.shard})
+        self.session_factory = async_sessionmaker(bind=self.primary, class_=AsyncSession, expire_on_commit=False)
+
+        async with self.primary.begin() as connection:
+            await connection.run_sync(Base.metadata.create_all)
+        await create_shard_schema(self.shard)
+
+        async with self.session_factory() as session:
+            session.add(User(id=1, username="big", email="big@example.com", password="x", is_activated=True))
+            session.add(User(id=2, username="small", email="small@example.com", password="x", is_activated=True))
+            for i in range(1, 6):
+                session.add(Contact(id=i, first_name="John", last_name="Doe", email="john@example.com", phone="0",
+                                    b_day=datetime.date(1990, 1, i), user_id=1))
+            session.add(Contact(id=6, first_name="Jane", last_name="Doe", email="jane@example.com", phone="0",
+                                b_day=datetime.date(1990, 1, 6), user_id=2))
+            await session.commit()
+
+    async def asyncTearDown(self):
+        await self.primary.dispose()
+        await self.shard.dispose()
+
+    def test_shard_for_defaults_to_primary(self):
+        self.assertEqual(self.shards.shard_for(User(id=1)), DEFAULT_SHARD)
+        self.assertEqual(self.shards.shard_for(User(id=1, shard="shard_1")), "shard_1")
+        with self.assertRaises(KeyError):
+            self.shards.shard_for(User(id=1, shard="missing"))
+
+    async def test_move_user_contacts(self):
+        moved = await move_user_contacts("big@example.com", "shard_1", self.shards, self.session_factory,
+                                         chunk_size=2)
+
+        self.assertEqual(moved, 5)
+        self.assertEqual(await count_user_contacts(1, "shard_1", self.shards), 5)
+        self.assertEqual(await count_user_contacts(1, DEFAULT_SHARD, self.shards), 0)
+        self.assertEqual(await count_user_contacts(2, DEFAULT_SHARD, self.shards), 1)
+        async with self.session_factory() as session:
+            user = await session.get(User, 1)
+        self.assertEqual(user.shard, "shard_1")
+
+        async with self.shards.session("shard_1") as session:
+            contacts = (await session.execute(select(Contact).where(Contact.user_id == 1))).scalars().all()
+        self.assertEqual([contact.id for contact in contacts], [1, 2, 3, 4, 5])
+
+        moved_back = await move_user_contacts("big@example.com", DEFAULT_SHARD, self.shards, self.session_factory)
+        self.assertEqual(moved_back, 5)
+        async with self.session_factory() as session:
+            user = await session.get(User, 1)
+        self.assertIsNone(user.shard)
+
+    async def test_move_user_contacts_into_populated_shard(self):
+        async with self.shards.session("shard_1") as session:
+            for i in (3, 5):
+                session.add(Contact(id=i, first_name="Taken", last_name="Id", email="taken@example.com", phone="0",
+                                    b_day=datetime.date(1990, 1, 1), user_id=99))
+            session.add(ContactVersionCounter(user_id=1, version=0, contact_count=0))
+            await session.commit()
+        async with self.session_factory() as session:
+            session.add(ContactVersionCounter(user_id=1, version=7, contact_count=5))
+            await session.commit()
+        old_token = encode_sync_token(7, user_id=1)
+
+        moved = await move_user_contacts("big@example.com", "shard_1", self.shards, self.session_factory,
+                                         chunk_size=2)
+
+        self.assertEqual(moved, 5)
+        self.assertEqual(await count_user_contacts(1, DEFAULT_SHARD, self.shards), 0)
+        async with self.shards.session("shard_1") as session:
+            contacts = (await session.execute(
+                select(Contact).where(Contact.user_id == 1).order_by(Contact.b_day)
+            )).scalars().all()
+            others = (await session.execute(select(Contact.id).where(Contact.user_id == 99))).scalars().all()
+            counter = await session.get(ContactVersionCounter, 1)
+        self.assertEqual([contact.id for contact in contacts], [1, 2, 6, 4, 7])
+        self.assertEqual([contact.version for contact in contacts], [0, 0, 8, 0, 9])
+        self.assertEqual(sorted(others), [3, 5])
+        self.assertEqual((counter.version, counter.contact_count), (9, 5))
+
+        async with self.session_factory() as session:
+            user = await session.get(User, 1)
+        self.assertEqual(user.shard, "shard_1")
+        self.assertIsNotNone(user.contacts_resync_at)
+        with self.assertRaises(HTTPException) as raised:
+            decode_sync_token(old_token, 1, user.contacts_resync_at)
+        self.assertEqual(raised.exception.status_code, 410)
+
+    async def test_get_shard_db_routes_by_user(self):
+        with patch("src.DB.shards.shard_map", self.shards):
+            primary_session = AsyncSession()
+            dependency = get_shard_db(User(id=1), primary_session)
+            self.assertIs(await dependency.__anext__(), primary_session)
+            await dependency.aclose()
+
+            dependency = get_shard_db(User(id=1, shard="shard_1"), primary_session)
+            session = await dependency.__anext__()
+            self.assertIs(session.bind, self.shard)
+            await dependency.aclose()
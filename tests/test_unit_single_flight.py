@@ -0,0 +1,93 @@
+import asyncio
+import unittest
+from unittest.mock import AsyncMock, MagicMock
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.DB.models import User
+from src.repository.contacts_repo import repo_get_contacts
+from src.services.single_flight import SingleFlight, single_flight
+
+
+class TestSingleFlight(unittest.IsolatedAsyncioTestCase):
+    async def test_concurrent_calls_share_one_execution(self):
+        flight = SingleFlight()
+        executions = 0
+
+        async def query():
+            nonlocal executions
+            executions += 1
+            await asyncio.sleep(0.01)
+            return ["contact"]
+
+        results = await asyncio.gather(*(flight.do((1, "query"), query) for _ in range(5)))
+
+        self.assertEqual(executions, 1)
+        self.assertEqual(results, [["contact"]] * 5)
+        self.assertEqual(flight.stats, {"calls": 5, "executions": 1, "coalesced": 4})
+
+    async def test_exception_is_shared(self):
+        flight = SingleFlight()
+
+        async def query():
+            await asyncio.sleep(0.01)
+            raise ValueError("boom")
+
+        results = await asyncio.gather(*(flight.do((1, "query"), query) for _ in range(3)), return_exceptions=True)
+        self.assertTrue(all(isinstance(result, ValueError) for result in results))
+        self.assertEqual(flight.stats["executions"], 1)
+
+    async def test_forget_detaches_in_flight_calls(self):
+        flight = SingleFlight()
+        release = asyncio.Event()
+
+        async def query():
+            await release.wait()
+            return "result"
+
+        first = asyncio.create_task(flight.do((1, "query"), query))
+        await asyncio.sleep(0)
+        flight.forget(1)
+        second = asyncio.create_task(flight.do((1, "query"), query))
+        await asyncio.sleep(0)
+        release.set()
+
+        self.assertEqual(await asyncio.gather(first, second), ["result", "result"])
+        self.assertEqual(flight.stats["executions"], 2)
+
+    async def test_cancelled_leader_does_not_cancel_followers(self):
+        flight = SingleFlight()
+
+        async def query():
+            await asyncio.sleep(0.01)
+            return "result"
+
+        leader = asyncio.create_task(flight.do((1, "query"), query))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(flight.do((1, "query"), query))
+        await asyncio.sleep(0)
+        leader.cancel()
+
+        self.assertEqual(await follower, "result")
+
+    async def test_repository_reads_are_coalesced_per_user(self):
+        session = AsyncMock(AsyncSession)
+
+        async def execute(stmt):
+            await asyncio.sleep(0.01)
+            result = MagicMock()
+            result.scalars.return_value.all.return_value = []
+            return result
+
+        session.execute.side_effect = execute
+        before = dict(single_flight.stats)
+
+        await asyncio.gather(
+            repo_get_contacts(db=session, user=User(id=1), limit=10, offset=0),
+            repo_get_contacts(db=session, user=User(id=1), limit=10, offset=0),
+            repo_get_contacts(db=session, user=User(id=2), limit=10, offset=0),
+            repo_get_contacts(db=session, user=User(id=1), limit=10, offset=10),
+        )
+
+        self.assertEqual(session.execute.await_count, 3)
+        self.assertEqual(single_flight.stats["coalesced"] - before["coalesced"], 1)
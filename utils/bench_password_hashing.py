@@ -0,0 +1,44 @@
+"""
+Бенчмарк схем хешування паролів: хешів за секунду на одне ядро процесора.
+
+Для кожної схеми-кандидата (bcrypt з кількома значеннями раундів і argon2 з параметрами passlib за замовчуванням,
+якщо встановлено argon2-cffi) хешування виконується в одному потоці протягом `seconds` секунд. Перевірка пароля
+під час входу коштує стільки ж, скільки хешування.
+
+    python -m utils.bench_password_hashing [seconds]
+"""
+import sys
+import timeit
+
+from passlib.context import CryptContext
+from passlib.exc import MissingBackendError
+
+from src.conf.config import settings
+from src.services.authservice import create_password_context
+
+
+def candidates() -> list[tuple[str, CryptContext]]:
+    rounds = sorted({10, 11, 12, 13, settings.bcrypt_rounds})
+    schemes = [(f"bcrypt rounds={value}", create_password_context("bcrypt", value)) for value in rounds]
+    schemes.append(("argon2 (passlib defaults)", create_password_context("argon2", settings.bcrypt_rounds)))
+    return schemes
+
+
+def hashes_per_second(context: CryptContext, seconds: float) -> float:
+    count = 0
+    start_time = timeit.default_timer()
+    while timeit.default_timer() - start_time < seconds:
+        context.hash("benchmark password")
+        count += 1
+    return count / (timeit.default_timer() - start_time)
+
+
+if __name__ == "__main__":
+    duration = float(sys.argv[1]) if len(sys.argv) > 1 else 2.0
+    for name, context in candidates():
+        try:
+            rate = hashes_per_second(context, duration)
+        except MissingBackendError:
+            print(f"{name}: not available (pip install argon2-cffi)")
+            continue
+        print(f"{name}: {rate:.1f} hashes/s per core, {1000 / rate:.1f}ms per hash")
@@ -0,0 +1,90 @@
+"""
+Бенчмарк читання великих сторінок контактів: ORM-шлях (об'єкти Contact, pydantic, jsonable_encoder) проти
+швидкого Core-шляху (contacts_read_repo і encode_rows).
+
+Створює SQLite-базу з одним користувачем і `contacts` контактами та `runs` разів вивантажує їх однією сторінкою
+так само, як це роблять ендпоінти GET /contacts/, до готового тіла відповіді. Виводить рядки за секунду
+(найкращий прогін) і піковий обсяг пам'яті за tracemalloc.
+
+    python -m utils.bench_read_path 10000 5
+"""
+import asyncio
+import datetime
+import os
+import random
+import string
+import sys
+import tempfile
+import timeit
+import tracemalloc
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+
+from src.DB.models import Base, Contact, User
+from src.conf.config import settings
+from src.repository.contacts_read_repo import repo_read_contacts
+from src.repository.contacts_repo import repo_get_contacts
+from src.schemas.Contacts_Schemas import ContactPartialResponse
+from src.services.serialization import NegotiatedResponse, encode_rows
+
+
+def random_word() -> str:
+    return random.choice(string.ascii_uppercase) + "".join(random.choices(string.ascii_lowercase, k=7))
+
+
+async def seed(engine, contacts: int):
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+        await connection.execute(insert(User), [{"id": 1, "username": "user1", "email": "user1@example.com",
+                                                 "password": "x", "is_activated": True}])
+        await connection.execute(insert(Contact), [
+            {"first_name": random_word(), "last_name": random_word(), "email": f"{random_word().lower()}@example.com",
+             "phone": "0", "b_day": datetime.date(1990, 1, 1), "rest_data": random_word() * 8, "user_id": 1}
+            for _ in range(contacts)
+        ])
+
+
+async def orm_export(db: AsyncSession, limit: int) -> bytes:
+    contacts = await repo_get_contacts(db=db, user=User(id=1), limit=limit, offset=0)
+    content = [ContactPartialResponse.from_orm(contact) for contact in contacts]
+    return NegotiatedResponse(jsonable_encoder(content, exclude_unset=True)).body
+
+
+async def core_export(db: AsyncSession, limit: int) -> bytes:
+    rows = await repo_read_contacts(db=db, user=User(id=1), limit=limit, offset=0)
+    return NegotiatedResponse(encode_rows(rows)).body
+
+
+async def measure(session_factory, export, contacts: int, runs: int) -> tuple[float, int]:
+    best = float("inf")
+    for _ in range(runs):
+        async with session_factory() as db:
+            start_time = timeit.default_timer()
+            await export(db, contacts)
+            best = min(best, timeit.default_timer() - start_time)
+    async with session_factory() as db:
+        tracemalloc.start()
+        await export(db, contacts)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return contacts / best, peak
+
+
+async def main(contacts: int, runs: int):
+    settings.single_flight_enabled = False
+    engine = create_async_engine(f"sqlite+aiosqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}")
+    session_factory = async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+    await seed(engine, contacts)
+
+    for name, export in (("orm", orm_export), ("core", core_export)):
+        rows_per_second, peak = await measure(session_factory, export, contacts, runs)
+        print(f"{name}: {rows_per_second:,.0f} rows/s, peak memory {peak / 2 ** 20:.1f} MiB")
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    contacts_count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    runs_count = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    asyncio.run(main(contacts_count, runs_count))
@@ -0,0 +1,121 @@
+"""
+Бенчмарк маршрутизації читань на репліку: скільки SQL-запитів знімається з основної бази даних.
+
+Створює дві SQLite-бази (основну і репліку) з однаковими даними для `users` користувачів і проганяє через застосунок
+`steps` кроків: на кожному кроці всі користувачі одночасно виконують по одному запиту - з імовірністю `write_ratio`
+POST /contacts/, інакше GET /contacts/, /contacts/query/ або /contacts/upcoming_birthdays/. Крок триває секунду
+модельного часу, тож після запису користувач читає з основної бази протягом replica_sticky_seconds кроків.
+Рахує SQL-запити до кожної бази без репліки та з нею. Автентифікація (пошук користувача) завжди йде в основну базу.
+
+    python -m utils.bench_read_replica 20 50 0.05
+"""
+import asyncio
+import datetime
+import os
+import random
+import sys
+import tempfile
+
+import httpx
+from sqlalchemy import event, insert
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+
+from src.DB.db import get_db
+from src.DB.models import Base, Contact, User
+from src.conf.config import settings
+from src.services.authservice import authservice as auth_service
+from src.services.read_replica import InMemoryStickinessStore, replica_router
+from main import app
+
+READS = ("/contacts/", "/contacts/query/?query=last", "/contacts/upcoming_birthdays/")
+
+
+class StepClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+async def seed(engine, users: int, contacts_per_user: int = 100):
+    generator = random.Random(0)
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+        await connection.execute(insert(User), [
+            {"id": i, "username": f"user{i}", "email": f"user{i}@example.com", "password": "x", "is_activated": True}
+            for i in range(1, users + 1)
+        ])
+        await connection.execute(insert(Contact), [
+            {"first_name": "First", "last_name": "Last", "email": "contact@example.com", "phone": "0",
+             "b_day": datetime.date(1950, 1, 1) + datetime.timedelta(days=generator.randint(0, 20000)), "user_id": i}
+            for i in range(1, users + 1) for _ in range(contacts_per_user)
+        ])
+
+
+async def request(client: httpx.AsyncClient, token: str, write: bool, generator: random.Random):
+    headers = {"Authorization": f"Bearer {token}"}
+    if write:
+        body = {"first_name": "New", "last_name": "Contact", "email": "new@example.com", "phone": "1",
+                "b_day": "1990-01-01"}
+        response = await client.post("/contacts/", json=body, headers=headers)
+    else:
+        response = await client.get(generator.choice(READS), headers=headers)
+    response.raise_for_status()
+
+
+async def run(client: httpx.AsyncClient, tokens: list[str], steps: int, write_ratio: float, clock: StepClock):
+    generator = random.Random(1)
+    for step in range(steps):
+        clock.now = float(step)
+        await asyncio.gather(*(request(client, token, generator.random() < write_ratio, generator)
+                               for token in tokens))
+
+
+async def main(users: int, steps: int, write_ratio: float):
+    settings.single_flight_enabled = False
+    workdir = tempfile.mkdtemp()
+    engines = {name: create_async_engine(f"sqlite+aiosqlite:///{os.path.join(workdir, name)}.db")
+               for name in ("primary", "replica")}
+    queries = dict.fromkeys(engines, 0)
+    for name, engine in engines.items():
+        await seed(engine, users)
+
+        def count_query(*args, engine_name=name):
+            queries[engine_name] += 1
+
+        event.listen(engine.sync_engine, "before_cursor_execute", count_query)
+
+    primary_session = async_sessionmaker(bind=engines["primary"], class_=AsyncSession, expire_on_commit=False)
+    replica_session = async_sessionmaker(bind=engines["replica"], class_=AsyncSession, expire_on_commit=False)
+
+    async def override_get_db():
+        async with primary_session() as db:
+            yield db
+
+    app.dependency_overrides[get_db] = override_get_db
+    tokens = [await auth_service.create_access_token({"sub": f"user{i}@example.com"}) for i in range(1, users + 1)]
+    clock = StepClock()
+    replica_router.stickiness = InMemoryStickinessStore(settings.replica_sticky_seconds, clock=clock)
+
+    results = {}
+    async with httpx.AsyncClient(app=app, base_url="http://test") as client:
+        for sessionmaker in (None, replica_session):
+            replica_router.sessionmaker = sessionmaker
+            queries.update(dict.fromkeys(queries, 0))
+            await run(client, tokens, steps, write_ratio, clock)
+            results[sessionmaker is not None] = dict(queries)
+            print(f"replica={'on' if sessionmaker else 'off'}: {users * steps} requests, "
+                  f"{queries['primary']} primary queries, {queries['replica']} replica queries")
+    print(f"primary load reduction: {1 - results[True]['primary'] / results[False]['primary']:.0%}, "
+          f"sticky reads: {replica_router.stats['sticky']}")
+    app.dependency_overrides.clear()
+    for engine in engines.values():
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    users_count = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    steps_count = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    writes = float(sys.argv[3]) if len(sys.argv) > 3 else 0.05
+    asyncio.run(main(users_count, steps_count, writes))
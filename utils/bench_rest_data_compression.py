@@ -0,0 +1,84 @@
+"""
+Бенчмарк стиснення нотаток контактів (rest_data): розмір таблиці та час сканування до і після.
+
+Створює дві SQLite-бази з `contacts` контактами, у `large_share` з яких велика нотатка (4-16 КБ тексту),
+у решти - коротка або порожня: одну з колонкою rest_data типу Text (як до стиснення), іншу - з CompressedText.
+Виводить розмір таблиці contacts (усі сторінки, включно з overflow), час повного сканування таблиці, якому
+потрібна колонка, розташована після rest_data, і час читання всіх нотаток (з розпаковуванням).
+
+    python -m utils.bench_rest_data_compression 20000 0.2
+"""
+import asyncio
+import datetime
+import os
+import random
+import sys
+import tempfile
+import timeit
+
+from sqlalchemy import MetaData, Text, insert, select, text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from src.DB.models import Contact, User
+
+WORDS = ["birthday", "meeting", "call", "project", "family", "office", "gift", "dinner", "notes", "remember",
+         "phone", "address", "holiday", "kids", "coffee", "weekend", "contract", "budget", "trip", "doctor"]
+
+
+def note(large: bool) -> str:
+    if large:
+        return " ".join(random.choices(WORDS, k=random.randint(500, 2000)))
+    return random.choice([None, " ".join(random.choices(WORDS, k=20))])
+
+
+def tables(compressed: bool):
+    if compressed:
+        return User.__table__, Contact.__table__
+    metadata = MetaData()
+    users = User.__table__.to_metadata(metadata)
+    contacts = Contact.__table__.to_metadata(metadata)
+    contacts.c.rest_data.type = Text()
+    return users, contacts
+
+
+async def measure(compressed: bool, rows: list[dict]) -> dict:
+    users, contacts = tables(compressed)
+    engine = create_async_engine(f"sqlite+aiosqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}")
+    async with engine.begin() as connection:
+        await connection.run_sync(users.metadata.create_all, tables=[users, contacts])
+        await connection.execute(insert(users), [{"id": 1, "username": "user1", "email": "user1@example.com",
+                                                  "password": "x", "is_activated": True}])
+        await connection.execute(insert(contacts), rows)
+
+    async with engine.connect() as connection:
+        size = (await connection.execute(text("SELECT sum(pgsize) FROM dbstat WHERE name = 'contacts'"))).scalar()
+
+        async def timed(statement) -> float:
+            best = float("inf")
+            for _ in range(5):
+                start_time = timeit.default_timer()
+                (await connection.execute(statement)).all()
+                best = min(best, timeit.default_timer() - start_time)
+            return best
+
+        scan = await timed(text("SELECT count(*), max(user_id) FROM contacts NOT INDEXED WHERE deleted_at IS NULL"))
+        read_notes = await timed(select(contacts.c.id, contacts.c.rest_data))
+    await engine.dispose()
+    return {"size": size, "scan": scan, "read_notes": read_notes}
+
+
+async def main(count: int, large_share: float):
+    random.seed(1)
+    rows = [{"first_name": "Name", "last_name": "Surname", "email": f"contact{i}@example.com", "phone": "0",
+             "b_day": datetime.date(1990, 1, 1), "rest_data": note(random.random() < large_share), "user_id": 1}
+            for i in range(count)]
+    for compressed in (False, True):
+        result = await measure(compressed, rows)
+        print(f"{'compressed' if compressed else 'text'}: table {result['size'] / 2 ** 20:.1f} MiB, "
+              f"full scan {result['scan'] * 1000:.1f}ms, read all notes {result['read_notes'] * 1000:.1f}ms")
+
+
+if __name__ == "__main__":
+    contacts_count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    share = float(sys.argv[2]) if len(sys.argv) > 2 else 0.2
+    asyncio.run(main(contacts_count, share))
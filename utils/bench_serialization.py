@@ -0,0 +1,63 @@
+"""
+Бенчмарк розміру та часу кодування сторінок контактів у різних форматах.
+
+Для сторінок з 10, 100 та 1000 контактів порівнює JSON та MessagePack, без стиснення, з gzip та з brotli.
+
+    python -m utils.bench_serialization
+"""
+import timeit
+
+from faker import Faker
+from fastapi.encoders import jsonable_encoder
+
+from src.conf.config import settings
+from src.middleware.compression import BrotliEncoder, GzipEncoder
+from src.services.serialization import NegotiatedResponse, _msgpack_requested
+
+PAGE_SIZES = (10, 100, 1000)
+REPEAT = 20
+
+
+def generate_page(size: int) -> list[dict]:
+    fake = Faker("uk-UA")
+    return jsonable_encoder([
+        {"id": i, "first_name": fake.first_name(), "last_name": fake.last_name(), "email": fake.email(),
+         "phone": fake.phone_number(), "b_day": fake.date_between(start_date="-90y", end_date="now"),
+         "rest_data": fake.text(max_nb_chars=300) if i % 2 else None}
+        for i in range(size)
+    ])
+
+
+def render(page: list[dict], msgpack_format: bool) -> bytes:
+    token = _msgpack_requested.set(msgpack_format)
+    try:
+        return NegotiatedResponse(page).body
+    finally:
+        _msgpack_requested.reset(token)
+
+
+def encoders():
+    yield "identity", None
+    yield "gzip", lambda: GzipEncoder(settings.compression_gzip_level)
+    yield "br", lambda: BrotliEncoder(settings.compression_brotli_quality)
+
+
+def main():
+    print(f"{'rows':>5} {'format':<9} {'encoding':<9} {'bytes':>9} {'encode, ms':>11}")
+    for size in PAGE_SIZES:
+        page = generate_page(size)
+        for format_name, msgpack_format in (("json", False), ("msgpack", True)):
+            for encoding, encoder_factory in encoders():
+                def encode():
+                    body = render(page, msgpack_format)
+                    if encoder_factory is not None:
+                        body = encoder_factory().compress(body, final=True)
+                    return body
+
+                payload = encode()
+                seconds = timeit.timeit(encode, number=REPEAT) / REPEAT
+                print(f"{size:>5} {format_name:<9} {encoding:<9} {len(payload):>9} {seconds * 1000:>11.3f}")
+
+
+if __name__ == "__main__":
+    main()
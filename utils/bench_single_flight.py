@@ -0,0 +1,82 @@
+"""
+Навантажувальний тест об'єднання однакових одночасних читань (single-flight).
+
+Імітує запуск клієнтського застосунку з кількох вкладок: `clients` одночасних запитів GET /contacts/ та
+GET /contacts/upcoming_birthdays/ для кожного з `users` користувачів. Рахує кількість SQL-запитів до бази
+з вимкненим та увімкненим об'єднанням.
+
+    python -m utils.bench_single_flight 50 20
+"""
+import asyncio
+import datetime
+import os
+import random
+import sys
+import tempfile
+import timeit
+
+from sqlalchemy import event, insert
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+
+from src.DB.models import Base, Contact, User
+from src.conf.config import settings
+from src.repository.contacts_repo import repo_get_contacts, repo_get_upcoming_birthday_contacts
+from src.services.single_flight import single_flight
+
+
+async def seed(engine, users: int, contacts_per_user: int = 200):
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+        await connection.execute(insert(User), [
+            {"id": i, "username": f"user{i}", "email": f"user{i}@example.com", "password": "x", "is_activated": True}
+            for i in range(1, users + 1)
+        ])
+        await connection.execute(insert(Contact), [
+            {"first_name": "First", "last_name": "Last", "email": "contact@example.com", "phone": "0",
+             "b_day": datetime.date(1950, 1, 1) + datetime.timedelta(days=random.randint(0, 20000)), "user_id": i}
+            for i in range(1, users + 1) for _ in range(contacts_per_user)
+        ])
+
+
+async def app_launch(session_factory, user: User):
+    async with session_factory() as db:
+        await repo_get_contacts(db=db, user=user, limit=10, offset=0)
+    async with session_factory() as db:
+        await repo_get_upcoming_birthday_contacts(user=user, db=db)
+
+
+async def run(session_factory, users: int, clients: int) -> float:
+    start_time = timeit.default_timer()
+    await asyncio.gather(*(app_launch(session_factory, User(id=user_id))
+                           for user_id in range(1, users + 1) for _ in range(clients)))
+    return timeit.default_timer() - start_time
+
+
+async def main(clients: int, users: int):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}")
+    session_factory = async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+    await seed(engine, users)
+
+    queries = 0
+
+    def count_query(*args):
+        nonlocal queries
+        queries += 1
+
+    event.listen(engine.sync_engine, "before_cursor_execute", count_query)
+
+    for enabled in (False, True):
+        settings.single_flight_enabled = enabled
+        queries = 0
+        before = dict(single_flight.stats)
+        seconds = await run(session_factory, users, clients)
+        coalesced = single_flight.stats["coalesced"] - before["coalesced"]
+        print(f"single_flight_enabled={enabled}: {users * clients * 2} calls, {queries} SQL queries, "
+              f"{coalesced} coalesced, {seconds:.3f}s")
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    concurrent_clients = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    users_count = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    asyncio.run(main(concurrent_clients, users_count))
@@ -0,0 +1,107 @@
+"""
+Профілювання Python-накладних витрат гарячих запитів репозиторію.
+
+Порівнює процесорний час на виклик для запитів, що будуються через select() при кожному виклику (як раніше),
+і для поточних lambda_stmt-запитів репозиторію. Використовується SQLite в пам'яті з невеликими таблицями,
+тому час визначається переважно побудовою, кешуванням та компіляцією запиту.
+
+    python -m utils.bench_statement_cache 5000
+"""
+import asyncio
+import datetime
+import sys
+import time
+
+from sqlalchemy import select, asc, func, insert
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from sqlalchemy.pool import StaticPool
+
+from src.DB.models import Base, Contact, User
+from src.conf.config import settings
+from src.repository.contacts_repo import get_specific_contact_belongs_to_user, repo_get_contacts, \
+    repo_get_contacts_query
+from src.repository.users_repo import repo_user_authentication_by_email
+
+
+async def select_get_specific(id, user, db):
+    stmt = select(Contact).where(Contact.user_id == user.id, Contact.deleted_at.is_(None)).filter(Contact.id == id)
+    return (await db.execute(stmt)).scalar()
+
+
+async def select_get_contacts(db, user, limit, offset):
+    stmt = (select(Contact).where(Contact.user_id == user.id, Contact.deleted_at.is_(None))
+            .offset(offset).limit(limit).order_by(asc(Contact.id)))
+    return (await db.execute(stmt)).scalars().all()
+
+
+async def select_get_contacts_query(user, query, limit, offset, db):
+    lower_search_query = f"%{query}%".lower()
+    stmt = (select(Contact)
+            .where((Contact.user_id == user.id) & (Contact.deleted_at.is_(None)) &
+                   ((func.lower(Contact.first_name).like(lower_search_query)) |
+                    (func.lower(Contact.last_name).like(lower_search_query)) |
+                    (func.lower(Contact.email).like(lower_search_query))))
+            .offset(offset).limit(limit).order_by(asc(Contact.id)))
+    return (await db.execute(stmt)).scalars().all()
+
+
+async def select_user_by_email(email, db):
+    return (await db.execute(select(User).where(User.email == email))).scalar()
+
+
+async def measure(name: str, calls: int, fn) -> float:
+    await fn(0)
+    start = time.process_time()
+    for i in range(calls):
+        await fn(i)
+    per_call = (time.process_time() - start) / calls * 1e6
+    print(f"{name:<56} {per_call:>9.1f} us/call")
+    return per_call
+
+
+async def main(calls: int):
+    settings.single_flight_enabled = False
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+        await connection.execute(insert(User), [
+            {"id": i, "username": f"user{i}", "email": f"user{i}@example.com", "password": "x"} for i in range(1, 11)
+        ])
+        await connection.execute(insert(Contact), [
+            {"first_name": f"John{i}", "last_name": "Doe", "email": "john@example.com", "phone": "0",
+             "b_day": datetime.date(1990, 1, 1), "user_id": i % 10 + 1} for i in range(100)
+        ])
+    session_factory = async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+    users = [User(id=i) for i in range(1, 11)]
+
+    cases = {
+        "get_specific_contact_belongs_to_user": (
+            lambda db, i: select_get_specific(i % 100, users[i % 10], db),
+            lambda db, i: get_specific_contact_belongs_to_user(i % 100, users[i % 10], db)),
+        "repo_get_contacts": (
+            lambda db, i: select_get_contacts(db, users[i % 10], 10, i % 3),
+            lambda db, i: repo_get_contacts(db=db, user=users[i % 10], limit=10, offset=i % 3)),
+        "repo_get_contacts(fields=first_name)": (
+            None,
+            lambda db, i: repo_get_contacts(db=db, user=users[i % 10], limit=10, offset=i % 3,
+                                            fields=["id", "first_name"])),
+        "repo_get_contacts_query": (
+            lambda db, i: select_get_contacts_query(users[i % 10], f"john{i % 10}", 10, 0, db),
+            lambda db, i: repo_get_contacts_query(user=users[i % 10], query=f"john{i % 10}", limit=10, offset=0,
+                                                  db=db)),
+        "repo_user_authentication_by_email": (
+            lambda db, i: select_user_by_email(f"user{i % 10 + 1}@example.com", db),
+            lambda db, i: repo_user_authentication_by_email(f"user{i % 10 + 1}@example.com", db)),
+    }
+
+    async with session_factory() as db:
+        for name, (before, after) in cases.items():
+            if before is not None:
+                await measure(f"{name} [select() per call]", calls, lambda i: before(db, i))
+            await measure(f"{name} [lambda_stmt]", calls, lambda i: after(db, i))
+            db.expunge_all()
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000))
@@ -0,0 +1,38 @@
+"""
+Підбір кількості раундів bcrypt для поточного процесора.
+
+Вимірює медіанний час хешування пароля для кожної кількості раундів від 4 до 16 і обирає найбільшу,
+за якої хешування вкладається в цільовий час (за замовчуванням 250 мс). Результат - рядок для .env:
+
+    python -m utils.calibrate_bcrypt [target_ms]
+    BCRYPT_ROUNDS=12
+
+Після зміни bcrypt_rounds збережені хеші перераховуються під час наступного входу користувача.
+"""
+import statistics
+import sys
+import timeit
+
+from src.services.authservice import create_password_context
+
+
+def measure_ms(rounds: int, samples: int = 5) -> float:
+    context = create_password_context("bcrypt", rounds)
+    return statistics.median(timeit.repeat(lambda: context.hash("calibration password"), number=1,
+                                           repeat=samples)) * 1000
+
+
+def calibrate(target_ms: float) -> int:
+    chosen = 4
+    for rounds in range(4, 17):
+        elapsed_ms = measure_ms(rounds)
+        print(f"rounds={rounds}: {elapsed_ms:.1f}ms", file=sys.stderr)
+        if elapsed_ms > target_ms:
+            break
+        chosen = rounds
+    return chosen
+
+
+if __name__ == "__main__":
+    target = float(sys.argv[1]) if len(sys.argv) > 1 else 250.0
+    print(f"BCRYPT_ROUNDS={calibrate(target)}")
@@ -0,0 +1,20 @@
+"""
+Створення підписаного токена для профілювання окремих запитів (потрібно profiler_enabled=True).
+
+    python -m utils.create_profile_token [hours] [--tracemalloc]
+
+Токен передається у заголовку X-Profile; результат зберігається у каталозі profiler_output_dir під ідентифікатором
+з заголовка відповіді X-Profile-Id:
+
+    curl -H "X-Profile: <token>" -H "Authorization: Bearer ..." http://localhost:8000/contacts/
+    flamegraph.pl profiles/<X-Profile-Id>.folded > profile.svg
+"""
+import sys
+
+from src.conf.config import settings
+from src.middleware.profiler import create_profile_token
+
+if __name__ == "__main__":
+    args = [arg for arg in sys.argv[1:] if arg != "--tracemalloc"]
+    hours = int(args[0]) if args else 1
+    print(create_profile_token(settings.secret_key, settings.algorithm, hours, "--tracemalloc" in sys.argv))
@@ -0,0 +1,139 @@
+"""
+Навантажувальний тест контролю прийому запитів: корисна пропускна здатність (goodput) при навантаженні,
+що вдвічі перевищує місткість, без LoadSheddingMiddleware і з ним.
+
+Тестовий застосунок тримає з'єднання зі справжнього пулу SQLAlchemy (`pool_size` з'єднань) протягом часу
+обробки запиту: читання та вхід - 20 мс, вивантаження (limit=10000) - 100 мс; суміш 80% читань, 10% вивантажень
+і 10% входів. Запити надходять з постійною частотою 2x від місткості, клієнт чекає відповідь `client_timeout`
+секунд, а сервер, як і uvicorn, продовжує обробляти запит, від якого клієнт уже відмовився. Goodput - відповіді 200,
+отримані вчасно.
+
+    python -m utils.load_test_shedding 10
+"""
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import timeit
+
+from fastapi import FastAPI
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from src.middleware.load_shedding import LoadSheddingMiddleware
+from src.services.load_shedding import AdmissionController
+from src.services.pool_metrics import PoolMetrics
+
+POOL_SIZE = 5
+SERVICE_TIME = {"read": 0.02, "bulk": 0.1, "critical": 0.02}
+MIX = [("read", 0.8), ("bulk", 0.1), ("critical", 0.1)]
+REQUESTS = {"read": ("GET", "/contacts/", b"limit=10"), "bulk": ("GET", "/contacts/", b"limit=10000"),
+            "critical": ("POST", "/auth/login", b"")}
+CLIENT_TIMEOUT = 1.0
+
+
+def create_app(engine, controller) -> FastAPI:
+    app = FastAPI()
+    if controller is not None:
+        app.add_middleware(LoadSheddingMiddleware, controller=controller)
+
+    async def hold_connection(service_time: float):
+        async with engine.connect() as connection:
+            await connection.execute(text("SELECT 1"))
+            await asyncio.sleep(service_time)
+
+    @app.get("/contacts/")
+    async def contacts(limit: int = 10):
+        await hold_connection(SERVICE_TIME["bulk" if limit > 500 else "read"])
+        return []
+
+    @app.post("/auth/login")
+    async def login():
+        await hold_connection(SERVICE_TIME["critical"])
+        return {}
+
+    return app
+
+
+async def call(app, kind: str, server_tasks: list) -> int:
+    method, path, query_string = REQUESTS[kind]
+    scope = {"type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": method, "path": path,
+             "raw_path": path.encode(), "root_path": "", "scheme": "http", "query_string": query_string,
+             "headers": [], "client": ("127.0.0.1", 1), "server": ("testserver", 80)}
+    status = asyncio.get_running_loop().create_future()
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.start" and not status.done():
+            status.set_result(message["status"])
+
+    server_tasks.append(asyncio.create_task(app(scope, receive, send)))
+    return await status
+
+
+async def run(shedding: bool, duration: float) -> dict:
+    engine = create_async_engine(f"sqlite+aiosqlite:///{os.path.join(tempfile.mkdtemp(), 'load.db')}",
+                                 poolclass=AsyncAdaptedQueuePool, pool_size=POOL_SIZE, max_overflow=0, pool_timeout=60)
+    metrics = PoolMetrics()
+    metrics.install(engine)
+    controller = AdmissionController(max_in_flight=4 * POOL_SIZE, pool_wait_target_ms=50, metrics=metrics) \
+        if shedding else None
+    app = create_app(engine, controller)
+
+    average_service_time = sum(SERVICE_TIME[kind] * share for kind, share in MIX)
+    capacity = POOL_SIZE / average_service_time
+    interval = 1 / (2 * capacity)
+    server_tasks = []
+    results = {kind: {"sent": 0, "good": 0, "rejected": 0, "timed_out": 0, "latencies": []} for kind, _ in MIX}
+
+    async def client(kind: str):
+        result = results[kind]
+        result["sent"] += 1
+        start_time = timeit.default_timer()
+        try:
+            status = await asyncio.wait_for(call(app, kind, server_tasks), CLIENT_TIMEOUT)
+        except asyncio.TimeoutError:
+            result["timed_out"] += 1
+            return
+        if status == 200:
+            result["good"] += 1
+            result["latencies"].append(timeit.default_timer() - start_time)
+        elif status == 503:
+            result["rejected"] += 1
+
+    clients = []
+    started = timeit.default_timer()
+    next_at = started
+    random.seed(1)
+    while next_at - started < duration:
+        await asyncio.sleep(max(next_at - timeit.default_timer(), 0))
+        kind = random.choices([kind for kind, _ in MIX], weights=[share for _, share in MIX])[0]
+        clients.append(asyncio.create_task(client(kind)))
+        next_at += interval
+    await asyncio.gather(*clients)
+    # Сервер дообробляє запити, від яких клієнти вже відмовились
+    await asyncio.gather(*server_tasks)
+    await engine.dispose()
+    return {"capacity": capacity, "offered": 2 * capacity, "results": results, "duration": duration}
+
+
+def print_report(shedding: bool, report: dict):
+    results = report["results"]
+    good = sum(result["good"] for result in results.values())
+    print(f"load shedding {'on' if shedding else 'off'}: capacity {report['capacity']:.0f} rps, "
+          f"offered {report['offered']:.0f} rps, goodput {good / report['duration']:.0f} rps")
+    for kind, result in results.items():
+        latencies = sorted(result["latencies"])
+        p99 = f"{latencies[int(len(latencies) * 0.99)] * 1000:.0f}ms" if latencies else "-"
+        print(f"  {kind}: sent {result['sent']}, good {result['good']}, rejected {result['rejected']}, "
+              f"timed out {result['timed_out']}, p99 {p99}")
+
+
+if __name__ == "__main__":
+    test_duration = float(sys.argv[1]) if len(sys.argv) > 1 else 10.0
+    for enabled in (False, True):
+        print_report(enabled, asyncio.run(run(enabled, test_duration)))
@@ -0,0 +1,33 @@
+"""
+Перенесення контактів користувача між шардами.
+
+    python -m utils.move_user_shard user@example.com shard_1
+
+Перед першим перенесенням у новий шард створіть у ньому таблицю контактів:
+
+    python -m utils.move_user_shard --create-schema shard_1
+"""
+import asyncio
+import sys
+import timeit
+
+from src.DB.shards import shard_map, create_shard_schema, move_user_contacts
+
+
+async def main(args: list[str]):
+    if args[0] == "--create-schema":
+        await create_shard_schema(shard_map.engine(args[1]))
+        print(f"Contacts schema created in shard '{args[1]}'")
+        return
+    email, target = args
+    moved = await move_user_contacts(email, target)
+    print(f"Moved {moved} contacts of {email} to shard '{target}'")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print(__doc__)
+        sys.exit(1)
+    start_time = timeit.default_timer()
+    asyncio.run(main(sys.argv[1:]))
+    print(f"Finished in {timeit.default_timer() - start_time}")
@@ -0,0 +1,21 @@
+import asyncio
+import datetime
+import timeit
+
+from src.DB.shards import shard_map
+from src.conf.config import settings
+from src.repository.contacts_repo import repo_purge_contact_tombstones
+
+
+async def purge_contact_tombstones():
+    before = datetime.datetime.utcnow() - datetime.timedelta(days=settings.contacts_tombstone_retention_days)
+    for shard in shard_map.engines:
+        async with shard_map.session(shard) as session:
+            purged = await repo_purge_contact_tombstones(before, session)
+        print(f"Shard '{shard}': purged {purged} contact tombstones deleted before {before}")
+
+
+if __name__ == "__main__":
+    start_time = timeit.default_timer()
+    asyncio.run(purge_contact_tombstones())
+    print(f"Tombstones purged in {timeit.default_timer() - start_time}")
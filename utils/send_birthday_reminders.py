@@ -0,0 +1,15 @@
+import asyncio
+import timeit
+
+from src.services.birthday_reminders import BirthdayReminderJob
+
+
+async def send_birthday_reminders():
+    report = await BirthdayReminderJob().run()
+    print(f"Birthday reminders sent: {report}")
+
+
+if __name__ == "__main__":
+    start_time = timeit.default_timer()
+    asyncio.run(send_birthday_reminders())
+    print(f"Birthday reminders finished in {timeit.default_timer() - start_time}")